@@ -0,0 +1,220 @@
+import importlib
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from lectura_sql import BACKENDS, leer_sql
+
+# ============================================================
+# BENCHMARK DE DRIVERS MYSQL
+# ============================================================
+# Consulta ancha de referencia: la unión de reservas del hotel con las
+# columnas explícitas (y con alias) de load_hotel_data del dashboard
+# principal. Con t.* las claves id_* se repetían entre tablas y cada backend
+# devolvía una cantidad distinta de columnas.
+CONSULTA_HOTEL = """
+SELECT
+    r.id_reserva, r.fecha_reserva, r.monto_total, r.estado_reserva,
+    r.localizacion_reserva, r.fecha_vencimiento,
+    c.id_cliente, c.nombre, c.apellido_paterno, c.apellido_materno, c.ci,
+    CONCAT(c.nombre, ' ', c.apellido_paterno, ' ', c.apellido_materno) AS nombre_cliente,
+    dr.id_detalle_reserva, dr.precio_unitario, dr.cantidad_personas, dr.check_in, dr.check_out,
+    h.id_habitacion, h.numero_habitacion, h.piso, h.precio AS precio_habitacion,
+    th.id_tipo_habitacion, th.descripcion AS tipo_habitacion, th.numero_camas, th.capacidad, th.tamano_m2,
+    COALESCE(se.nombre, 'Sin servicio') AS servicio_especial,
+    COALESCE(se.precio, 0) AS precio_servicio,
+    p.id_pago, p.monto AS monto_pago, p.estado_pago, p.fecha_pago,
+    mp.nombre AS metodo_pago
+FROM reserva r
+LEFT JOIN cliente c ON r.id_cliente = c.id_cliente
+LEFT JOIN detalle_reserva dr ON r.id_reserva = dr.id_reserva
+LEFT JOIN habitacion h ON dr.id_habitacion = h.id_habitacion
+LEFT JOIN tipo_habitacion th ON h.id_tipo_habitacion = th.id_tipo_habitacion
+LEFT JOIN detalle_reserva_servicios_especiales drse ON dr.id_detalle_reserva = drse.id_detalle_reserva
+LEFT JOIN servicios_especiales se ON drse.id_servicios_especiales = se.id_servicios_especiales
+LEFT JOIN pago p ON r.id_reserva = p.id_reserva
+LEFT JOIN detalle_pago dp ON p.id_detalle_pago = dp.id_detalle_pago
+LEFT JOIN metodo_pago mp ON dp.id_metodo_pago = mp.id_metodo_pago
+"""
+
+# Filas leídas por lote y filas usadas para estimar el tamaño en bytes
+TAMANO_LOTE = 1000
+MUESTRA_BYTES = 1000
+
+# Módulo de Python de cada driver
+MODULOS = {
+    "pymysql": "pymysql",
+    "mysqldb": "MySQLdb",
+    "mysqlconnector": "mysql.connector",
+}
+
+# Drivers que aceptan compresión del protocolo (pymysql no)
+CON_COMPRESION = {"mysqldb", "mysqlconnector"}
+
+
+def drivers_instalados():
+    """Drivers de MODULOS que se pueden importar."""
+    instalados = []
+    for driver, modulo in MODULOS.items():
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            continue
+        instalados.append(driver)
+    return instalados
+
+
+def conectar(driver, uri, comprimir=False):
+    """
+    Abre una conexión DBAPI directa con el driver indicado usando los datos
+    de la URI. Con `comprimir` el driver tiene que estar en CON_COMPRESION.
+    """
+    if comprimir and driver not in CON_COMPRESION:
+        raise ValueError(f"{driver} no soporta compresión")
+    url = make_url(uri)
+    host, puerto = url.host or "localhost", url.port or 3306
+    usuario, clave, base = url.username or "", url.password or "", url.database
+
+    if driver == "pymysql":
+        import pymysql
+        return pymysql.connect(host=host, port=puerto, user=usuario, password=clave, database=base)
+    if driver == "mysqldb":
+        import MySQLdb
+        return MySQLdb.connect(host=host, port=puerto, user=usuario, passwd=clave, db=base, compress=comprimir)
+    if driver == "mysqlconnector":
+        import mysql.connector
+        return mysql.connector.connect(host=host, port=puerto, user=usuario, password=clave,
+                                       database=base, compress=comprimir)
+    raise ValueError(f"Driver desconocido: {driver}")
+
+
+def abrir_cursor(driver, conn, servidor):
+    """Cursor con buffer en el cliente, o sin buffer (lectura en streaming) si servidor=True."""
+    if driver == "pymysql":
+        import pymysql.cursors
+        return conn.cursor(pymysql.cursors.SSCursor) if servidor else conn.cursor()
+    if driver == "mysqldb":
+        import MySQLdb.cursors
+        return conn.cursor(MySQLdb.cursors.SSCursor) if servidor else conn.cursor()
+    return conn.cursor(buffered=not servidor)
+
+
+def latencias(driver, uri, repeticiones=200):
+    """Percentiles (ms) del tiempo de ida y vuelta de SELECT 1."""
+    conn = conectar(driver, uri)
+    try:
+        cursor = conn.cursor()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        cursor.close()
+    finally:
+        conn.close()
+    p50, p90, p99 = np.percentile(tiempos, [50, 90, 99])
+    return {"p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": max(tiempos)}
+
+
+def _bytes_fila(fila):
+    """Tamaño aproximado en bytes de una fila (texto por largo, el resto 8 bytes)."""
+    return sum(len(v) if isinstance(v, (str, bytes, bytearray)) else 8 for v in fila)
+
+
+def lectura(driver, uri, consulta=CONSULTA_HOTEL, servidor=False, comprimir=False):
+    """Filas, segundos, filas/s y MB/s al leer la consulta completa."""
+    conn = conectar(driver, uri, comprimir=comprimir)
+    try:
+        cursor = abrir_cursor(driver, conn, servidor)
+        inicio = time.perf_counter()
+        cursor.execute(consulta)
+        filas, bytes_muestra, filas_muestra = 0, 0, 0
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            filas += len(lote)
+            if filas_muestra < MUESTRA_BYTES:
+                bytes_muestra += sum(_bytes_fila(f) for f in lote)
+                filas_muestra += len(lote)
+        segundos = time.perf_counter() - inicio
+        cursor.close()
+    finally:
+        conn.close()
+
+    megas = (bytes_muestra / filas_muestra * filas / 1e6) if filas_muestra else 0.0
+    return {
+        "filas": filas,
+        "segundos": segundos,
+        "filas_s": filas / segundos if segundos else 0.0,
+        "mb_s": megas / segundos if segundos else 0.0,
+    }
+
+
+def comparar_drivers(uri, consulta=CONSULTA_HOTEL, repeticiones=200):
+    """
+    Corre latencia y lectura con cada driver instalado, con y sin cursor de
+    servidor y compresión. Devuelve (filas de latencia, filas de lectura).
+    """
+    tabla_latencia, tabla_lectura = [], []
+    for driver in drivers_instalados():
+        try:
+            tabla_latencia.append({"driver": driver, **latencias(driver, uri, repeticiones)})
+        except Exception as e:
+            tabla_latencia.append({"driver": driver, "error": str(e)[:120]})
+
+        for servidor in (False, True):
+            for comprimir in (False, True):
+                fila = {
+                    "driver": driver,
+                    "cursor": "servidor" if servidor else "cliente",
+                    "compresion": comprimir,
+                }
+                if comprimir and driver not in CON_COMPRESION:
+                    fila["error"] = f"{driver} no soporta compresión"
+                    tabla_lectura.append(fila)
+                    continue
+                try:
+                    fila.update(lectura(driver, uri, consulta, servidor=servidor, comprimir=comprimir))
+                except Exception as e:
+                    fila["error"] = str(e)[:120]
+                tabla_lectura.append(fila)
+    return tabla_latencia, tabla_lectura
+
+
+def comparar_backends(uri, consulta=CONSULTA_HOTEL, repeticiones=3):
+    """
+    Tiempo de leer_sql con cada backend (mejor de `repeticiones`) y cuántas
+    veces más rápido es que pd.read_sql. Los backends no instalados quedan
+    con error en lugar de caer en silencio a pandas.
+    """
+    engine = create_engine(uri)
+    tabla = []
+    try:
+        for backend in BACKENDS:
+            fila = {"backend": backend}
+            try:
+                tiempos = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    df = leer_sql(consulta, engine, backend=backend)
+                    tiempos.append(time.perf_counter() - inicio)
+                if df.attrs.get("backend") != backend:
+                    raise RuntimeError(f"{backend} no disponible (se usó {df.attrs.get('backend')})")
+                segundos = min(tiempos)
+                fila.update({"filas": len(df), "segundos": segundos,
+                             "filas_s": len(df) / segundos if segundos else 0.0})
+            except Exception as e:
+                fila["error"] = str(e)[:120]
+            tabla.append(fila)
+    finally:
+        engine.dispose()
+
+    base = next((f["segundos"] for f in tabla if f["backend"] == "pandas" and "segundos" in f), None)
+    for fila in tabla:
+        if base and fila.get("segundos"):
+            fila["aceleracion"] = base / fila["segundos"]
+    return tabla
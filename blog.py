@@ -1,3 +1,6 @@
+import argparse
+import hashlib
+
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
@@ -14,6 +17,18 @@ DB_CONFIG = {
 
 ARCHIVO_CSV = 'Practica Normalizacion(4).csv'
 
+# Modo de carga:
+#   'completo'    -> TRUNCATE y recarga de todas las filas
+#   'incremental' -> solo INSERT ... ON DUPLICATE KEY UPDATE de filas nuevas o modificadas
+#   'staging'     -> carga en <tabla>_staging y reemplazo atómico con RENAME TABLE
+MODO_CARGA = 'completo'
+
+# En modo incremental, borrar las filas que ya no existen en el CSV
+ELIMINAR_FALTANTES = False
+
+# Tabla donde se guarda el hash de contenido de cada fila cargada
+TABLA_HASHES = 'Carga_Hashes'
+
 # -----------------------------------------------------------
 # 2. FUNCIÓN DE CONEXIÓN
 # -----------------------------------------------------------
@@ -28,9 +43,288 @@ def crear_conexion():
         return None
 
 # -----------------------------------------------------------
-# 3. PROCESAMIENTO Y POBLAMIENTO DE DATOS
+# 3. HASHES DE CONTENIDO (MODO INCREMENTAL)
+# -----------------------------------------------------------
+def valor_sql(valor):
+    """Convierte valores de pandas/numpy a tipos nativos que acepta el conector."""
+    if pd.isna(valor):
+        return None
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+def hash_fila(valores):
+    """Calcula un hash SHA-1 estable con los valores de una fila."""
+    texto = '\x1f'.join('' if v is None else str(v) for v in valores)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+def crear_tabla_hashes(cursor):
+    """Crea (si no existe) la tabla con el hash de contenido de cada fila cargada."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_HASHES} (
+        tabla VARCHAR(64) NOT NULL,
+        clave VARCHAR(255) NOT NULL,
+        id_fila INT NOT NULL,
+        hash_contenido CHAR(40) NOT NULL,
+        PRIMARY KEY (tabla, clave)
+    )
+    """)
+
+def leer_hashes(cursor, tabla):
+    """Devuelve {clave: (id_fila, hash)} de las filas cargadas previamente."""
+    cursor.execute(
+        f"SELECT clave, id_fila, hash_contenido FROM {TABLA_HASHES} WHERE tabla = %s",
+        (tabla,)
+    )
+    return {clave: (id_fila, hash_contenido) for clave, id_fila, hash_contenido in cursor.fetchall()}
+
+def guardar_hashes(cursor, tabla, registros):
+    """Guarda una lista de (clave, id_fila, hash) para la tabla indicada."""
+    if not registros:
+        return
+    sql = f"""
+    INSERT INTO {TABLA_HASHES} (tabla, clave, id_fila, hash_contenido)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id_fila = VALUES(id_fila), hash_contenido = VALUES(hash_contenido)
+    """
+    cursor.executemany(sql, [(tabla, clave, id_fila, h) for clave, id_fila, h in registros])
+
+def cargar_completo(cursor, tabla, columnas, filas):
+    """
+    TRUNCATE e inserción de todas las filas.
+    filas: lista de (clave, valores). Devuelve {clave: id generado}.
+    """
+    cursor.execute(f"TRUNCATE TABLE {tabla}")
+    cursor.execute(f"DELETE FROM {TABLA_HASHES} WHERE tabla = %s", (tabla,))
+
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    mapa = {}
+    registros = []
+    for clave, valores in filas:
+        cursor.execute(sql, valores)
+        # Obtener el ID generado (AUTO_INCREMENT)
+        mapa[clave] = cursor.lastrowid
+        registros.append((clave, cursor.lastrowid, hash_fila(valores)))
+
+    guardar_hashes(cursor, tabla, registros)
+    return mapa
+
+def buscar_existente(cursor, tabla, columna_id, columnas, columnas_clave, valores):
+    """Id de la fila de la tabla con la misma clave natural, o None."""
+    condiciones = ' AND '.join(f"{col} <=> %s" for col in columnas_clave)
+    cursor.execute(
+        f"SELECT {columna_id} FROM {tabla} WHERE {condiciones} LIMIT 1",
+        tuple(valores[columnas.index(col)] for col in columnas_clave)
+    )
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+def cargar_incremental(cursor, tabla, columna_id, columnas, filas, columnas_clave):
+    """
+    Inserta o actualiza solo las filas cuyo hash cambió respecto a la última carga.
+    filas: lista de (clave, valores). columnas_clave: columnas de la clave natural.
+    Devuelve ({clave: id}, filas escritas, {clave: id} de filas que ya no están en el CSV).
+    """
+    anteriores = leer_hashes(cursor, tabla)
+
+    # El id se envía explícito: NULL para filas nuevas (AUTO_INCREMENT),
+    # el id guardado para filas existentes (dispara el ON DUPLICATE KEY UPDATE)
+    todas = [columna_id] + columnas
+    actualizar = ', '.join(f"{col} = VALUES({col})" for col in columnas)
+    sql = f"""
+    INSERT INTO {tabla} ({', '.join(todas)}) VALUES ({', '.join(['%s'] * len(todas))})
+    ON DUPLICATE KEY UPDATE {actualizar}
+    """
+
+    mapa = {}
+    registros = []
+    for clave, valores in filas:
+        h = hash_fila(valores)
+        anterior = anteriores.pop(clave, None)
+        if anterior is not None and anterior[1] == h:
+            mapa[clave] = anterior[0]
+            continue
+
+        if anterior is not None:
+            id_anterior = anterior[0]
+        else:
+            # Sin hash guardado (primera carga incremental sobre datos cargados
+            # en modo completo, o fila insertada por otro medio): se busca por
+            # clave natural para actualizarla en lugar de duplicarla
+            id_anterior = buscar_existente(cursor, tabla, columna_id, columnas, columnas_clave, valores)
+        cursor.execute(sql, (id_anterior, *valores))
+        id_fila = id_anterior if id_anterior is not None else cursor.lastrowid
+        mapa[clave] = id_fila
+        registros.append((clave, id_fila, h))
+
+    guardar_hashes(cursor, tabla, registros)
+    faltantes = {clave: id_fila for clave, (id_fila, _) in anteriores.items()}
+    return mapa, len(registros), faltantes
+
+def eliminar_faltantes(cursor, tabla, columna_id, faltantes):
+    """Borra de la tabla (y de los hashes) las filas que ya no están en el CSV."""
+    if not faltantes:
+        return
+    ids = list(faltantes.values())
+    cursor.execute(
+        f"DELETE FROM {tabla} WHERE {columna_id} IN ({', '.join(['%s'] * len(ids))})",
+        ids
+    )
+    claves = list(faltantes.keys())
+    cursor.execute(
+        f"DELETE FROM {TABLA_HASHES} WHERE tabla = %s AND clave IN ({', '.join(['%s'] * len(claves))})",
+        (tabla, *claves)
+    )
+    print(f"{tabla}: {len(ids)} filas eliminadas (ya no están en el CSV)")
+
+# -----------------------------------------------------------
+# 4. TABLAS STAGING (MODO STAGING)
 # -----------------------------------------------------------
-def poblar_tablas():
+def crear_staging(cursor, tabla):
+    """
+    Crea <tabla>_staging vacía con la estructura de la tabla y le quita los
+    índices secundarios. Devuelve [(nombre, no_unico, columnas)] para
+    reconstruirlos después de la carga.
+    """
+    staging = f"{tabla}_staging"
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    # CREATE TABLE ... LIKE copia columnas, PK e índices, pero no las FKs
+    cursor.execute(f"CREATE TABLE {staging} LIKE {tabla}")
+
+    cursor.execute("""
+    SELECT INDEX_NAME, NON_UNIQUE,
+           GROUP_CONCAT(CONCAT('`', COLUMN_NAME, '`', IF(SUB_PART IS NULL, '', CONCAT('(', SUB_PART, ')')))
+                        ORDER BY SEQ_IN_INDEX SEPARATOR ', ')
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME <> 'PRIMARY'
+    GROUP BY INDEX_NAME, NON_UNIQUE
+    """, (staging,))
+    indices = cursor.fetchall()
+
+    if indices:
+        cursor.execute(f"ALTER TABLE {staging} " + ', '.join(f"DROP INDEX `{nombre}`" for nombre, _, _ in indices))
+    return indices
+
+def reconstruir_indices(cursor, tabla, indices):
+    """Vuelve a crear los índices secundarios de <tabla>_staging en un solo ALTER."""
+    if not indices:
+        return
+    definiciones = [
+        f"ADD {'INDEX' if no_unico else 'UNIQUE INDEX'} `{nombre}` ({columnas})"
+        for nombre, no_unico, columnas in indices
+    ]
+    cursor.execute(f"ALTER TABLE {tabla}_staging " + ', '.join(definiciones))
+
+def leer_claves_foraneas(cursor, tabla):
+    """[(nombre, columnas, tabla referida, columnas referidas, ON UPDATE, ON DELETE)] de la tabla."""
+    cursor.execute("""
+    SELECT k.CONSTRAINT_NAME,
+           GROUP_CONCAT(CONCAT('`', k.COLUMN_NAME, '`') ORDER BY k.ORDINAL_POSITION SEPARATOR ', '),
+           k.REFERENCED_TABLE_NAME,
+           GROUP_CONCAT(CONCAT('`', k.REFERENCED_COLUMN_NAME, '`') ORDER BY k.ORDINAL_POSITION SEPARATOR ', '),
+           r.UPDATE_RULE, r.DELETE_RULE
+    FROM information_schema.KEY_COLUMN_USAGE k
+    JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+      ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+     AND r.TABLE_NAME = k.TABLE_NAME
+    WHERE k.TABLE_SCHEMA = DATABASE() AND k.TABLE_NAME = %s AND k.REFERENCED_TABLE_NAME IS NOT NULL
+    GROUP BY k.CONSTRAINT_NAME, k.REFERENCED_TABLE_NAME, r.UPDATE_RULE, r.DELETE_RULE
+    """, (tabla,))
+    return cursor.fetchall()
+
+def nombre_alterno(nombre):
+    """
+    Nombre de la FK en la tabla staging. Los nombres de restricción son únicos
+    en la base y la tabla viva conserva el suyo, así que cada carga alterna
+    entre el nombre con y sin el sufijo _stg.
+    """
+    return nombre[:-4] if nombre.endswith('_stg') else nombre[:60] + '_stg'
+
+def agregar_claves_foraneas(cursor, tabla, claves, en_staging):
+    """
+    Crea en <tabla>_staging las FKs de la tabla viva. Si la tabla referida
+    también está en staging se apunta a su copia: RENAME TABLE arrastra la
+    referencia y después del intercambio la FK queda sobre la tabla nueva.
+    """
+    if not claves:
+        return
+    definiciones = []
+    for nombre, columnas, referida, referidas, al_actualizar, al_borrar in claves:
+        destino = f"{referida}_staging" if referida in en_staging else referida
+        definiciones.append(
+            f"ADD CONSTRAINT `{nombre_alterno(nombre)}` FOREIGN KEY ({columnas}) "
+            f"REFERENCES `{destino}` ({referidas}) ON UPDATE {al_actualizar} ON DELETE {al_borrar}"
+        )
+    cursor.execute(f"ALTER TABLE {tabla}_staging " + ', '.join(definiciones))
+
+def cargar_staging(cursor, tabla, columna_id, columnas, filas, en_staging=()):
+    """
+    Carga masiva (executemany) en <tabla>_staging con ids asignados en orden.
+    filas: lista de (clave, valores). en_staging: tablas ya cargadas en
+    staging (las padres, para sus FKs).
+    Devuelve ({clave: id}, hashes para guardar después del intercambio).
+    """
+    claves = leer_claves_foraneas(cursor, tabla)
+    indices = crear_staging(cursor, tabla)
+
+    # La tabla staging está vacía, así que los ids se asignan aquí y no hace
+    # falta leer lastrowid fila por fila
+    todas = [columna_id] + columnas
+    sql = f"INSERT INTO {tabla}_staging ({', '.join(todas)}) VALUES ({', '.join(['%s'] * len(todas))})"
+    cursor.executemany(sql, [(id_fila, *valores) for id_fila, (_, valores) in enumerate(filas, start=1)])
+
+    # Los índices se construyen una sola vez, con la tabla ya cargada, y
+    # después las FKs que CREATE TABLE ... LIKE no copia (se validan aquí,
+    # antes del intercambio)
+    reconstruir_indices(cursor, tabla, indices)
+    agregar_claves_foraneas(cursor, tabla, claves, en_staging)
+
+    mapa = {clave: id_fila for id_fila, (clave, _) in enumerate(filas, start=1)}
+    registros = [(clave, id_fila, hash_fila(valores)) for id_fila, (clave, valores) in enumerate(filas, start=1)]
+    return mapa, registros
+
+def intercambiar_tablas(cursor, tablas):
+    """
+    Reemplaza todas las tablas por sus copias staging en un único RENAME TABLE
+    atómico y luego elimina las versiones anteriores.
+    """
+    for tabla in reversed(tablas):
+        cursor.execute(f"DROP TABLE IF EXISTS {tabla}_old")
+
+    renombres = []
+    for tabla in tablas:
+        renombres.append(f"{tabla} TO {tabla}_old")
+        renombres.append(f"{tabla}_staging TO {tabla}")
+    cursor.execute("RENAME TABLE " + ', '.join(renombres))
+
+    # Primero las tablas hijas: sus FKs apuntan ahora a las tablas *_old
+    for tabla in reversed(tablas):
+        cursor.execute(f"DROP TABLE IF EXISTS {tabla}_old")
+
+# -----------------------------------------------------------
+# 5. PROCESAMIENTO Y POBLAMIENTO DE DATOS
+# -----------------------------------------------------------
+def cargar_tabla(cursor, modo, tabla, columna_id, columnas, filas, pendientes, columnas_clave):
+    """
+    Carga una tabla según el modo y devuelve {clave: id}. columnas_clave es
+    la clave natural de la tabla (modo incremental).
+    En pendientes[tabla] queda lo que se resuelve al final de la carga:
+    las filas faltantes (incremental) o los hashes a guardar (staging).
+    """
+    if modo == 'incremental':
+        mapa, escritas, pendientes[tabla] = cargar_incremental(
+            cursor, tabla, columna_id, columnas, filas, columnas_clave
+        )
+        print(f"{tabla} nuevas o modificadas: {escritas} de {len(mapa)}")
+    elif modo == 'staging':
+        mapa, pendientes[tabla] = cargar_staging(cursor, tabla, columna_id, columnas, filas, set(pendientes))
+        print(f"{tabla} cargadas en {tabla}_staging: {len(mapa)}")
+    else:
+        mapa = cargar_completo(cursor, tabla, columnas, filas)
+        print(f"{tabla} insertadas: {len(mapa)}")
+    return mapa
+
+def poblar_tablas(modo=MODO_CARGA, borrar_faltantes=ELIMINAR_FALTANTES):
     conn = crear_conexion()
     if conn is None:
         return
@@ -40,100 +334,102 @@ def poblar_tablas():
     try:
         # A. LEER Y LIMPIAR EL CSV (Asumiendo que la primera fila es un encabezado extra)
         df = pd.read_csv(ARCHIVO_CSV, skiprows=1)
-        
+
         # Eliminar las filas de restricciones al final
-        df = df.iloc[:4] 
-        
+        df = df.iloc[:4]
+
         # Formatear la columna de fechas a AAAA-MM-DD
         df['Fecha_Reservación'] = pd.to_datetime(df['Fecha_Reservación'], format='%m/%d/%Y').dt.strftime('%Y-%m-%d')
-        
-        # Mapeos para Claves Foráneas
-        cliente_map = {}
-        mesa_map = {}
+
+        crear_tabla_hashes(cursor)
+        pendientes = {}
 
         # ----------------------------------------------------
         # B. POBLAR TABLA MESAS
         # ----------------------------------------------------
         print("Poblando Mesas...")
-        
+
         # Extraer datos únicos de mesas
         mesas_unicas = df[['Mesa', 'Capacidad_Mesa']].drop_duplicates().sort_values(by='Mesa')
-        
-        # TRUNCATE para limpiar antes de insertar y reiniciar AUTO_INCREMENT
-        cursor.execute("TRUNCATE TABLE Mesas")
-        conn.commit()
+        filas_mesas = [
+            (str(valor_sql(row['Mesa'])), (valor_sql(row['Mesa']), valor_sql(row['Capacidad_Mesa'])))
+            for _, row in mesas_unicas.iterrows()
+        ]
+        columnas_mesas = ['nro_mesa', 'capacidad_maxima']
 
-        for index, row in mesas_unicas.iterrows():
-            nro_mesa = row['Mesa']
-            capacidad = row['Capacidad_Mesa']
-
-            sql = "INSERT INTO Mesas (nro_mesa, capacidad_maxima) VALUES (%s, %s)"
-            cursor.execute(sql, (nro_mesa, capacidad))
-            
-            # Obtener el ID generado (AUTO_INCREMENT)
-            id_mesa = cursor.lastrowid
-            mesa_map[nro_mesa] = id_mesa
-        
+        mesa_map = cargar_tabla(cursor, modo, 'Mesas', 'id_mesa', columnas_mesas, filas_mesas, pendientes,
+                                ['nro_mesa'])
         conn.commit()
-        print(f"Mesas insertadas: {len(mesa_map)}")
 
         # ----------------------------------------------------
         # C. POBLAR TABLA CLIENTES
         # ----------------------------------------------------
         print("Poblando Clientes...")
-        
+
         # Extraer datos únicos de clientes
         clientes_unicos = df[['Codigo_cliente', 'Nombre_Cliente', 'Teléfono', 'Correo', 'Dirección_Cliente']].drop_duplicates(subset=['Codigo_cliente'])
-        
-        cursor.execute("TRUNCATE TABLE Clientes")
-        conn.commit()
-        
-        for index, row in clientes_unicos.iterrows():
-            codigo = row['Codigo_cliente']
-            nombre = row['Nombre_Cliente']
-            telefono = row['Teléfono']
-            correo = row['Correo']
-            direccion = row['Dirección_Cliente']
-
-            sql = "INSERT INTO Clientes (codigo_cliente, nombre_cliente, telefono_cliente, correo_cliente, direccion_cliente) VALUES (%s, %s, %s, %s, %s)"
-            cursor.execute(sql, (codigo, nombre, telefono, correo, direccion))
-            
-            # Obtener el ID generado (AUTO_INCREMENT)
-            id_cliente = cursor.lastrowid
-            cliente_map[codigo] = id_cliente
-        
+        filas_clientes = [
+            (str(valor_sql(row['Codigo_cliente'])), tuple(valor_sql(v) for v in row))
+            for _, row in clientes_unicos.iterrows()
+        ]
+        columnas_clientes = ['codigo_cliente', 'nombre_cliente', 'telefono_cliente', 'correo_cliente', 'direccion_cliente']
+
+        cliente_map = cargar_tabla(cursor, modo, 'Clientes', 'id_cliente', columnas_clientes, filas_clientes, pendientes,
+                                   ['codigo_cliente'])
         conn.commit()
-        print(f"Clientes insertados: {len(cliente_map)}")
 
         # ----------------------------------------------------
         # D. POBLAR TABLA RESERVACIONES (USANDO FKs)
         # ----------------------------------------------------
         print("Poblando Reservaciones...")
-        
-        cursor.execute("TRUNCATE TABLE Reservaciones")
-        conn.commit()
-        
+
+        filas_reservaciones = []
         for index, row in df.iterrows():
+            codigo = str(valor_sql(row['Codigo_cliente']))
+            mesa = str(valor_sql(row['Mesa']))
+
             # Obtener Claves Foráneas (FK) a través de los mapas
-            fk_cliente = cliente_map.get(row['Codigo_cliente'])
-            fk_mesa = mesa_map.get(row['Mesa'])
-            
-            # Datos de Reservaciones
-            fecha = row['Fecha_Reservación']
-            hora = row['Hora']
-            personas = row['Cantidad_Personas']
-            estado = row['Estado_Reservación']
-            pago = row['Método_Pago']
-            total = row['Total_Pagado']
-
-            sql = """
-            INSERT INTO Reservaciones (fecha_reservacion, hora_reservacion, cantidad_personas, estado_reservacion, metodo_pago, total_pagado, id_cliente, id_mesa)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(sql, (fecha, hora, personas, estado, pago, total, fk_cliente, fk_mesa))
+            fk_cliente = cliente_map.get(codigo)
+            fk_mesa = mesa_map.get(mesa)
+
+            # Clave natural: una mesa no puede reservarse dos veces a la misma fecha y hora
+            clave = f"{mesa}|{row['Fecha_Reservación']}|{row['Hora']}"
+            valores = (
+                row['Fecha_Reservación'], row['Hora'], row['Cantidad_Personas'],
+                row['Estado_Reservación'], row['Método_Pago'], row['Total_Pagado'],
+            )
+            filas_reservaciones.append((clave, tuple(valor_sql(v) for v in valores) + (fk_cliente, fk_mesa)))
+
+        columnas_reservaciones = ['fecha_reservacion', 'hora_reservacion', 'cantidad_personas', 'estado_reservacion',
+                                  'metodo_pago', 'total_pagado', 'id_cliente', 'id_mesa']
 
+        cargar_tabla(cursor, modo, 'Reservaciones', 'id_reservacion', columnas_reservaciones, filas_reservaciones, pendientes,
+                     ['id_mesa', 'fecha_reservacion', 'hora_reservacion'])
         conn.commit()
-        print(f"Reservaciones insertadas: {len(df)}")
+
+        # ----------------------------------------------------
+        # E. ELIMINAR FILAS QUE YA NO ESTÁN EN EL CSV
+        # ----------------------------------------------------
+        if modo == 'incremental' and borrar_faltantes:
+            # Primero las tablas hijas para respetar las FKs
+            eliminar_faltantes(cursor, 'Reservaciones', 'id_reservacion', pendientes['Reservaciones'])
+            eliminar_faltantes(cursor, 'Clientes', 'id_cliente', pendientes['Clientes'])
+            eliminar_faltantes(cursor, 'Mesas', 'id_mesa', pendientes['Mesas'])
+            conn.commit()
+
+        # ----------------------------------------------------
+        # F. INTERCAMBIO ATÓMICO DE LAS TABLAS STAGING
+        # ----------------------------------------------------
+        if modo == 'staging':
+            # Hasta aquí las tablas reales no se tocaron: si algo falla antes,
+            # los lectores siguen viendo la carga anterior completa
+            intercambiar_tablas(cursor, ['Mesas', 'Clientes', 'Reservaciones'])
+            for tabla, registros in pendientes.items():
+                cursor.execute(f"DELETE FROM {TABLA_HASHES} WHERE tabla = %s", (tabla,))
+                guardar_hashes(cursor, tabla, registros)
+            conn.commit()
+            print("Tablas reemplazadas con RENAME TABLE")
+
         print("\n¡Poblamiento del Ejercicio 4 completado con éxito!")
 
 
@@ -147,6 +443,12 @@ def poblar_tablas():
             cursor.close()
             conn.close()
 
-if _name_ == "_main_":
-    poblar_tablas()
-pip install -r requirements.txt
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poblar las tablas del Ejercicio 4 desde el CSV.")
+    parser.add_argument('--modo', choices=['completo', 'incremental', 'staging'], default=MODO_CARGA,
+                        help="'completo' hace TRUNCATE y recarga; 'incremental' solo escribe filas nuevas o modificadas; "
+                             "'staging' carga en tablas *_staging y las intercambia con RENAME TABLE")
+    parser.add_argument('--eliminar-faltantes', action='store_true', default=ELIMINAR_FALTANTES,
+                        help="En modo incremental, borrar las filas que ya no están en el CSV")
+    args = parser.parse_args()
+    poblar_tablas(args.modo, args.eliminar_faltantes)
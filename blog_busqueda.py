@@ -0,0 +1,183 @@
+import bisect
+import re
+import unicodedata
+
+import pandas as pd
+
+# ============================================================
+# ÍNDICE DE BÚSQUEDA DEL BLOG (TÍTULO Y ETIQUETAS)
+# ============================================================
+_PATRON_TOKEN = re.compile(r'\w+')
+
+# Con más candidatos que esto, reducir el resultado anterior no es más
+# barato que intersectar las listas del índice
+MAX_CANDIDATOS_FILTRO = 5000
+
+
+def normalizar(texto):
+    """Pasa a minúsculas y quita acentos: 'Canción' -> 'cancion'."""
+    if texto is None or (not isinstance(texto, str) and pd.isna(texto)):
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def trigramas(texto):
+    """Conjunto de subcadenas de 3 caracteres de un texto."""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido sobre el título y las etiquetas de cada post.
+
+    - postings: token -> ids de posts (búsqueda por prefijo con bisect y de
+      términos cortos recorriendo el vocabulario)
+    - trigramas: trigrama -> ids de posts (búsqueda por subcadena)
+
+    Se construye una vez por snapshot de datos; cada búsqueda solo intersecta
+    conjuntos de ids, sin recorrer el texto de todos los posts.
+    """
+
+    def __init__(self, ids, titulos, etiquetas):
+        self.textos = {}
+        self.postings = {}
+        self.trigramas = {}
+
+        for id_post, titulo, tags in zip(ids, titulos, etiquetas):
+            # El salto de línea evita trigramas que crucen título y etiquetas
+            texto = normalizar(titulo) + '\n' + normalizar(tags)
+            self.textos[id_post] = texto
+            for token in _PATRON_TOKEN.findall(texto):
+                self.postings.setdefault(token, set()).add(id_post)
+            for trigrama in trigramas(texto):
+                self.trigramas.setdefault(trigrama, set()).add(id_post)
+
+        self.tokens = sorted(self.postings)
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Construye el índice desde el DataFrame de posts (id_post, titulo, etiquetas)."""
+        return cls(df['id_post'].tolist(), df['titulo'].tolist(), df['etiquetas'].tolist())
+
+    def __len__(self):
+        return len(self.textos)
+
+    def buscar_prefijo(self, prefijo):
+        """Ids de los posts con algún token que empieza con el prefijo."""
+        resultado = set()
+        i = bisect.bisect_left(self.tokens, prefijo)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefijo):
+            resultado |= self.postings[self.tokens[i]]
+            i += 1
+        return resultado
+
+    def buscar_subcadena(self, termino):
+        """Ids de los posts cuyo texto contiene el término (3 o más caracteres)."""
+        listas = []
+        for trigrama in trigramas(termino):
+            ids = self.trigramas.get(trigrama)
+            if not ids:
+                return set()
+            listas.append(ids)
+
+        # Intersectar empezando por la lista más corta
+        listas.sort(key=len)
+        candidatos = set(listas[0])
+        for ids in listas[1:]:
+            candidatos &= ids
+            if not candidatos:
+                return candidatos
+
+        if len(termino) == 3:
+            return candidatos
+
+        # Los trigramas pueden aparecer en otro orden: verificar solo los candidatos
+        return {id_post for id_post in candidatos if termino in self.textos[id_post]}
+
+    def buscar_corto(self, termino):
+        """
+        Ids de los posts cuyo texto contiene el término (menos de 3
+        caracteres, sin trigramas): un término sin espacios solo puede estar
+        dentro de un token, así que basta recorrer el vocabulario.
+        """
+        resultado = set()
+        for token in self.tokens:
+            if termino in token:
+                resultado |= self.postings[token]
+        return resultado
+
+    def buscar_termino(self, termino):
+        """Ids de los posts cuyo texto contiene el término (subcadena, como antes del índice)."""
+        if len(termino) < 3:
+            return self.buscar_corto(termino)
+        return self.buscar_subcadena(termino)
+
+    def coincide(self, id_post, termino):
+        """Verifica un término contra el texto de un post (misma regla que buscar_termino)."""
+        return termino in self.textos[id_post]
+
+    def filtrar(self, consulta, candidatos):
+        """
+        Como buscar(), pero solo revisa los posts de `candidatos` (el resultado
+        de una consulta que la consulta actual extiende).
+        """
+        terminos = set(_PATRON_TOKEN.findall(normalizar(consulta)))
+        return {
+            id_post for id_post in candidatos
+            if all(self.coincide(id_post, termino) for termino in terminos)
+        }
+
+    def buscar(self, consulta):
+        """
+        Devuelve el conjunto de ids que contienen todos los términos de la
+        consulta (AND), o None si la consulta no tiene términos.
+        """
+        terminos = _PATRON_TOKEN.findall(normalizar(consulta))
+        if not terminos:
+            return None
+
+        resultado = None
+        for conjunto in sorted((self.buscar_termino(t) for t in set(terminos)), key=len):
+            resultado = conjunto if resultado is None else resultado & conjunto
+            if not resultado:
+                break
+        return resultado
+
+
+class EstadoBusqueda:
+    """
+    Estado de búsqueda de una sesión: última consulta y su resultado.
+
+    Si la nueva consulta extiende la anterior ("dat" -> "data",
+    "data" -> "data sql") su resultado es un subconjunto del anterior, así
+    que solo se revisan esos candidatos. Si se borró texto o cambió el
+    snapshot se vuelve a buscar en el índice completo.
+    """
+
+    def __init__(self):
+        self.token = None
+        self.consulta = None
+        self.resultado = None
+
+    def extiende(self, consulta):
+        """True si el resultado de `consulta` está contenido en el anterior."""
+        # Todos los términos se buscan por subcadena: alargar uno o agregar
+        # otro solo puede quitar posts
+        return bool(self.consulta) and consulta.startswith(self.consulta)
+
+    def buscar(self, indice, token, consulta):
+        """Resultado de `consulta` (conjunto de ids o None si está vacía)."""
+        consulta = ' '.join(_PATRON_TOKEN.findall(normalizar(consulta)))
+        if not consulta:
+            resultado = None
+        elif token == self.token and consulta == self.consulta:
+            return self.resultado
+        elif (token == self.token and self.resultado is not None
+              and len(self.resultado) <= MAX_CANDIDATOS_FILTRO and self.extiende(consulta)):
+            resultado = indice.filtrar(consulta, self.resultado)
+        else:
+            resultado = indice.buscar(consulta)
+
+        self.token, self.consulta, self.resultado = token, consulta or None, resultado
+        return resultado
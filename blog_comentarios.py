@@ -0,0 +1,176 @@
+import argparse
+import os
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# ============================================================
+# ESTADÍSTICAS DE COMENTARIOS DEL BLOG (TABLAS RESUMEN)
+# ============================================================
+# Tabla de comentarios del blog (ajustar si el esquema usa otros nombres)
+TABLA_COMENTARIOS = 'comentario'
+COL_ID = 'id_comentario'
+COL_POST = 'id_post'
+COL_USUARIO = 'id_usuario'
+COL_TEXTO = 'texto_comentario'
+COL_FECHA = 'fecha_comentario'
+
+# Tablas resumen mantenidas por este módulo
+TABLA_POR_USUARIO = 'estadistica_comentario_usuario'
+TABLA_POR_POST = 'estadistica_comentario_post'
+TABLA_MARCA = 'estadistica_comentario_marca'
+TABLA_VISTOS = 'estadistica_comentario_visto'
+
+# Ids por debajo de la marca de agua que se vuelven a revisar en cada
+# actualización: un comentario con id menor que se confirma (COMMIT) después
+# de otro con id mayor no queda afuera para siempre
+VENTANA_IDS = 1000
+
+# Filas de TABLA_MARCA: la marca de agua (último id procesado) y el piso
+# desde el que TABLA_VISTOS tiene todos los ids ya sumados
+MARCA, PISO = 1, 2
+
+
+def crear_tablas_estadisticas(conn):
+    """Crea (si no existen) las tablas resumen y la marca de agua."""
+    for tabla, clave in ((TABLA_POR_USUARIO, 'id_usuario'), (TABLA_POR_POST, 'id_post')):
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                {clave} INT NOT NULL PRIMARY KEY,
+                num_comentarios INT NOT NULL,
+                largo_total BIGINT NOT NULL,
+                ultimo_comentario DATETIME NULL
+            )
+        """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_MARCA} (
+            id TINYINT NOT NULL PRIMARY KEY,
+            ultimo_id_comentario BIGINT NOT NULL
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_VISTOS} (
+            {COL_ID} BIGINT NOT NULL PRIMARY KEY
+        )
+    """))
+    conn.execute(text(f"INSERT IGNORE INTO {TABLA_MARCA} (id, ultimo_id_comentario) VALUES ({MARCA}, 0)"))
+    # El piso arranca en la marca actual: lo anterior ya se sumó sin registrar ids
+    conn.execute(text(f"""
+        INSERT IGNORE INTO {TABLA_MARCA} (id, ultimo_id_comentario)
+        SELECT {PISO}, ultimo_id_comentario FROM {TABLA_MARCA} WHERE id = {MARCA}
+    """))
+
+
+def _acumular(conn, tabla, clave, columna, desde, hasta):
+    """Suma a la tabla resumen los comentarios con id en (desde, hasta] que no están en TABLA_VISTOS."""
+    conn.execute(text(f"""
+        INSERT INTO {tabla} ({clave}, num_comentarios, largo_total, ultimo_comentario)
+        SELECT c.{columna}, COUNT(*), COALESCE(SUM(CHAR_LENGTH(c.{COL_TEXTO})), 0), MAX(c.{COL_FECHA})
+        FROM {TABLA_COMENTARIOS} c
+        LEFT JOIN {TABLA_VISTOS} v ON v.{COL_ID} = c.{COL_ID}
+        WHERE c.{COL_ID} > :desde AND c.{COL_ID} <= :hasta AND v.{COL_ID} IS NULL
+        GROUP BY c.{columna}
+        ON DUPLICATE KEY UPDATE
+            num_comentarios = num_comentarios + VALUES(num_comentarios),
+            largo_total = largo_total + VALUES(largo_total),
+            ultimo_comentario = GREATEST(COALESCE(ultimo_comentario, VALUES(ultimo_comentario)),
+                                         COALESCE(VALUES(ultimo_comentario), ultimo_comentario))
+    """), {'desde': desde, 'hasta': hasta})
+
+
+def actualizar_estadisticas(engine):
+    """
+    Agrega a las tablas resumen los comentarios nuevos desde la marca de agua
+    (último id procesado) más los de los VENTANA_IDS ids anteriores que no se
+    habían sumado. Devuelve la cantidad de comentarios procesados.
+
+    Los comentarios editados o borrados no se descuentan: para eso usar
+    reconstruir_estadisticas(). Escribe en la base: con un usuario de solo
+    lectura en el dashboard se ejecuta como tarea aparte (python blog_comentarios.py).
+    """
+    with engine.begin() as conn:
+        crear_tablas_estadisticas(conn)
+
+    with engine.begin() as conn:
+        # FOR UPDATE: dos sesiones no pueden sumar el mismo rango a la vez
+        marcas = dict(conn.execute(text(
+            f"SELECT id, ultimo_id_comentario FROM {TABLA_MARCA} WHERE id IN ({MARCA}, {PISO}) FOR UPDATE"
+        )).fetchall())
+        desde = max(marcas[PISO], marcas[MARCA] - VENTANA_IDS)
+        hasta = max(conn.execute(text(f"SELECT COALESCE(MAX({COL_ID}), 0) FROM {TABLA_COMENTARIOS}")).scalar(),
+                    marcas[MARCA])
+
+        _acumular(conn, TABLA_POR_USUARIO, 'id_usuario', COL_USUARIO, desde, hasta)
+        _acumular(conn, TABLA_POR_POST, 'id_post', COL_POST, desde, hasta)
+        procesados = conn.execute(text(f"""
+            INSERT IGNORE INTO {TABLA_VISTOS} ({COL_ID})
+            SELECT {COL_ID} FROM {TABLA_COMENTARIOS} WHERE {COL_ID} > :desde AND {COL_ID} <= :hasta
+        """), {'desde': desde, 'hasta': hasta}).rowcount
+
+        # Solo se recuerdan los ids de la ventana que se vuelve a revisar
+        piso = max(marcas[PISO], hasta - VENTANA_IDS)
+        conn.execute(text(f"DELETE FROM {TABLA_VISTOS} WHERE {COL_ID} <= :piso"), {'piso': piso})
+        conn.execute(text(f"""
+            UPDATE {TABLA_MARCA}
+            SET ultimo_id_comentario = CASE id WHEN {MARCA} THEN :hasta ELSE :piso END
+            WHERE id IN ({MARCA}, {PISO})
+        """), {'hasta': hasta, 'piso': piso})
+        return procesados
+
+
+def reconstruir_estadisticas(engine):
+    """Vacía las tablas resumen y las recalcula desde cero."""
+    with engine.begin() as conn:
+        crear_tablas_estadisticas(conn)
+        conn.execute(text(f"DELETE FROM {TABLA_POR_USUARIO}"))
+        conn.execute(text(f"DELETE FROM {TABLA_POR_POST}"))
+        conn.execute(text(f"DELETE FROM {TABLA_VISTOS}"))
+        conn.execute(text(f"UPDATE {TABLA_MARCA} SET ultimo_id_comentario = 0 WHERE id IN ({MARCA}, {PISO})"))
+    return actualizar_estadisticas(engine)
+
+
+def leer_estadisticas_usuarios(engine):
+    """Comentarios, largo total/promedio y último comentario por usuario."""
+    return pd.read_sql_query(text(f"""
+        SELECT
+            s.id_usuario,
+            u.nombre_usuario,
+            s.num_comentarios,
+            s.largo_total,
+            s.largo_total / s.num_comentarios AS largo_promedio,
+            s.ultimo_comentario
+        FROM {TABLA_POR_USUARIO} s
+        JOIN usuario u ON u.id_usuario = s.id_usuario
+        ORDER BY s.num_comentarios DESC
+    """), engine)
+
+
+def leer_estadisticas_posts(engine, limite=10):
+    """Los `limite` posts con más comentarios, con largo total/promedio y último comentario."""
+    return pd.read_sql_query(text(f"""
+        SELECT
+            s.id_post,
+            p.titulo,
+            s.num_comentarios,
+            s.largo_total,
+            s.largo_total / s.num_comentarios AS largo_promedio,
+            s.ultimo_comentario
+        FROM {TABLA_POR_POST} s
+        JOIN post p ON p.id_post = s.id_post
+        ORDER BY s.num_comentarios DESC
+        LIMIT :limite
+    """), engine, params={'limite': limite})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Actualiza las tablas resumen de comentarios del blog.")
+    parser.add_argument('--uri', default=os.environ.get('BLOG_DB_URI'),
+                        help="URI SQLAlchemy de la base del blog (por defecto BLOG_DB_URI)")
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="Vaciar las tablas resumen y recalcularlas desde cero")
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("falta --uri o la variable BLOG_DB_URI")
+    engine = create_engine(args.uri)
+    procesados = reconstruir_estadisticas(engine) if args.reconstruir else actualizar_estadisticas(engine)
+    print(f"Comentarios procesados: {procesados}")
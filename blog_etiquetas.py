@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# FACETAS DE ETIQUETAS DEL BLOG (POST × ETIQUETA)
+# ============================================================
+
+
+class FacetasEtiquetas:
+    """
+    Relación post × etiqueta guardada como pares de códigos enteros
+    (posición del post, código de etiqueta) con un vocabulario categórico.
+
+    Los filtros por etiqueta, los conteos de facetas y los posts de una
+    etiqueta se calculan con operaciones vectorizadas de NumPy, sin partir
+    cadenas GROUP_CONCAT (que además MySQL trunca en group_concat_max_len).
+    """
+
+    def __init__(self, ids_post, df_etiquetas):
+        """
+        ids_post: ids de los posts en el orden del snapshot (define las posiciones).
+        df_etiquetas: DataFrame con columnas id_post y texto_etiqueta.
+        """
+        self.ids_post = pd.Index(ids_post)
+
+        categorias = pd.Categorical(df_etiquetas['texto_etiqueta'].astype('string').str.strip())
+        self.vocabulario = categorias.categories
+        posiciones = self.ids_post.get_indexer(df_etiquetas['id_post'])
+        codigos = categorias.codes.astype(np.int64)
+
+        # Quitar etiquetas de posts desconocidos, nulas y pares repetidos
+        validos = (posiciones >= 0) & (codigos >= 0)
+        n_etiquetas = len(self.vocabulario)
+        pares = np.unique(posiciones[validos].astype(np.int64) * max(n_etiquetas, 1) + codigos[validos])
+        self.posiciones = (pares // max(n_etiquetas, 1)).astype(np.int32)
+        self.codigos = (pares % max(n_etiquetas, 1)).astype(np.int32)
+
+        # Índice por etiqueta (tipo CSR): posts de la etiqueta k en
+        # posts_por_codigo[inicio[k]:inicio[k + 1]]
+        orden = np.argsort(self.codigos, kind='stable')
+        self.posts_por_codigo = self.posiciones[orden]
+        self.inicio = np.concatenate(([0], np.cumsum(np.bincount(self.codigos, minlength=n_etiquetas))))
+        self._textos = None
+
+    def __len__(self):
+        return len(self.ids_post)
+
+    def codigos_de(self, etiquetas):
+        """Códigos de las etiquetas indicadas (se ignoran las que no existen)."""
+        codigos = self.vocabulario.get_indexer(list(etiquetas))
+        return codigos[codigos >= 0]
+
+    def mascara(self, etiquetas, todas=False):
+        """
+        Máscara booleana por posición de post: posts con alguna de las
+        etiquetas, o con todas si todas=True.
+        """
+        codigos = self.codigos_de(etiquetas)
+        seleccion = np.isin(self.codigos, codigos)
+        conteo = np.bincount(self.posiciones[seleccion], minlength=len(self))
+        if todas:
+            return conteo == len(codigos)
+        return conteo > 0
+
+    def conteos(self, posiciones=None):
+        """
+        Cantidad de posts por etiqueta (facetas) entre los posts indicados por
+        posición; todos los posts si posiciones es None. Solo etiquetas con
+        al menos un post, de mayor a menor.
+        """
+        if posiciones is None:
+            codigos = self.codigos
+        else:
+            incluidos = np.zeros(len(self), dtype=bool)
+            incluidos[np.asarray(posiciones)] = True
+            codigos = self.codigos[incluidos[self.posiciones]]
+        conteo = np.bincount(codigos, minlength=len(self.vocabulario))
+        serie = pd.Series(conteo, index=self.vocabulario, name='posts')
+        return serie[serie > 0].sort_values(ascending=False, kind='stable')
+
+    def posts_de(self, etiqueta):
+        """Ids de los posts que tienen la etiqueta."""
+        codigo = self.vocabulario.get_loc(etiqueta)
+        return self.ids_post[self.posts_por_codigo[self.inicio[codigo]:self.inicio[codigo + 1]]]
+
+    def textos(self):
+        """
+        Serie id_post -> etiquetas unidas con ', ' (None si el post no tiene),
+        para mostrar y para el índice de búsqueda. Se calcula una sola vez.
+        """
+        if self._textos is None:
+            textos = pd.Series(None, index=range(len(self)), dtype=object)
+            if len(self.posiciones):
+                por_post = (
+                    pd.Series(self.vocabulario[self.codigos], index=self.posiciones)
+                    .groupby(level=0)
+                    .agg(', '.join)
+                )
+                textos[por_post.index] = por_post.to_numpy()
+            textos.index = self.ids_post
+            self._textos = textos
+        return self._textos
@@ -0,0 +1,294 @@
+import json
+import os
+import tempfile
+import time
+import uuid
+
+# ============================================================
+# CACHÉ COMPARTIDA ENTRE PROCESOS
+# ============================================================
+# st.cache_data vive dentro de cada proceso: con varios servidores Streamlit
+# (o réplicas detrás de un balanceador) cada uno repetía la consulta pesada
+# y guardaba su propia copia. Aquí los snapshots y agregados se guardan como
+# Arrow IPC en un almacén común:
+#   - AlmacenArchivos (por defecto): un archivo .arrow por clave en un
+#     directorio del host, leído con memory map (el page cache del sistema
+#     se comparte entre procesos)
+#   - AlmacenRedis: cualquier servidor compatible con Redis (opcional)
+# Un candado por clave hace que solo un worker recalcule; los demás esperan
+# y leen el resultado.
+#
+# Con el almacén de archivos el DataFrame leído no copia los datos: sus
+# columnas son vistas de solo lectura sobre el archivo mapeado, así todos
+# los procesos y sesiones comparten una sola copia física (las sesiones
+# solo materializan las filas que filtran).
+#
+# CACHE_COMPARTIDA=redis://host:6379/0 elige Redis; CACHE_COMPARTIDA_DIR
+# cambia el directorio del almacén de archivos.
+DIRECTORIO = os.environ.get(
+    "CACHE_COMPARTIDA_DIR", os.path.join(tempfile.gettempdir(), "cache_dashboards")
+)
+
+# Segundos que un worker espera a que otro termine de recalcular
+ESPERA = 120
+
+# Vencimiento del candado si el worker que lo tiene muere (solo Redis: el
+# candado de archivo lo libera el sistema al terminar el proceso)
+EXPIRA_CANDADO = 300
+
+CLAVE_META = b"cache_compartida"
+
+# Windows no deja reemplazar un archivo mientras otro proceso lo tiene
+# mapeado: ahí se lee a memoria en lugar de mapearlo
+MAPEAR = os.name != "nt"
+
+
+# ---------------- serialización ----------------
+def _a_tabla(df, meta):
+    """pa.Table del DataFrame con `meta` (y df.attrs) en los metadatos del esquema."""
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=None)
+    # from_pandas convierte NaN en nulos y al volver a pandas hay que copiar
+    # la columna para reponerlos: los float se guardan con sus NaN
+    for i, campo in enumerate(tabla.schema):
+        if pa.types.is_floating(campo.type) and tabla.column(i).null_count and campo.name in df.columns:
+            tabla = tabla.set_column(i, campo, pa.array(df[campo.name].to_numpy(), from_pandas=False))
+    meta = {**meta, "attrs": df.attrs}
+    esquema = tabla.schema.with_metadata(
+        {**(tabla.schema.metadata or {}), CLAVE_META: json.dumps(meta, default=str).encode()}
+    )
+    return tabla.replace_schema_metadata(esquema.metadata)
+
+
+def _de_tabla(tabla):
+    """
+    (DataFrame, meta) guardados con _a_tabla. Las columnas numéricas, de
+    fecha, category y texto sin nulos quedan como vistas de solo lectura de
+    los buffers Arrow (split_blocks evita juntarlas en un bloque nuevo).
+    """
+    meta = json.loads((tabla.schema.metadata or {}).get(CLAVE_META, b"{}"))
+    df = tabla.to_pandas(split_blocks=True)
+    df.attrs.update(meta.pop("attrs", {}))
+    return df, meta
+
+
+def a_bytes(df, meta=None):
+    """DataFrame serializado como stream Arrow IPC."""
+    import pyarrow as pa
+
+    tabla = _a_tabla(df, meta or {})
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return destino.getvalue().to_pybytes()
+
+
+def de_bytes(datos):
+    """(DataFrame, meta) de un stream Arrow IPC creado con a_bytes."""
+    import pyarrow as pa
+
+    return _de_tabla(pa.ipc.open_stream(pa.py_buffer(datos)).read_all())
+
+
+# ---------------- almacén en archivos ----------------
+class AlmacenArchivos:
+    """
+    Un archivo Arrow IPC por clave en `directorio`. La escritura va a un
+    temporal que se renombra (os.replace), así un lector nunca ve un archivo
+    a medias y los que ya tenían mapeado el anterior siguen leyéndolo. La
+    lectura mapea el archivo (MAPEAR) y devuelve un DataFrame sin copias.
+    """
+
+    def __init__(self, directorio=DIRECTORIO):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave, extension=".arrow"):
+        return os.path.join(self.directorio, clave + extension)
+
+    def leer(self, clave):
+        """(DataFrame, meta) o None si la clave no existe."""
+        import pyarrow as pa
+
+        try:
+            fuente = pa.memory_map(self._ruta(clave), "r") if MAPEAR else pa.OSFile(self._ruta(clave), "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            # Los buffers mantienen vivo el mapeo después de cerrar el archivo
+            return _de_tabla(pa.ipc.open_file(fuente).read_all())
+        finally:
+            fuente.close()
+
+    def guardar(self, clave, df, meta=None):
+        import pyarrow as pa
+
+        tabla = _a_tabla(df, meta or {})
+        temporal = self._ruta(clave, f".{os.getpid()}.tmp")
+        with pa.OSFile(temporal, "wb") as destino:
+            with pa.ipc.new_file(destino, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(temporal, self._ruta(clave))
+
+    def borrar(self, clave):
+        try:
+            os.remove(self._ruta(clave))
+        except FileNotFoundError:
+            pass
+
+    def bloquear(self, clave, expira=EXPIRA_CANDADO):
+        """Candado exclusivo sin esperar: el archivo abierto, o None si otro lo tiene."""
+        archivo = open(self._ruta(clave, ".lock"), "a+b")
+        try:
+            _bloquear_archivo(archivo)
+        except OSError:
+            archivo.close()
+            return None
+        return archivo
+
+    def soltar(self, clave, candado):
+        try:
+            _soltar_archivo(candado)
+        finally:
+            candado.close()
+
+
+try:
+    import fcntl
+
+    def _bloquear_archivo(archivo):
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _soltar_archivo(archivo):
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+
+except ImportError:
+    import msvcrt
+
+    def _bloquear_archivo(archivo):
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _soltar_archivo(archivo):
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ---------------- almacén en Redis ----------------
+class AlmacenRedis:
+    """
+    Snapshots como bytes Arrow IPC en Redis. `cliente` es una URL redis://
+    (necesita el paquete redis) o cualquier objeto con get/set/delete, por
+    ejemplo un cliente de prueba en memoria.
+    """
+
+    def __init__(self, cliente, prefijo="cache_dashboards:"):
+        if isinstance(cliente, str):
+            import redis
+
+            cliente = redis.Redis.from_url(cliente)
+        self.cliente = cliente
+        self.prefijo = prefijo
+
+    def leer(self, clave):
+        datos = self.cliente.get(self.prefijo + clave)
+        return de_bytes(datos) if datos is not None else None
+
+    def guardar(self, clave, df, meta=None):
+        self.cliente.set(self.prefijo + clave, a_bytes(df, meta))
+
+    def borrar(self, clave):
+        self.cliente.delete(self.prefijo + clave)
+
+    def bloquear(self, clave, expira=EXPIRA_CANDADO):
+        """Token del candado (SET NX con vencimiento) o None si otro lo tiene."""
+        token = uuid.uuid4().hex
+        if self.cliente.set(self.prefijo + clave + ":lock", token, nx=True, px=int(expira * 1000)):
+            return token
+        return None
+
+    def soltar(self, clave, candado):
+        # Solo se borra si sigue siendo nuestro (pudo vencer y tomarlo otro)
+        llave = self.prefijo + clave + ":lock"
+        actual = self.cliente.get(llave)
+        if actual is not None and (actual.decode() if isinstance(actual, bytes) else actual) == candado:
+            self.cliente.delete(llave)
+
+
+def almacen_por_defecto():
+    """AlmacenRedis si CACHE_COMPARTIDA apunta a Redis, si no AlmacenArchivos."""
+    destino = os.environ.get("CACHE_COMPARTIDA", "")
+    if destino.startswith(("redis://", "rediss://", "unix://")):
+        return AlmacenRedis(destino)
+    return AlmacenArchivos()
+
+
+# ---------------- caché ----------------
+class CacheCompartida:
+    """
+    DataFrames calculados una vez y compartidos por todos los procesos que
+    usan el mismo almacén. Una entrada está vigente si su `firma` coincide
+    con la pedida (por ejemplo VigilanteCambios.firma) y tiene menos de
+    `ttl` segundos. Si el almacén no puede guardar, obtener() devuelve el
+    DataFrame calculado igual y deja el error en `error`.
+    """
+
+    def __init__(self, almacen=None, espera=ESPERA, sondeo=0.2):
+        self.almacen = almacen if almacen is not None else almacen_por_defecto()
+        self.espera = espera
+        self.sondeo = sondeo
+        self.cargas = 0
+        self.lecturas = 0
+        self.error = None
+
+    @staticmethod
+    def _vigente(entrada, firma, ttl):
+        if entrada is None:
+            return False
+        meta = entrada[1]
+        if firma is not None and meta.get("firma") != str(firma):
+            return False
+        return ttl is None or time.time() - meta.get("cargado_en", 0) < ttl
+
+    def obtener(self, clave, calcular, firma=None, ttl=None):
+        """
+        DataFrame de `clave`. Si no hay uno vigente, el worker que consigue el
+        candado ejecuta calcular() y lo guarda; los demás esperan hasta
+        `espera` segundos a que aparezca y, si no llega, usan la entrada
+        vieja o lo calculan ellos mismos.
+        """
+        limite = time.time() + self.espera
+        while True:
+            entrada = self.almacen.leer(clave)
+            if self._vigente(entrada, firma, ttl):
+                self.lecturas += 1
+                return entrada[0]
+
+            candado = self.almacen.bloquear(clave)
+            if candado is not None:
+                try:
+                    # Otro worker pudo terminar entre la lectura y el candado
+                    entrada = self.almacen.leer(clave)
+                    if self._vigente(entrada, firma, ttl):
+                        self.lecturas += 1
+                        return entrada[0]
+                    df = calcular()
+                    self.cargas += 1
+                    try:
+                        self.almacen.guardar(clave, df, {"firma": str(firma), "cargado_en": time.time()})
+                    except Exception as e:
+                        # Sin pyarrow, disco lleno, Redis caído, tipos que
+                        # Arrow no admite...: se usa el df sin compartirlo
+                        self.error = e
+                        return df
+                    self.error = None
+                    # Devolver la copia del almacén (mapeada) y soltar la propia
+                    entrada = self.almacen.leer(clave)
+                    return entrada[0] if entrada is not None else df
+                finally:
+                    self.almacen.soltar(clave, candado)
+
+            if time.time() >= limite:
+                return entrada[0] if entrada is not None else calcular()
+            time.sleep(self.sondeo)
@@ -0,0 +1,34 @@
+import json
+import os
+
+# ============================================================
+# CONFIGURACIÓN COMPARTIDA DE LA BASE DE DATOS
+# ============================================================
+# diagnostico.py guarda aquí la URI que mejor funcionó; los dashboards la
+# leen al iniciar en lugar de tener cada uno su propia DEFAULT_DB_URI.
+ARCHIVO_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db_config.json")
+
+
+def leer_config():
+    """Contenido del archivo de configuración ({} si no existe o está dañado)."""
+    try:
+        with open(ARCHIVO_CONFIG, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return datos if isinstance(datos, dict) else {}
+
+
+def cargar_uri(predeterminada):
+    """URI guardada por diagnostico.py, o `predeterminada` si no hay ninguna."""
+    return leer_config().get("db_uri") or predeterminada
+
+
+def guardar_uri(uri, **detalles):
+    """Guarda la URI (y datos del diagnóstico) reemplazando el archivo de forma atómica."""
+    datos = {"db_uri": uri, **detalles}
+    # Un temporal por proceso: dos diagnósticos a la vez no se pisan el archivo
+    temporal = f"{ARCHIVO_CONFIG}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ARCHIVO_CONFIG)
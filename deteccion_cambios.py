@@ -0,0 +1,240 @@
+import threading
+import time
+
+# ============================================================
+# DETECCIÓN DE CAMBIOS EN TABLAS DE ORIGEN
+# ============================================================
+# En lugar de TTL fijos, cada caché se asocia a las tablas de las que lee y
+# a un número de versión que solo sube cuando esas tablas cambian. Un hilo
+# consulta cada INTERVALO segundos señales baratas:
+#   - information_schema.TABLES.UPDATE_TIME (InnoDB, en memoria)
+#   - MAX(columna_id) de las tablas que la declaran (se resuelve con el índice)
+#   - COUNT(*) solo de las tablas que lo piden (recorre la tabla: los
+#     borrados ya mueven UPDATE_TIME, usarlo solo si no alcanza)
+#   - MAX(columna) de las columnas de modificación declaradas (updated_at...)
+#   - opcional: la versión de TABLA_CONTADOR, mantenida por triggers
+# Las cachés usan la versión como parte de su clave: mientras no cambie
+# nada se sirven sin consultar la base.
+#
+# Límite: UPDATE_TIME tiene resolución de 1 segundo y no sobrevive a un
+# reinicio, y MAX(id) no ve ediciones de filas existentes. Una edición en el
+# mismo segundo que la revisión anterior no mueve ninguna de las dos. Para
+# detectarlas siempre hay que declarar una columna de modificación o usar el
+# contador; si no, la versión sube igual cada VIGENCIA segundos (un TTL de
+# respaldo que acota cuánto puede durar un dato viejo).
+INTERVALO = 5
+
+# Segundos tras los que la versión sube aunque no se vea ningún cambio
+# (None: solo por cambios). El tramo sale del reloj, así todos los procesos
+# cambian la firma a la vez
+VIGENCIA = 600
+
+# Sin lecturas de version() durante este tiempo el hilo deja de consultar
+INACTIVIDAD = 300
+
+TABLA_CONTADOR = "contador_cambios"
+
+
+def sql_contador(tablas):
+    """
+    DDL de la tabla contador y de los triggers que la incrementan en cada
+    INSERT/UPDATE/DELETE de `tablas` (para instalar_contador o a mano).
+    """
+    sentencias = [f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_CONTADOR} (
+            tabla VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL
+        )
+    """]
+    for tabla in tablas:
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            nombre = f"trg_{tabla}_{evento.lower()}_cambios"
+            sentencias.append(f"DROP TRIGGER IF EXISTS {nombre}")
+            sentencias.append(f"""
+                CREATE TRIGGER {nombre} AFTER {evento} ON {tabla} FOR EACH ROW
+                INSERT INTO {TABLA_CONTADOR} (tabla, version) VALUES ('{tabla}', 1)
+                ON DUPLICATE KEY UPDATE version = version + 1
+            """)
+    return sentencias
+
+
+def instalar_contador(conn, tablas):
+    """Crea la tabla contador y sus triggers con una conexión DBAPI."""
+    cursor = conn.cursor()
+    try:
+        for sentencia in sql_contador(tablas):
+            cursor.execute(sentencia)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+class VigilanteCambios:
+    """
+    Vigila grupos de tablas y lleva un número de versión por grupo.
+
+    `conectar` es una función sin argumentos que devuelve una conexión DBAPI
+    (engine.raw_connection, pool.get_connection...); se abre una por consulta
+    y se cierra al terminar. Las tablas de cada grupo se declaran como
+    {tabla: columna_id o None}; con contar=True también se usa COUNT(*) y
+    `actualizado` es {tabla: columna de modificación} para MAX(columna).
+
+    `error` es el último error de conexión (ningún grupo se pudo revisar) y
+    `errores` los de las tablas que fallaron en la última revisión: esas
+    tablas no mueven la versión de su grupo, las demás sí.
+    """
+
+    def __init__(self, conectar, intervalo=INTERVALO, inactividad=INACTIVIDAD, usar_contador=False,
+                 vigencia=VIGENCIA):
+        self._conectar = conectar
+        self.intervalo = intervalo
+        self.vigencia = vigencia
+        self.inactividad = inactividad
+        self.usar_contador = usar_contador
+
+        self._grupos = {}
+        self._versiones = {}
+        self._firmas = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._ultimo_acceso = time.time()
+        self._hilo = None
+        self.error = None
+        self.errores = {}
+        self.consultas = 0
+
+    # ---------------- registro y lectura ----------------
+    def vigilar(self, nombre, tablas, contar=False, actualizado=None):
+        """Registra un grupo de tablas bajo `nombre` (su versión empieza en 0)."""
+        with self._lock:
+            self._grupos[nombre] = (dict(tablas), contar, dict(actualizado or {}))
+            self._versiones.setdefault(nombre, 0)
+        return self
+
+    def version(self, nombre):
+        """
+        Versión actual del grupo. Si el hilo estaba en pausa por inactividad
+        se consulta una vez en el momento, para no servir datos viejos.
+        """
+        en_pausa = time.time() - self._ultimo_acceso > self.inactividad
+        self._ultimo_acceso = time.time()
+        if en_pausa or self._hilo is None:
+            self.revisar()
+        self._iniciar_hilo()
+        if en_pausa:
+            self._despertar.set()
+        return self._versiones[nombre]
+
+    def firma(self, nombre):
+        """
+        Señales actuales de las tablas del grupo. A diferencia de la versión
+        (un contador de este proceso) vale igual en todos los procesos, por
+        eso la usa cache_compartida para saber si un snapshot sigue vigente.
+        """
+        self.version(nombre)
+        return self._firmas.get(nombre)
+
+    # ---------------- consulta de señales ----------------
+    def _senales(self, cursor):
+        """
+        {tabla: firma} de todas las tablas de todos los grupos. Cada tabla se
+        consulta por separado: si una falla (no existe, sin permisos) su firma
+        es None y el error queda en `errores`, sin frenar a las demás.
+        """
+        tablas = {}
+        for columnas, contar, actualizado in self._grupos.values():
+            for tabla, columna_id in columnas.items():
+                anterior = tablas.get(tabla, (None, False, None))
+                tablas[tabla] = (columna_id or anterior[0], contar or anterior[1],
+                                 actualizado.get(tabla) or anterior[2])
+
+        # MySQL 8 guarda en caché las estadísticas de information_schema
+        # (24 h por defecto); 0 obliga a leer UPDATE_TIME actual
+        try:
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except Exception:
+            pass
+
+        # UPDATE_TIME de todas juntas: information_schema no falla por una tabla que falta
+        marcas = ", ".join(["%s"] * len(tablas))
+        cursor.execute(f"""
+            SELECT TABLE_NAME, UPDATE_TIME FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({marcas})
+        """, list(tablas))
+        senales = {tabla: [str(actualizado)] for tabla, actualizado in cursor.fetchall()}
+
+        # MAX(id), COUNT(*) y MAX(modificación) tabla por tabla
+        errores = {}
+        for tabla, (columna_id, contar, modificacion) in tablas.items():
+            expresiones = ([f"MAX({columna_id})"] if columna_id else []) + (["COUNT(*)"] if contar else []) \
+                + ([f"MAX({modificacion})"] if modificacion else [])
+            if not expresiones:
+                continue
+            try:
+                cursor.execute(f"SELECT {', '.join(expresiones)} FROM {tabla}")
+                senales.setdefault(tabla, []).extend(str(valor) for valor in cursor.fetchone())
+            except Exception as e:
+                errores[tabla] = e
+
+        if self.usar_contador:
+            try:
+                cursor.execute(f"SELECT tabla, version FROM {TABLA_CONTADOR} WHERE tabla IN ({marcas})",
+                               list(tablas))
+                for tabla, version in cursor.fetchall():
+                    senales.setdefault(tabla, []).append(str(version))
+            except Exception as e:
+                errores[TABLA_CONTADOR] = e
+
+        self.errores = errores
+        return {tabla: None if tabla in errores else tuple(senales.get(tabla, ())) for tabla in tablas}
+
+    def revisar(self):
+        """Consulta las señales y sube la versión de los grupos cuyas tablas cambiaron."""
+        with self._lock:
+            if not self._grupos:
+                return []
+            try:
+                conn = self._conectar()
+                try:
+                    cursor = conn.cursor()
+                    try:
+                        senales = self._senales(cursor)
+                    finally:
+                        cursor.close()
+                        # Cerrar la transacción: una conexión reutilizada del
+                        # pool no debe quedarse con una instantánea vieja
+                        conn.rollback()
+                finally:
+                    conn.close()
+            except Exception as e:
+                self.error = e
+                return []
+            self.error = None
+            self.consultas += 1
+
+            # Tramo de VIGENCIA segundos: al pasar al siguiente sube toda versión
+            tramo = int(time.time() // self.vigencia) if self.vigencia else None
+            cambiados = []
+            for nombre, (columnas, _, _) in self._grupos.items():
+                firma = tuple(senales.get(tabla) for tabla in sorted(columnas)) + (tramo,)
+                if nombre in self._firmas and self._firmas[nombre] != firma:
+                    self._versiones[nombre] += 1
+                    cambiados.append(nombre)
+                self._firmas[nombre] = firma
+            return cambiados
+
+    # ---------------- hilo ----------------
+    def _iniciar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="deteccion-cambios", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(timeout=self.intervalo)
+            self._despertar.clear()
+            # Nadie mira las versiones: no consultar hasta el próximo acceso
+            if time.time() - self._ultimo_acceso > self.inactividad:
+                self._despertar.wait()
+                self._despertar.clear()
+            self.revisar()
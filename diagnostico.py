@@ -1,5 +1,16 @@
 import streamlit as st
+import pandas as pd
 import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from benchmark_db import comparar_backends, comparar_drivers, drivers_instalados
+from config_db import cargar_uri, guardar_uri, leer_config
 
 st.title("🔍 Diagnóstico de Conexión MySQL")
 
@@ -12,16 +23,130 @@ configuraciones = [
     "mysql+pymysql://root:@localhost/proyecto"
 ]
 
-st.write("### Probando conexiones...")
+# Timeouts cortos (segundos): un host caído no debe colgar la página
+TIMEOUT_CONEXION = 2
+TIMEOUT_LECTURA = 3
 
-for config in configuraciones:
+# Nombre de los parámetros de timeout según el driver
+ARGS_TIMEOUT = {
+    "pymysql": {"connect_timeout": TIMEOUT_CONEXION, "read_timeout": TIMEOUT_LECTURA, "write_timeout": TIMEOUT_LECTURA},
+    "mysqldb": {"connect_timeout": TIMEOUT_CONEXION, "read_timeout": TIMEOUT_LECTURA, "write_timeout": TIMEOUT_LECTURA},
+    "mysqlconnector": {"connection_timeout": TIMEOUT_CONEXION},
+}
+
+# ============================================================
+# MOTOR DE PRUEBAS
+# ============================================================
+def probar_uri(uri):
+    """
+    Prueba una URI: latencia TCP, latencia de conexión + autenticación y
+    versión del servidor. Nunca lanza excepciones.
+    """
+    resultado = {"uri": uri, "ok": False, "tcp_ms": None, "auth_ms": None, "version": None, "error": None}
+    engine = None
     try:
-        from sqlalchemy import create_engine
-        engine = create_engine(config)
+        url = make_url(uri)
+        host, puerto = url.host or "localhost", url.port or 3306
+
+        inicio = time.perf_counter()
+        with socket.create_connection((host, puerto), timeout=TIMEOUT_CONEXION):
+            pass
+        resultado["tcp_ms"] = (time.perf_counter() - inicio) * 1000
+
+        engine = create_engine(
+            uri,
+            poolclass=NullPool,
+            connect_args=ARGS_TIMEOUT.get(url.get_driver_name(), {}),
+        )
+        inicio = time.perf_counter()
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        st.success(f"✅ CONEXIÓN EXITOSA: {config}")
-        break
+            resultado["auth_ms"] = (time.perf_counter() - inicio) * 1000
+            resultado["version"] = conn.execute(text("SELECT VERSION()")).scalar()
+        resultado["ok"] = True
     except Exception as e:
-        st.error(f"❌ FALLÓ: {config}")
-        st.code(f"Error: {str(e)[:100]}...")
\ No newline at end of file
+        resultado["error"] = str(e)[:200]
+    finally:
+        if engine is not None:
+            engine.dispose()
+    return resultado
+
+
+def probar_todas(uris):
+    """Prueba todas las URIs en paralelo y las ordena: primero las que funcionan, por latencia."""
+    with ThreadPoolExecutor(max_workers=len(uris)) as executor:
+        resultados = list(executor.map(probar_uri, uris))
+    return sorted(
+        resultados,
+        key=lambda r: (not r["ok"], (r["tcp_ms"] or 0) + (r["auth_ms"] or 0))
+    )
+
+# ============================================================
+# INTERFAZ
+# ============================================================
+uri_actual = cargar_uri(None)
+candidatas = list(dict.fromkeys(([uri_actual] if uri_actual else []) + configuraciones))
+
+st.write("### Probando conexiones...")
+
+with st.spinner("Probando todas las conexiones en paralelo..."):
+    resultados = probar_todas(candidatas)
+
+st.dataframe(pd.DataFrame(resultados), use_container_width=True, hide_index=True)
+
+funcionan = [r for r in resultados if r["ok"]]
+if funcionan:
+    mejor = funcionan[0]
+    st.success(f"✅ CONEXIÓN EXITOSA: {mejor['uri']} "
+               f"(TCP {mejor['tcp_ms']:.1f} ms, autenticación {mejor['auth_ms']:.1f} ms, MySQL {mejor['version']})")
+
+    # Guardar la mejor URI para que los dashboards la usen al iniciar
+    if mejor["uri"] != uri_actual:
+        guardar_uri(
+            mejor["uri"],
+            version=mejor["version"],
+            tcp_ms=round(mejor["tcp_ms"], 2),
+            auth_ms=round(mejor["auth_ms"], 2),
+            probado_en=datetime.now().isoformat(timespec="seconds"),
+        )
+        st.info(f"💾 URI guardada en `config_db` para los dashboards: {mejor['uri']}")
+    else:
+        st.caption(f"URI configurada para los dashboards: {uri_actual} "
+                   f"(probada el {leer_config().get('probado_en', '¿?')})")
+else:
+    for r in resultados:
+        st.error(f"❌ FALLÓ: {r['uri']}")
+        st.code(f"Error: {r['error']}")
+
+# ============================================================
+# MODO BENCHMARK
+# ============================================================
+if funcionan and st.checkbox("⏱️ Modo benchmark", help="Mide latencia y velocidad de lectura con cada driver"):
+    st.write("### Benchmark de drivers")
+    st.caption(f"Drivers instalados: {', '.join(drivers_instalados()) or 'ninguno'}")
+    repeticiones = st.number_input("Repeticiones de SELECT 1", min_value=10, max_value=5000, value=200, step=10)
+
+    if st.button("▶️ Ejecutar benchmark"):
+        with st.spinner("Midiendo latencia y lectura de la consulta del hotel..."):
+            tabla_latencia, tabla_lectura = comparar_drivers(mejor["uri"], repeticiones=int(repeticiones))
+
+        st.write("#### Latencia de ida y vuelta (SELECT 1)")
+        st.dataframe(pd.DataFrame(tabla_latencia), use_container_width=True, hide_index=True)
+
+        st.write("#### Lectura de la consulta del hotel")
+        df_lectura = pd.DataFrame(tabla_lectura)
+        st.dataframe(df_lectura, use_container_width=True, hide_index=True)
+
+        if "filas_s" in df_lectura.columns and df_lectura["filas_s"].notna().any():
+            rapido = df_lectura.loc[df_lectura["filas_s"].idxmax()]
+            st.success(f"🏆 Más rápido: {rapido['driver']} (cursor {rapido['cursor']}, "
+                       f"compresión {'sí' if rapido['compresion'] else 'no'}): "
+                       f"{rapido['filas_s']:,.0f} filas/s, {rapido['mb_s']:.2f} MB/s")
+
+        st.write("#### Backends de lectura a DataFrame (lectura_sql)")
+        with st.spinner("Leyendo la consulta del hotel con cada backend..."):
+            df_backends = pd.DataFrame(comparar_backends(mejor["uri"]))
+        st.dataframe(df_backends, use_container_width=True, hide_index=True)
+        if "aceleracion" in df_backends.columns and df_backends["aceleracion"].notna().any():
+            rapido = df_backends.loc[df_backends["segundos"].idxmin()]
+            st.success(f"🏆 Backend más rápido: {rapido['backend']} "
+                       f"({rapido['aceleracion']:.1f}x respecto de pd.read_sql)")
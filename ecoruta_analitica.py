@@ -0,0 +1,170 @@
+import pandas as pd
+
+# ==========================
+# ANALÍTICA DE RUTAS Y RECOLECTORES (SQL)
+# ==========================
+# Todas las métricas se calculan en MySQL 8 con funciones de ventana y solo
+# vuelven las filas ya agregadas/rankeadas. Índices recomendados:
+#
+#   CREATE INDEX idx_visita_fecha ON visita (fecha_visita);
+#   CREATE INDEX idx_visita_recolector_fecha ON visita (recolector_id_recolector, fecha_visita);
+#   CREATE INDEX idx_visita_ruta_fecha ON visita (ruta_id_ruta, fecha_visita);
+
+# Días esperados entre visitas según la frecuencia de la ruta
+DIAS_POR_FRECUENCIA = {
+    "diaria": 1,
+    "interdiaria": 2,
+    "semanal": 7,
+    "quincenal": 15,
+    "mensual": 31,
+}
+
+_FROM_VISITAS = """
+    FROM visita v
+    JOIN ruta r ON v.ruta_id_ruta = r.id_ruta
+    JOIN barrio b ON r.barrio_id_barrio = b.id_barrio
+    JOIN recolector rec ON v.recolector_id_recolector = rec.id_recolector
+"""
+
+
+def _filtros(fecha_inicio=None, fecha_fin=None, barrios=None, recolectores=None):
+    """Cláusula WHERE y parámetros para los filtros del dashboard."""
+    condiciones, params = [], []
+    if fecha_inicio is not None:
+        condiciones.append("v.fecha_visita >= %s")
+        params.append(pd.Timestamp(fecha_inicio).to_pydatetime())
+    if fecha_fin is not None:
+        condiciones.append("v.fecha_visita < %s + INTERVAL 1 DAY")
+        params.append(pd.Timestamp(fecha_fin).to_pydatetime())
+    if barrios:
+        condiciones.append(f"b.nombre_barrio IN ({', '.join(['%s'] * len(barrios))})")
+        params.extend(barrios)
+    if recolectores:
+        condiciones.append(f"rec.nombre_completo IN ({', '.join(['%s'] * len(recolectores))})")
+        params.extend(recolectores)
+    where = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return where, params
+
+
+def _consultar(conn, sql, params):
+    """Ejecuta la consulta y devuelve el resultado como DataFrame."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columnas = [col[0] for col in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columnas, coerce_float=True)
+    finally:
+        cursor.close()
+
+
+def ranking_rutas(conn, limite=10, **filtros):
+    """Rutas ordenadas por cantidad de visitas (con kg y puesto)."""
+    where, params = _filtros(**filtros)
+    sql = f"""
+    SELECT nombre_ruta, visitas, kg,
+           RANK() OVER (ORDER BY visitas DESC) AS puesto
+    FROM (
+        SELECT r.id_ruta, r.nombre_ruta, COUNT(*) AS visitas, SUM(v.cantidad_kg) AS kg
+        {_FROM_VISITAS}
+        {where}
+        GROUP BY r.id_ruta, r.nombre_ruta
+    ) t
+    ORDER BY puesto, nombre_ruta
+    LIMIT %s
+    """
+    return _consultar(conn, sql, params + [limite])
+
+
+def ranking_recolectores(conn, limite=10, fecha_fin=None, **filtros):
+    """
+    Recolectores ordenados por cantidad de visitas, con kg totales, tasa de
+    visitas completadas y kg de los últimos 7 y 30 días del rango: los días
+    que terminan en `fecha_fin` (o en la última fecha con visitas si no hay
+    fin), no en la última visita de cada recolector.
+    """
+    where, params = _filtros(fecha_fin=fecha_fin, **filtros)
+    if fecha_fin is not None:
+        fin = "SELECT DATE(%s) AS fecha"
+        params = params + [pd.Timestamp(fecha_fin).to_pydatetime()]
+    else:
+        fin = "SELECT MAX(fecha) AS fecha FROM diario"
+    sql = f"""
+    WITH diario AS (
+        SELECT rec.id_recolector, rec.nombre_completo AS recolector,
+               DATE(v.fecha_visita) AS fecha,
+               COUNT(*) AS visitas, SUM(v.completada) AS completadas, SUM(v.cantidad_kg) AS kg
+        {_FROM_VISITAS}
+        {where}
+        GROUP BY rec.id_recolector, rec.nombre_completo, DATE(v.fecha_visita)
+    ),
+    fin AS ({fin}),
+    totales AS (
+        SELECT d.id_recolector, d.recolector,
+               SUM(d.visitas) AS visitas,
+               SUM(d.kg) AS kg,
+               SUM(d.completadas) / SUM(d.visitas) AS tasa_completadas,
+               SUM(CASE WHEN d.fecha > fin.fecha - INTERVAL 7 DAY THEN d.kg ELSE 0 END) AS kg_ultimos_7d,
+               SUM(CASE WHEN d.fecha > fin.fecha - INTERVAL 30 DAY THEN d.kg ELSE 0 END) AS kg_ultimos_30d
+        FROM diario d
+        CROSS JOIN fin
+        GROUP BY d.id_recolector, d.recolector
+    )
+    SELECT recolector, visitas, kg, tasa_completadas, kg_ultimos_7d, kg_ultimos_30d,
+           RANK() OVER (ORDER BY visitas DESC) AS puesto
+    FROM totales
+    ORDER BY puesto, recolector
+    LIMIT %s
+    """
+    return _consultar(conn, sql, params + [limite])
+
+
+def kg_movil_recolectores(conn, **filtros):
+    """Kg diarios por recolector con sumas móviles de 7 y 30 días."""
+    where, params = _filtros(**filtros)
+    sql = f"""
+    WITH diario AS (
+        SELECT rec.id_recolector, rec.nombre_completo AS recolector,
+               DATE(v.fecha_visita) AS fecha, SUM(v.cantidad_kg) AS kg
+        {_FROM_VISITAS}
+        {where}
+        GROUP BY rec.id_recolector, rec.nombre_completo, DATE(v.fecha_visita)
+    )
+    SELECT recolector, fecha, kg,
+           SUM(kg) OVER (PARTITION BY id_recolector ORDER BY fecha
+                         RANGE BETWEEN INTERVAL 6 DAY PRECEDING AND CURRENT ROW) AS kg_7d,
+           SUM(kg) OVER (PARTITION BY id_recolector ORDER BY fecha
+                         RANGE BETWEEN INTERVAL 29 DAY PRECEDING AND CURRENT ROW) AS kg_30d
+    FROM diario
+    ORDER BY recolector, fecha
+    """
+    df = _consultar(conn, sql, params)
+    if not df.empty:
+        df["fecha"] = pd.to_datetime(df["fecha"])
+    return df
+
+
+def adherencia_frecuencia(conn, **filtros):
+    """
+    Por ruta: días promedio entre visitas consecutivas (LAG) y porcentaje de
+    intervalos que cumplen la frecuencia declarada (DIAS_POR_FRECUENCIA).
+    """
+    where, params = _filtros(**filtros)
+    casos = " ".join(f"WHEN '{nombre}' THEN {dias}" for nombre, dias in DIAS_POR_FRECUENCIA.items())
+    sql = f"""
+    WITH intervalos AS (
+        SELECT r.id_ruta, r.nombre_ruta, r.frecuencia,
+               DATEDIFF(v.fecha_visita,
+                        LAG(v.fecha_visita) OVER (PARTITION BY r.id_ruta ORDER BY v.fecha_visita)) AS dias
+        {_FROM_VISITAS}
+        {where}
+    )
+    SELECT nombre_ruta, frecuencia,
+           COUNT(*) AS visitas,
+           AVG(dias) AS dias_promedio,
+           CASE LOWER(frecuencia) {casos} END AS dias_esperados,
+           AVG(dias <= CASE LOWER(frecuencia) {casos} END) AS adherencia
+    FROM intervalos
+    GROUP BY id_ruta, nombre_ruta, frecuencia
+    ORDER BY adherencia, nombre_ruta
+    """
+    return _consultar(conn, sql, params)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# ==========================
+# ROLLUPS DE VISITAS ECORUTA
+# ==========================
+# Dimensiones por las que se agrega cada periodo
+DIMENSIONES = ["nombre_barrio", "nombre_ruta", "tipo_material", "recolector"]
+
+# Granularidades disponibles (etiqueta en la interfaz -> clave interna)
+GRANULARIDADES = {"Día": "dia", "Semana ISO": "semana", "Mes": "mes"}
+
+
+def inicio_periodo(fechas, granularidad):
+    """Fecha de inicio del día, semana ISO (lunes) o mes de cada fecha."""
+    dias = np.asarray(fechas, dtype="datetime64[D]")
+    if granularidad == "dia":
+        inicio = dias
+    elif granularidad == "semana":
+        # 1970-01-01 fue jueves: (n + 3) % 7 es 0 los lunes
+        n = dias.astype(np.int64)
+        inicio = (n - (n + 3) % 7).astype("datetime64[D]")
+    elif granularidad == "mes":
+        inicio = dias.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"Granularidad desconocida: {granularidad}")
+    return inicio.astype("datetime64[ns]")
+
+
+class RollupsEcoRuta:
+    """
+    Kg recolectados y número de visitas precalculados por día, semana ISO y
+    mes, cruzados con barrio, ruta, tipo de material y recolector.
+
+    Cada rollup es un DataFrame compacto (dimensiones categóricas, kg en
+    float64 y visitas en int32) con una fila por combinación observada; los
+    gráficos se responden filtrando y sumando estas filas en lugar de
+    agrupar todas las visitas en cada rerun.
+    """
+
+    def __init__(self, df):
+        validas = df[df["fecha_visita"].notna()]
+        base = pd.DataFrame({
+            dim: validas[dim].astype("category") for dim in DIMENSIONES
+        })
+        base["cantidad_kg"] = pd.to_numeric(validas["cantidad_kg"], errors="coerce").to_numpy(dtype=float)
+
+        self.rollups = {}
+        for granularidad in GRANULARIDADES.values():
+            base["periodo"] = inicio_periodo(validas["fecha_visita"].to_numpy(), granularidad)
+            rollup = (
+                base.groupby(["periodo"] + DIMENSIONES, observed=True, sort=True)
+                .agg(kg=("cantidad_kg", "sum"), visitas=("cantidad_kg", "size"))
+                .reset_index()
+            )
+            rollup["visitas"] = rollup["visitas"].astype(np.int32)
+            self.rollups[granularidad] = rollup
+
+    def filas(self, granularidad, fecha_inicio=None, fecha_fin=None, barrios=None, recolectores=None):
+        """
+        Filas del rollup que cumplen los filtros. Con semana o mes se incluyen
+        completos los periodos que tocan el rango de fechas.
+        """
+        rollup = self.rollups[granularidad]
+        mascara = np.ones(len(rollup), dtype=bool)
+        if fecha_inicio is not None:
+            desde = inicio_periodo([np.datetime64(fecha_inicio, "D")], granularidad)[0]
+            mascara &= rollup["periodo"].to_numpy() >= desde
+        if fecha_fin is not None:
+            mascara &= rollup["periodo"].to_numpy() <= np.datetime64(fecha_fin, "ns")
+        if barrios:
+            mascara &= rollup["nombre_barrio"].isin(barrios).to_numpy()
+        if recolectores:
+            mascara &= rollup["recolector"].isin(recolectores).to_numpy()
+        return rollup[mascara]
+
+    def serie(self, granularidad, por=None, **filtros):
+        """
+        Kg y visitas por periodo (y opcionalmente por una dimensión) para
+        los filtros dados.
+        """
+        claves = ["periodo"] if por is None else ["periodo", por]
+        return (
+            self.filas(granularidad, **filtros)
+            .groupby(claves, observed=True, sort=True)[["kg", "visitas"]]
+            .sum()
+            .reset_index()
+        )
+
+    def totales(self, dimension, **filtros):
+        """Kg y visitas por una dimensión en el rango (desde el rollup diario)."""
+        return (
+            self.filas("dia", **filtros)
+            .groupby(dimension, observed=True, sort=True)[["kg", "visitas"]]
+            .sum()
+            .reset_index()
+        )
@@ -1,7 +1,15 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
 import streamlit as st
 
+from blog_busqueda import EstadoBusqueda, IndiceBusqueda
+from blog_comentarios import (COL_ID, TABLA_COMENTARIOS, actualizar_estadisticas, leer_estadisticas_posts,
+                              leer_estadisticas_usuarios)
+from blog_etiquetas import FacetasEtiquetas
+from deteccion_cambios import VigilanteCambios
+from lectura_sql import leer_sql
+
 st.title('Blog UNIVALLE')
 st.set_page_config(page_title='Blog', page_icon='📝', layout='wide')
 
@@ -12,30 +20,168 @@ puerto = 3306
 base = 'blog_univalles'
 
 conexion_str = f'mysql+pymysql://{usuario}:{contraseña}@{host}:{puerto}/{base}'
-engine = create_engine(conexion_str)
+
+# Tablas de las que dependen las cachés; solo se recargan cuando cambian
+TABLAS_POSTS = {'post': 'id_post', 'usuario': None, 'etiqueta': None}
+TABLAS_COMENTARIOS = {TABLA_COMENTARIOS: COL_ID}
+
+# Posts por página en el listado paginado
+TAMANO_PAGINA = 25
+
+# Máximo de ids (búsqueda / etiquetas) que se mandan a SQL en un IN; con más
+# resultados la página se corta del snapshot en memoria, que ya los tiene
+MAX_IDS_SQL = 500
+
+@st.cache_resource
+def get_engine():
+    """Engine compartido entre reruns y sesiones."""
+    return create_engine(conexion_str)
+
+@st.cache_resource
+def get_vigilante():
+    """Detector de cambios compartido: consulta señales baratas cada pocos segundos en segundo plano."""
+    return (VigilanteCambios(get_engine().raw_connection)
+            .vigilar('posts', TABLAS_POSTS)
+            .vigilar('comentarios', TABLAS_COMENTARIOS))
+
+def obtener_token_cambios():
+    """
+    Versión de los posts: cambia cuando se publica, edita, borra o etiqueta
+    un post. Se lee de memoria: los reruns del buscador no tocan la base.
+    """
+    return get_vigilante().version('posts')
 
 query="""
    SELECT 
     p.id_post,
     p.titulo,
     p.fecha_publicacion,
-    u.nombre_usuario AS autor,
-    GROUP_CONCAT(e.texto_etiqueta SEPARATOR ', ') AS etiquetas
+    u.nombre_usuario AS autor
 FROM post p
 JOIN usuario u ON u.id_usuario = p.id_usuario
-LEFT JOIN etiqueta e ON e.id_post = p.id_post
-GROUP BY p.id_post, p.titulo, p.fecha_publicacion, u.nombre_usuario
 ORDER BY p.fecha_publicacion DESC;
 """
-df = pd.read_sql_query(query, engine)
-##df.to_csv('avg_len_comentarios_usuarios.csv', index=False)
+
+# Las etiquetas se traen aparte como pares (post, etiqueta) en lugar de
+# GROUP_CONCAT, que MySQL trunca en group_concat_max_len
+query_etiquetas = """
+SELECT e.id_post, e.texto_etiqueta
+FROM etiqueta e;
+"""
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cargar_posts(token):
+    """Posts y pares (id_post, etiqueta); solo se consulta cuando cambia el token."""
+    posts = leer_sql(query, get_engine())
+    etiquetas = leer_sql(query_etiquetas, get_engine())
+    return posts, etiquetas
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def construir_indices(token, _posts, _etiquetas):
+    """Facetas de etiquetas e índice de búsqueda, una sola vez por snapshot (token)."""
+    facetas = FacetasEtiquetas(_posts['id_post'], _etiquetas)
+    indice = IndiceBusqueda(_posts['id_post'].tolist(), _posts['titulo'].tolist(), facetas.textos().tolist())
+    return indice, facetas
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cargar_pagina(token, autor, desde, hasta, ids, cursor, tamano):
+    """
+    Una página del listado con paginación keyset sobre (fecha_publicacion, id_post).
+    Los filtros de autor, fecha e ids de búsqueda se resuelven en SQL.
+    cursor es (fecha, id) del último post de la página anterior, o None.
+    Trae tamano + 1 filas para saber si existe una página siguiente.
+    """
+    condiciones = []
+    params = {'limite': tamano + 1}
+    if autor is not None:
+        condiciones.append("u.nombre_usuario = :autor")
+        params['autor'] = autor
+    if desde is not None:
+        condiciones.append("p.fecha_publicacion >= :desde AND p.fecha_publicacion < :hasta + INTERVAL 1 DAY")
+        params['desde'] = desde
+        params['hasta'] = hasta
+    if ids is not None:
+        condiciones.append("p.id_post IN :ids")
+        params['ids'] = list(ids)
+    if cursor is not None:
+        # Forma expandida de (fecha, id) < (:fecha, :id) para que MySQL use el índice
+        condiciones.append(
+            "(p.fecha_publicacion < :cursor_fecha"
+            " OR (p.fecha_publicacion = :cursor_fecha AND p.id_post < :cursor_id))"
+        )
+        params['cursor_fecha'], params['cursor_id'] = cursor
+
+    sql = f"""
+    SELECT
+        p.id_post,
+        p.titulo,
+        p.fecha_publicacion,
+        u.nombre_usuario AS autor
+    FROM post p
+    JOIN usuario u ON u.id_usuario = p.id_usuario
+    {'WHERE ' + ' AND '.join(condiciones) if condiciones else ''}
+    ORDER BY p.fecha_publicacion DESC, p.id_post DESC
+    LIMIT :limite
+    """
+    consulta = text(sql)
+    if ids is not None:
+        consulta = consulta.bindparams(bindparam('ids', expanding=True))
+    return pd.read_sql_query(consulta, get_engine(), params=params)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cargar_estadisticas_comentarios(version):
+    """
+    Suma a las tablas resumen los comentarios nuevos (desde la marca de agua)
+    y lee los agregados por usuario y por post, sin recorrer los comentarios.
+    Si el usuario no puede escribir se leen las tablas como están (las
+    mantiene `python blog_comentarios.py`); si no se pueden leer se lanza el
+    error, para que no quede en caché.
+    """
+    try:
+        actualizar_estadisticas(get_engine())
+    except SQLAlchemyError:
+        pass
+    return leer_estadisticas_usuarios(get_engine()), leer_estadisticas_posts(get_engine())
+
+def pagina_en_memoria(df_filtrado, cursor, tamano):
+    """
+    Misma página keyset que cargar_pagina, cortada de las filas ya filtradas
+    (para búsquedas con más de MAX_IDS_SQL resultados).
+    """
+    ordenado = df_filtrado.sort_values(['fecha_publicacion', 'id_post'], ascending=False)
+    if cursor is not None:
+        fecha, id_post = cursor
+        fechas = ordenado['fecha_publicacion']
+        ordenado = ordenado[(fechas < fecha) | ((fechas == fecha) & (ordenado['id_post'] < id_post))]
+    return ordenado.head(tamano + 1).drop(columns='etiquetas')
+
+def cursor_de(fila):
+    """Cursor keyset (fecha, id) a partir de una fila del listado."""
+    return (fila['fecha_publicacion'].to_pydatetime(), int(fila['id_post']))
+
+def pagina_anterior():
+    st.session_state['paginacion_cursores'].pop()
+
+def pagina_siguiente(cursor):
+    st.session_state['paginacion_cursores'].append(cursor)
+
+token = obtener_token_cambios()
+posts, etiquetas = cargar_posts(token)
+indice, facetas = construir_indices(token, posts, etiquetas)
+df = posts.assign(etiquetas=facetas.textos().to_numpy())
 ##st.write(df)
 
 ## SIDE BAR FILTROS
 st.sidebar.title('Filtros')
 
+# text_input solo envía el valor al pulsar Enter o salir del campo:
+# las teclas intermedias no provocan reruns
 texto_busqueda= st.sidebar.text_input('Buscar en titulo  etiqueta', 
-                      value='',help='Buscar por titulo o etiqueta')
+                      value='',help='Buscar por titulo o etiqueta (Enter para buscar)')
+
+# Etiquetas ordenadas por cantidad de posts
+etiquetas_sel = st.sidebar.multiselect('Etiquetas', facetas.conteos().index.tolist())
+todas_etiquetas = st.sidebar.checkbox('Exigir todas las etiquetas', value=False)
 
 autores = ["(Todos)"]+df['autor'].unique().tolist()
 autor_sel= st.sidebar.selectbox('Autor', autores)
@@ -51,9 +197,12 @@ rango_fechas=st.sidebar.date_input('Fecha publicacion',
                       help='Filtrar por fecha de publicacion')
 
 modo_vista=st.sidebar.radio("Modo Vista",
-                            ['Tabla Completa','Primeros 5 resultados']
+                            ['Tabla Paginada','Primeros 5 resultados']
                             )
 
+tamano_pagina = st.sidebar.number_input('Posts por página', min_value=5, max_value=200,
+                                        value=TAMANO_PAGINA, step=5)
+
 cols_sel= st.sidebar.multiselect("Ver solo estas columnas",
                         df.columns.tolist(),
                         default=df.columns.tolist()
@@ -64,15 +213,21 @@ df_filtrado=df.copy()
 #filtro por texto
 
 # Filtro por texto
-if texto_busqueda.strip():
-    txt = texto_busqueda.strip().lower()
-    df_filtrado = df_filtrado[
-        df_filtrado["titulo"].str.lower().str.contains(txt, na=False)
-        | df_filtrado["etiquetas"].str.lower().str.contains(txt, na=False)
-    ]
+# (índice invertido: sin acentos ni mayúsculas, todos los términos deben aparecer)
+# (si la consulta extiende la anterior, solo se revisan los resultados previos)
+if 'estado_busqueda' not in st.session_state:
+    st.session_state['estado_busqueda'] = EstadoBusqueda()
+ids_encontrados = st.session_state['estado_busqueda'].buscar(indice, token, texto_busqueda)
+if ids_encontrados is not None:
+    df_filtrado = df_filtrado[df_filtrado["id_post"].isin(ids_encontrados)]
 
-if cols_sel:
-    df_filtrado = df_filtrado[cols_sel]
+# Filtro por etiquetas (máscara por posición de post en el snapshot)
+ids_filtro = ids_encontrados
+if etiquetas_sel:
+    mascara_etiquetas = facetas.mascara(etiquetas_sel, todas=todas_etiquetas)
+    df_filtrado = df_filtrado[mascara_etiquetas[df_filtrado.index.to_numpy()]]
+    ids_etiquetas = set(facetas.ids_post[mascara_etiquetas].tolist())
+    ids_filtro = ids_etiquetas if ids_filtro is None else ids_filtro & ids_etiquetas
 
 # Filtro por autor
 
@@ -85,7 +240,8 @@ if autor_sel!="(Todos)":
 
 # filtrar por rango de fechas
 
-if rango_fechas:
+fecha_desde = fecha_hasta = None
+if len(rango_fechas) == 2:
     fecha_desde, fecha_hasta = rango_fechas
     df_filtrado = df_filtrado[(df_filtrado["fecha_publicacion"].dt.date >= fecha_desde) & (df_filtrado["fecha_publicacion"].dt.date <= fecha_hasta)]
 
@@ -93,21 +249,91 @@ st.subheader('Resultados')
 
 st.subheader(f'Número de registros: {len(df_filtrado)}')
 
+columnas_vista = cols_sel or df.columns.tolist()
+siguiente = None
+
 if modo_vista == 'Primeros 5 resultados':
-    st.write(df_filtrado.head(5))
-if modo_vista == 'Tabla Completa':
-    st.write(df_filtrado)
+    st.write(df_filtrado[columnas_vista].head(5))
+if modo_vista == 'Tabla Paginada':
+    # Parámetros de la consulta paginada; si cambian se vuelve a la primera página
+    ids_pagina = tuple(sorted(ids_filtro)) if ids_filtro is not None else None
+    # Con muchos resultados el IN sería enorme (y parte de la clave de caché)
+    en_memoria = ids_pagina is not None and len(ids_pagina) > MAX_IDS_SQL
+    parametros_pagina = (
+        token,
+        autor_sel if autor_sel != "(Todos)" else None,
+        fecha_desde,
+        fecha_hasta,
+        ids_pagina if not en_memoria else None,
+    )
+    if st.session_state.get('paginacion_parametros') != (parametros_pagina, ids_pagina, tamano_pagina):
+        st.session_state['paginacion_parametros'] = (parametros_pagina, ids_pagina, tamano_pagina)
+        st.session_state['paginacion_cursores'] = [None]
+    cursores = st.session_state['paginacion_cursores']
+
+    if ids_filtro is not None and not ids_filtro:
+        pagina = posts.head(0)
+    elif en_memoria:
+        pagina = pagina_en_memoria(df_filtrado, cursores[-1], tamano_pagina)
+    else:
+        pagina = cargar_pagina(*parametros_pagina, cursores[-1], tamano_pagina)
+    pagina = pagina.assign(etiquetas=pagina['id_post'].map(facetas.textos()))
+
+    hay_siguiente = len(pagina) > tamano_pagina
+    pagina = pagina.head(tamano_pagina)
+    if hay_siguiente:
+        siguiente = cursor_de(pagina.iloc[-1])
+
+    st.write(pagina[columnas_vista])
+
+    col_ant, col_pag, col_sig = st.columns([1, 2, 1])
+    col_ant.button('⬅️ Anterior', disabled=len(cursores) == 1, on_click=pagina_anterior)
+    col_pag.caption(f'Página {len(cursores)}')
+    col_sig.button('Siguiente ➡️', disabled=not hay_siguiente, on_click=pagina_siguiente, args=(siguiente,))
 
 st.markdown("---")
 st.subheader("Resumen de Datos")
+conteo_etiquetas = facetas.conteos(df_filtrado.index.to_numpy())
 col1, col2 = st.columns(2)
 with col1:
     st.write(f"Número de registros: {len(df_filtrado)}")
 with col2:    
     st.write(f"Autores: {len(df_filtrado['autor'].unique())}")
-    st.write(f"Etiquetas: {len(df_filtrado['etiquetas'].unique())}")
+    st.write(f"Etiquetas: {len(conteo_etiquetas)}")
+
+st.subheader("Etiquetas más usadas")
+st.bar_chart(conteo_etiquetas.head(10))
+
+st.markdown("---")
+st.subheader("Comentarios")
+try:
+    estadisticas = cargar_estadisticas_comentarios(get_vigilante().version('comentarios'))
+except SQLAlchemyError:
+    estadisticas = None
+if estadisticas is None:
+    st.info("Sin estadísticas de comentarios: no se pudieron leer las tablas resumen.")
+else:
+    stats_usuarios, stats_posts = estadisticas
+    col3, col4 = st.columns(2)
+    with col3:
+        st.write("Por usuario")
+        st.dataframe(stats_usuarios, use_container_width=True, height=300)
+        st.download_button("📥 Descargar CSV",
+                           stats_usuarios.to_csv(index=False).encode('utf-8'),
+                           'avg_len_comentarios_usuarios.csv', 'text/csv')
+    with col4:
+        st.write("Posts más comentados")
+        st.dataframe(stats_posts, use_container_width=True, height=300)
 
 # Filtro por fecha
 
 
-st.caption("Creado por UNIVALLE - Departamento de Ciencia de Datos")
\ No newline at end of file
+st.caption("Creado por UNIVALLE - Departamento de Ciencia de Datos")
+
+# Precarga de las páginas vecinas cuando la actual ya está dibujada:
+# al pulsar Anterior/Siguiente la respuesta sale de la caché
+if modo_vista == 'Tabla Paginada' and not en_memoria:
+    if siguiente is not None:
+        cargar_pagina(*parametros_pagina, siguiente, tamano_pagina)
+    if len(cursores) > 1:
+        cargar_pagina(*parametros_pagina, cursores[-2], tamano_pagina)
@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+from mysql.connector import pooling
 import plotly.express as px
+import time
 from datetime import datetime, timedelta
 
+import ecoruta_analitica as analitica
+from ecoruta_rollups import GRANULARIDADES, RollupsEcoRuta
+from deteccion_cambios import VigilanteCambios
+from lectura_sql import leer_sql
+
 # ==========================
 # CONFIGURACIÓN DE PÁGINA
 # ==========================
@@ -20,28 +27,101 @@ st.markdown("### Análisis de rutas, barrios y recolectores")
 # ==========================
 # CONEXIÓN A MYSQL
 # ==========================
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",    # Cambiar si MySQL tiene clave
+    "database": "ecoruta_db"
+}
+
+# Misma base como URI, para los backends columnares de lectura_sql
+URI_ECORUTA = "mysql+mysqlconnector://{user}:{password}@{host}/{database}".format(**DB_CONFIG)
+
+# Conexiones del pool de las cargas (el detector de cambios usa la suya) y
+# segundos que se espera una libre cuando están todas en uso
+POOL_SIZE = 10
+ESPERA_POOL = 10
+
+# Filas por lote al leer el resultado con el cursor
+TAMANO_LOTE = 5000
+
+# Tablas de origen de las consultas (MAX(id) solo en visita); las cachés se
+# invalidan cuando cambian, no por tiempo
+TABLAS_ECORUTA = {"visita": "id_visita", "ruta": None, "barrio": None, "recolector": None}
+
+# Tipos aplicados al leer (DECIMAL como float64, fechas como datetime64 y
+# textos repetidos como category)
+TIPOS_VISITAS = {
+    "cantidad_kg": "float",
+    "completada": "entero",
+    "fecha_visita": "fecha",
+    "nombre_ruta": "categoria",
+    "tipo_material": "categoria",
+    "frecuencia": "categoria",
+    "nombre_barrio": "categoria",
+    "recolector": "categoria",
+}
+
+@st.cache_resource
+def get_pool():
+    """
+    Pool de conexiones compartido por todas las sesiones (extensión C si está
+    instalada). Si no se puede crear lanza la excepción: cache_resource no
+    guarda errores y el próximo rerun vuelve a intentar.
+    """
+    return pooling.MySQLConnectionPool(
+        pool_name="ecoruta",
+        pool_size=POOL_SIZE,
+        use_pure=False,
+        **DB_CONFIG
+    )
+
 def get_connection():
-    """Conexión a MySQL"""
+    """
+    Conexión a MySQL tomada del pool (close() la devuelve al pool). Si están
+    todas en uso espera hasta ESPERA_POOL segundos a que se libere una.
+    """
+    pool = get_pool()
+    limite = time.time() + ESPERA_POOL
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.time() >= limite:
+                raise
+            time.sleep(0.1)
+
+@st.cache_resource
+def get_vigilante():
+    """
+    Detector de cambios en TABLAS_ECORUTA compartido por todas las sesiones,
+    con su propia conexión: no compite con las cargas por el pool.
+    """
+    propia = pooling.MySQLConnectionPool(pool_name="ecoruta_vigilante", pool_size=1, use_pure=False, **DB_CONFIG)
+    return VigilanteCambios(propia.get_connection).vigilar("ecoruta", TABLAS_ECORUTA)
+
+def version_datos():
+    """Versión de las tablas de origen (0 si no hay conexión)."""
     try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",    # Cambiar si MySQL tiene clave
-            database="ecoruta_db"
-        )
-        return conn
-    except Exception as e:
-        st.error(f"❌ Error conectando a la base de datos: {e}")
-        return None
+        return get_vigilante().version("ecoruta")
+    except Exception:
+        return 0
 
 # ==========================
 # CARGA DE DATOS
 # ==========================
-@st.cache_data(ttl=600)
-def load_data():
+@st.cache_data(max_entries=2)
+def load_data(version):
+    """
+    Visitas con ruta, barrio y recolector para la `version` de las tablas.
+    Devuelve (df, tiempos de carga en segundos). Los errores de conexión o
+    de consulta se lanzan: cache_data no guarda excepciones y un resultado
+    vacío quedaría en caché hasta que cambien las tablas.
+    """
+    tiempos = {"extension_c": mysql.connector.HAVE_CEXT}
+    inicio = time.perf_counter()
     conn = get_connection()
-    if conn is None:
-        return pd.DataFrame()
+    tiempos["conexion"] = time.perf_counter() - inicio
     query = """
     SELECT 
         v.id_visita,
@@ -59,21 +139,63 @@ def load_data():
     JOIN recolector rec ON v.recolector_id_recolector = rec.id_recolector;
     """
     try:
-        df = pd.read_sql(query, conn)
-    except Exception as e:
-        st.error(f"❌ Error en la consulta: {e}")
-        return pd.DataFrame()
+        # Sentencia preparada (protocolo binario) leída por lotes; connectorx/ADBC
+        # leen en columnar con URI_ECORUTA si están instalados
+        t = time.perf_counter()
+        df = leer_sql(query, conn, uri=URI_ECORUTA, opciones_cursor={"prepared": True},
+                      tamano_lote=TAMANO_LOTE, tipos=TIPOS_VISITAS)
+        tiempos["lectura"] = time.perf_counter() - t
+        tiempos["backend"] = df.attrs.get("backend")
     finally:
         conn.close()
     
     # Normalizar fechas
     if 'fecha_visita' in df.columns:
-        df['fecha_visita'] = pd.to_datetime(df['fecha_visita'], errors='coerce').dt.normalize()
+        df['fecha_visita'] = df['fecha_visita'].dt.normalize()
     
-    return df
+    tiempos["total"] = time.perf_counter() - inicio
+    tiempos["filas"] = len(df)
+    tiempos["cargado_en"] = time.time()
+    return df, tiempos
+
+@st.cache_resource(max_entries=2)
+def load_rollups(cargado_en, _df):
+    """Rollups por día/semana/mes de la carga identificada por `cargado_en`."""
+    return RollupsEcoRuta(_df)
+
+@st.cache_data(max_entries=64)
+def load_analitica(version, fecha_inicio, fecha_fin, barrios, recolectores):
+    """
+    Rankings, kg móviles y adherencia calculados en MySQL con funciones de
+    ventana. Los errores se lanzan (no se guardan en caché).
+    """
+    conn = get_connection()
+    filtros = {
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "barrios": barrios,
+        "recolectores": recolectores,
+    }
+    try:
+        return {
+            "rutas": analitica.ranking_rutas(conn, **filtros),
+            "recolectores": analitica.ranking_recolectores(conn, **filtros),
+            "kg_movil": analitica.kg_movil_recolectores(conn, **filtros),
+            # La frecuencia es de la ruta: no se filtra por recolector
+            "adherencia": analitica.adherencia_frecuencia(
+                conn, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, barrios=barrios
+            ),
+        }
+    finally:
+        conn.close()
 
-# Cargar datos
-df = load_data()
+# Cargar datos (se vuelven a leer solo cuando cambian las tablas de origen)
+version = version_datos()
+try:
+    df, tiempos_carga = load_data(version)
+except Exception as e:
+    st.error(f"❌ Error cargando los datos: {e}")
+    st.stop()
 if df.empty:
     st.warning("⚠️ No se encontraron datos en la base de datos.")
     st.stop()
@@ -94,12 +216,16 @@ barrios_filtro = st.sidebar.multiselect("Barrio", df["nombre_barrio"].unique())
 # Recolectores
 recolector_filtro = st.sidebar.multiselect("Recolector", df["recolector"].unique())
 
+# Rollups precalculados de la carga actual
+rollups = load_rollups(tiempos_carga["cargado_en"], df)
+
 # ==========================
 # FILTRADO DE DATOS
 # ==========================
 df_filtrado = df.copy()
 
 # Filtro fechas
+fecha_inicio = fecha_fin = None
 if isinstance(rango_fechas, (list, tuple)) and len(rango_fechas) == 2:
     fecha_inicio = pd.to_datetime(rango_fechas[0])
     fecha_fin = pd.to_datetime(rango_fechas[1])
@@ -126,9 +252,22 @@ if df_filtrado.empty:
 st.subheader("📊 Indicadores Clave (KPIs)")
 col1, col2, col3 = st.columns(3)
 
+# Rankings calculados en SQL: solo vuelven las filas rankeadas
+try:
+    resultados = load_analitica(version, fecha_inicio, fecha_fin, list(barrios_filtro), list(recolector_filtro))
+except Exception as e:
+    st.error(f"❌ Error en la analítica: {e}")
+    resultados = None
+
 total_kg = df_filtrado["cantidad_kg"].sum()
-ruta_top = df_filtrado["nombre_ruta"].value_counts().idxmax() if not df_filtrado.empty else "N/A"
-recolector_top = df_filtrado["recolector"].value_counts().idxmax() if not df_filtrado.empty else "N/A"
+if resultados is not None and not resultados["rutas"].empty:
+    ruta_top = resultados["rutas"]["nombre_ruta"].iloc[0]
+else:
+    ruta_top = "N/A"
+if resultados is not None and not resultados["recolectores"].empty:
+    recolector_top = resultados["recolectores"]["recolector"].iloc[0]
+else:
+    recolector_top = "N/A"
 
 col1.metric("Total Kg Recolectados", f"{total_kg:.2f} kg")
 col2.metric("Ruta con más visitas", ruta_top)
@@ -153,26 +292,61 @@ st.divider()
 # ==========================
 st.subheader("📈 Visualizaciones")
 
-tab1, tab2, tab3 = st.tabs(["🏘️ Kg por Barrio", "👤 Kg por Recolector", "📅 Kg por Fecha"])
+tab1, tab2, tab3, tab4 = st.tabs(["🏘️ Kg por Barrio", "👤 Kg por Recolector", "📅 Kg por Fecha", "🏆 Rendimiento"])
+
+# Los gráficos se responden desde los rollups, no agrupando las visitas
+filtros_rollup = {
+    "fecha_inicio": fecha_inicio,
+    "fecha_fin": fecha_fin,
+    "barrios": barrios_filtro,
+    "recolectores": recolector_filtro,
+}
 
 # TAB 1: Kg por Barrio
 with tab1:
-    kg_barrio = df_filtrado.groupby("nombre_barrio")["cantidad_kg"].sum().reset_index()
+    kg_barrio = rollups.totales("nombre_barrio", **filtros_rollup).rename(columns={"kg": "cantidad_kg"})
     fig1 = px.bar(kg_barrio, x="nombre_barrio", y="cantidad_kg", title="Kg recolectados por Barrio", color="nombre_barrio")
     st.plotly_chart(fig1, use_container_width=True)
 
 # TAB 2: Kg por Recolector
 with tab2:
-    kg_recolector = df_filtrado.groupby("recolector")["cantidad_kg"].sum().reset_index()
+    kg_recolector = rollups.totales("recolector", **filtros_rollup).rename(columns={"kg": "cantidad_kg"})
     fig2 = px.pie(kg_recolector, names="recolector", values="cantidad_kg", title="Distribución de Kg por Recolector")
     st.plotly_chart(fig2, use_container_width=True)
 
 # TAB 3: Kg por Fecha
 with tab3:
-    kg_fecha = df_filtrado.groupby("fecha_visita")["cantidad_kg"].sum().reset_index()
-    fig3 = px.line(kg_fecha, x="fecha_visita", y="cantidad_kg", title="Kg recolectados por Fecha")
+    granularidad = st.radio("Granularidad", list(GRANULARIDADES), horizontal=True)
+    kg_fecha = rollups.serie(GRANULARIDADES[granularidad], **filtros_rollup).rename(
+        columns={"periodo": "fecha_visita", "kg": "cantidad_kg"}
+    )
+    if granularidad != "Día":
+        st.caption("Los periodos de los extremos del rango se muestran completos.")
+    fig3 = px.line(kg_fecha, x="fecha_visita", y="cantidad_kg", title=f"Kg recolectados por {granularidad}",
+                   hover_data=["visitas"])
     st.plotly_chart(fig3, use_container_width=True)
 
+# TAB 4: Rendimiento de rutas y recolectores
+with tab4:
+    if resultados is None:
+        st.info("No se pudo calcular la analítica de rendimiento.")
+    else:
+        col_r1, col_r2 = st.columns(2)
+        with col_r1:
+            st.markdown("#### 🛣️ Rutas con más visitas")
+            st.dataframe(resultados["rutas"], use_container_width=True, hide_index=True)
+        with col_r2:
+            st.markdown("#### 👤 Recolectores")
+            st.dataframe(resultados["recolectores"], use_container_width=True, hide_index=True)
+
+        if not resultados["kg_movil"].empty:
+            fig4 = px.line(resultados["kg_movil"], x="fecha", y="kg_7d", color="recolector",
+                           title="Kg móviles de 7 días por Recolector", hover_data=["kg", "kg_30d"])
+            st.plotly_chart(fig4, use_container_width=True)
+
+        st.markdown("#### 📆 Cumplimiento de frecuencia por ruta")
+        st.dataframe(resultados["adherencia"], use_container_width=True, hide_index=True)
+
 # ==========================
 # PIE DE PÁGINA
 # ==========================
@@ -192,3 +366,6 @@ with st.expander("🔧 Información Técnica", expanded=False):
     st.write("### 🔗 Registros:")
     st.code(f"Total registros: {len(df)}")
     st.code(f"Registros filtrados: {len(df_filtrado)}")
+
+    st.write("### ⏱️ Tiempos de carga (última consulta a la base):")
+    st.json(tiempos_carga)
@@ -0,0 +1,9 @@
+# ============================================================
+# NÚCLEO COMPARTIDO DE LOS DASHBOARDS HOTELEROS
+# ============================================================
+# py_streamlit_ventas.py, adrian.py e "import streamlit as st.py" usan la
+# misma conexión, carga, post-procesamiento y filtros. Los gráficos (plotly)
+# se importan recién al dibujar el primero: ver hotel.graficos.
+from hotel.carga import cargar_reservas, procesar_reservas
+from hotel.conexion import conectar
+from hotel.filtros import filtrar_reservas, rango_fechas
@@ -0,0 +1,59 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# ============================================================
+# REPORTE DE TIEMPO DE ARRANQUE
+# ============================================================
+# Uso: python -m hotel.arranque [repeticiones]
+#
+# Mide en procesos nuevos (sin módulos en caché) cuánto tardan los imports
+# de arranque de los dashboards hoteleros: el conjunto que se importaba
+# antes al inicio de cada script, el actual (plotly diferido) y lo que
+# cuesta el primer gráfico cuando por fin se importa plotly.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTS_ANTES = [
+    "streamlit", "pandas", "numpy", "plotly.express", "plotly.graph_objects", "sqlalchemy",
+]
+IMPORTS_AHORA = [
+    "streamlit", "pandas", "config_db", "hotel", "hotel.graficos",
+]
+IMPORTS_PRIMER_GRAFICO = ["plotly.express"]
+
+
+def medir(imports, previos=(), repeticiones=5):
+    """Mediana (s) de importar `imports` en un proceso nuevo, después de `previos`."""
+    codigo = "\n".join(
+        [f"import {m}" for m in previos]
+        + ["import time", "t = time.perf_counter()"]
+        + [f"import {m}" for m in imports]
+        + ["print(time.perf_counter() - t)"]
+    )
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]))
+    return statistics.median(tiempos)
+
+
+def reporte(repeticiones=5):
+    """Filas (etapa, segundos) del reporte de arranque."""
+    antes = medir(IMPORTS_ANTES, repeticiones=repeticiones)
+    ahora = medir(IMPORTS_AHORA, repeticiones=repeticiones)
+    grafico = medir(IMPORTS_PRIMER_GRAFICO, previos=IMPORTS_AHORA, repeticiones=repeticiones)
+    return [
+        ("imports al inicio (antes)", antes),
+        ("imports al inicio (ahora)", ahora),
+        ("primer gráfico (plotly diferido)", grafico),
+        ("ahorro hasta el primer render", antes - ahora),
+    ]
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for etapa, segundos in reporte(repeticiones):
+        print(f"{etapa:<36} {segundos * 1000:8.1f} ms")
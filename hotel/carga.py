@@ -0,0 +1,94 @@
+import pandas as pd
+
+from lectura_sql import leer_sql, rellenar
+
+# ============================================================
+# CARGA Y POST-PROCESAMIENTO DE RESERVAS
+# ============================================================
+# Columnas numéricas que se rellenan con 0 si existen en la consulta
+COLUMNAS_NUMERICAS = [
+    'monto_total', 'monto_neto', 'precio_unitario', 'precio_habitacion',
+    'precio_servicio', 'cantidad_personas', 'numero_personas', 'capacidad_personas',
+]
+
+# Columnas de texto/enum que se rellenan con `texto_vacio` si existen
+COLUMNAS_TEXTO = [
+    'estado_reserva', 'localizacion_reserva', 'nombre', 'nombre_cliente',
+    'tipo_habitacion', 'servicio_especial', 'estado_pago', 'metodo_pago',
+    'codigo_promocional', 'estado_habitacion', 'codigo_pago',
+]
+
+# Tablas de origen de las consultas de reservas, para deteccion_cambios.
+# MAX(id) solo en las tablas que existen en todas las versiones del esquema
+TABLAS_HOTEL = {
+    'reserva': 'id_reserva', 'cliente': 'id_cliente', 'detalle_reserva': 'id_detalle_reserva',
+    'pago': 'id_pago', 'habitacion': None, 'tipo_habitacion': None,
+    'detalle_reserva_servicios_especiales': None, 'servicios_especiales': None,
+    'detalle_pago': None, 'metodo_pago': None, 'factura': None, 'promocion': None,
+    'tarjeta': None, 'transferencia': None, 'efectivo': None, 'qr': None,
+}
+
+# Rangos de monto_neto para categoria_cliente
+BINS_CATEGORIA = [0, 200, 350, 500, float('inf')]
+CATEGORIAS_CLIENTE = ['Económico', 'Estándar', 'Premium', 'Lujo']
+
+
+def procesar_reservas(df, entrada='check_in', salida='check_out', texto_vacio='Sin especificar',
+                      columnas_texto=COLUMNAS_TEXTO, columnas_numericas=COLUMNAS_NUMERICAS,
+                      metricas_extra=False):
+    """
+    Columnas derivadas comunes a los dashboards: duración de la estadía
+    (entre `entrada` y `salida`), partes de la fecha de reserva y monto neto
+    (monto total menos descuentos de factura y promoción, más servicios).
+    Con metricas_extra agrega semana, ingreso_por_noche y categoria_cliente.
+    """
+    if df.empty:
+        return df
+
+    if entrada in df.columns and salida in df.columns:
+        df['duracion_estadia'] = (df[salida] - df[entrada]).dt.days
+        df['duracion_estadia'] = df['duracion_estadia'].fillna(0).astype(int)
+
+    if 'fecha_reserva' in df.columns:
+        df['anio'] = df['fecha_reserva'].dt.year
+        df['mes'] = df['fecha_reserva'].dt.month
+        df['dia'] = df['fecha_reserva'].dt.day
+        df['mes_anio'] = df['fecha_reserva'].dt.to_period('M').astype(str)
+        df['dia_semana'] = df['fecha_reserva'].dt.day_name()
+        if metricas_extra:
+            df['semana'] = df['fecha_reserva'].dt.isocalendar().week
+
+    # MONTO NETO (solo con las columnas de descuento que traiga la consulta)
+    if 'monto_total' in df.columns:
+        df['monto_neto'] = df['monto_total']
+        if 'descuento_factura' in df.columns:
+            df['descuento_factura'] = df['descuento_factura'].fillna(0)
+            df['monto_neto'] = df['monto_neto'] - df['descuento_factura']
+        if 'porcentaje_descuento' in df.columns:
+            df['porcentaje_descuento'] = df['porcentaje_descuento'].fillna(0)
+            df['descuento'] = df['monto_total'] * (df['porcentaje_descuento'] / 100)
+            df['monto_neto'] = df['monto_neto'] - df['descuento']
+        if 'precio_servicio' in df.columns:
+            df['monto_neto'] = df['monto_neto'] + df['precio_servicio'].fillna(0)
+    else:
+        df['monto_neto'] = 0
+
+    if metricas_extra:
+        df['ingreso_por_noche'] = df['monto_neto'] / df['duracion_estadia'].replace(0, 1)
+        df['categoria_cliente'] = pd.cut(df['monto_neto'], bins=BINS_CATEGORIA, labels=CATEGORIAS_CLIENTE)
+
+    # LIMPIEZA DE VALORES NULOS
+    for col in columnas_texto:
+        if col in df.columns:
+            df[col] = rellenar(df[col], texto_vacio)
+
+    for col in columnas_numericas:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype(float)
+
+    return df
+
+
+def cargar_reservas(fuente, consulta, tipos=None, **opciones):
+    """Lee la consulta de reservas (fuente: URI o Engine) con los tipos declarados y la post-procesa."""
+    return procesar_reservas(leer_sql(consulta, fuente, tipos=tipos), **opciones)
@@ -0,0 +1,268 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# AGREGADOS POR CLIENTE
+# ============================================================
+# Un acumulado por id_cliente (no por nombre: los homónimos no se mezclan)
+# con gasto, estadías, noches, última visita y noches por tipo de
+# habitación. Las filas nuevas se suman sobre lo ya acumulado sin volver
+# a agrupar todo, y el top-K se elige con np.argpartition (O(n)) ordenando
+# solo los K elegidos.
+
+# Métricas por las que se puede pedir el top
+METRICAS = ['gasto', 'estadias', 'noches']
+
+
+class AgregadosClientes:
+    """
+    Acumulados por cliente de un DataFrame de reservas (las filas del join:
+    una o más por detalle). El gasto suma `monto` de todas las filas, como
+    los KPI de ingresos; estadías cuenta reservas distintas y noches suma
+    `noches` una vez por detalle de reserva.
+
+    `tabla` es un DataFrame indexado por id_cliente con nombre, gasto,
+    estadias, noches y ultima_visita; `tipos` lleva las noches por tipo de
+    habitación de cada cliente.
+
+    agregar() recibe solo filas que no se habían pasado antes (un pago o un
+    servicio nuevo de una reserva ya contada también suma su monto); las
+    reservas y detalles ya vistos no vuelven a contar estadías ni noches.
+    sincronizar() recibe el snapshot completo y le pasa a agregar() solo las
+    filas que no estaban en el anterior.
+    """
+
+    def __init__(self, df=None, cliente='id_cliente', nombre='nombre_cliente', monto='monto_neto',
+                 reserva='id_reserva', detalle='id_detalle_reserva', noches='duracion_estadia',
+                 visita='check_in', tipo='tipo_habitacion'):
+        self.columnas = {
+            'cliente': cliente, 'nombre': nombre, 'monto': monto, 'reserva': reserva,
+            'detalle': detalle, 'noches': noches, 'visita': visita, 'tipo': tipo,
+        }
+        self._vaciar()
+        self._lock = threading.Lock()
+        self._lock_sincronizar = threading.Lock()
+        self.version = None
+        self.reconstrucciones = 0
+        if df is not None:
+            self.sincronizar(df)
+
+    def __len__(self):
+        return len(self.tabla)
+
+    # ---------------- actualización ----------------
+    def _vaciar(self):
+        """Deja los acumulados y las reservas, detalles y filas vistos en cero."""
+        cliente = self.columnas['cliente']
+        self.tabla = pd.DataFrame(
+            {'nombre': pd.Series(dtype='str'), 'gasto': pd.Series(dtype=float),
+             'estadias': pd.Series(dtype=np.int64), 'noches': pd.Series(dtype=np.int64),
+             'ultima_visita': pd.Series(dtype='datetime64[us]')},
+            index=pd.Index([], name=cliente),
+        )
+        self.tipos = pd.DataFrame(index=pd.Index([], name=cliente), dtype=np.int64)
+        self._reservas = np.empty(0)
+        self._detalles = np.empty(0)
+        self._filas = np.empty(0, dtype=np.uint64)
+
+    def _parcial(self, df, primera, por_detalle):
+        """
+        Acumulados (tabla, tipos) de un lote de filas nuevas. `primera` marca
+        la fila de cada reserva sin contar y `por_detalle` la de cada detalle
+        sin contar.
+        """
+        c = self.columnas
+        codigos, clientes = pd.factorize(df[c['cliente']].to_numpy())
+        n = len(clientes)
+        indice = pd.Index(clientes, name=c['cliente'])
+        monto = df[c['monto']].to_numpy(dtype=float, na_value=0.0) if c['monto'] in df.columns else np.zeros(len(df))
+        columnas = {'gasto': np.bincount(codigos, weights=monto, minlength=n)}
+
+        # Una reserva es de un solo cliente: se cuenta su primera fila
+        columnas['estadias'] = np.bincount(codigos[primera], minlength=n)
+
+        # Noches y tipo una vez por detalle: el join repite filas por servicio y pago
+        codigos_detalle = codigos[por_detalle]
+        noches = df[c['noches']].to_numpy(dtype=float, na_value=0.0)[por_detalle] if c['noches'] in df.columns \
+            else np.zeros(len(codigos_detalle))
+        columnas['noches'] = np.bincount(codigos_detalle, weights=noches, minlength=n).astype(np.int64)
+
+        if c['visita'] in df.columns:
+            columnas['ultima_visita'] = df[c['visita']].groupby(codigos).max().to_numpy()
+        if c['nombre'] in df.columns:
+            # Nombre de la última fila de cada cliente
+            ultima_fila = pd.Series(np.arange(len(df))).groupby(codigos).max().to_numpy()
+            columnas['nombre'] = df[c['nombre']].iloc[ultima_fila].astype('str').array
+        parcial = pd.DataFrame(columnas, index=indice)
+
+        tipos = pd.DataFrame(index=indice, dtype=np.int64)
+        if c['tipo'] in df.columns:
+            codigos_tipo, nombres_tipo = pd.factorize(df[c['tipo']][por_detalle])
+            validos = codigos_tipo >= 0
+            m = len(nombres_tipo)
+            conteo = np.bincount(codigos_detalle[validos] * m + codigos_tipo[validos],
+                                 weights=noches[validos], minlength=n * m)
+            tipos = pd.DataFrame(conteo.reshape(n, m).astype(np.int64), index=indice,
+                                 columns=pd.Index(nombres_tipo).astype('str'))
+        return parcial, tipos
+
+    @staticmethod
+    def _nuevas(vistos, valores):
+        """Máscara de la primera fila de cada valor que no está en `vistos` (ordenado)."""
+        nuevas = ~pd.Series(valores).duplicated().to_numpy()
+        if len(vistos):
+            posiciones = np.minimum(np.searchsorted(vistos, valores), len(vistos) - 1)
+            nuevas &= vistos[posiciones] != valores
+        return nuevas
+
+    @staticmethod
+    def _unir(vistos, valores):
+        """`vistos` (ordenado) con los `valores` nuevos, ordenado."""
+        nuevos = np.sort(valores)
+        # Dos tramos ya ordenados: el sort estable (timsort) los mezcla en tiempo lineal
+        return np.sort(np.concatenate([vistos, nuevos]), kind='stable') if len(vistos) else nuevos
+
+    def agregar(self, df):
+        """
+        Suma al acumulado las filas de df (filas que no se habían agregado
+        antes). Devuelve cuántas reservas nuevas entraron.
+        """
+        c = self.columnas
+        df = df[df[c['cliente']].notna().to_numpy()]
+        if df.empty:
+            return 0
+        reservas = df[c['reserva']].to_numpy()
+        primera = self._nuevas(self._reservas, reservas)
+        if c['detalle'] in df.columns:
+            detalles = df[c['detalle']].to_numpy()
+            por_detalle = self._nuevas(self._detalles, detalles)
+        else:
+            por_detalle = primera
+        parcial, tipos = self._parcial(df, primera, por_detalle)
+
+        with self._lock:
+            # Clientes ya conocidos: se actualizan solo sus filas; los nuevos
+            # se agregan al final. No se realinea ni reordena la tabla entera
+            posiciones = self.tabla.index.get_indexer(parcial.index)
+            conocidos = posiciones >= 0
+            filas, previos = posiciones[conocidos], parcial[conocidos]
+
+            tabla = self.tabla.copy()
+            for columna in ['gasto', 'estadias', 'noches']:
+                valores = tabla[columna].to_numpy(copy=True)
+                valores[filas] += previos[columna].to_numpy(dtype=valores.dtype)
+                tabla[columna] = valores
+            if 'ultima_visita' in previos.columns and len(filas):
+                valores = tabla['ultima_visita'].to_numpy(copy=True)
+                nueva = previos['ultima_visita'].to_numpy(dtype=valores.dtype)
+                vieja = valores[filas]
+                mayor = ~np.isnat(nueva) & (np.isnat(vieja) | (nueva > vieja))
+                valores[filas[mayor]] = nueva[mayor]
+                tabla['ultima_visita'] = valores
+            if 'nombre' in previos.columns and len(filas):
+                tabla.iloc[filas, tabla.columns.get_loc('nombre')] = previos['nombre'].to_numpy()
+            self.tabla = pd.concat([tabla, parcial[~conocidos]]).rename_axis(c['cliente'])
+
+            columnas_tipo = self.tipos.columns.union(tipos.columns, sort=False)
+            actuales = self.tipos.reindex(columns=columnas_tipo, fill_value=0)
+            tipos = tipos.reindex(columns=columnas_tipo, fill_value=0)
+            conteo = actuales.to_numpy(dtype=np.int64, copy=True)
+            posiciones = actuales.index.get_indexer(tipos.index)
+            conocidos = posiciones >= 0
+            conteo[posiciones[conocidos]] += tipos.to_numpy(dtype=np.int64)[conocidos]
+            actuales = pd.DataFrame(conteo, index=actuales.index, columns=columnas_tipo)
+            self.tipos = pd.concat([actuales, tipos[~conocidos]]).rename_axis(c['cliente'])
+
+            self._reservas = self._unir(self._reservas, reservas[primera])
+            if c['detalle'] in df.columns:
+                self._detalles = self._unir(self._detalles, detalles[por_detalle])
+        return int(primera.sum())
+
+    @staticmethod
+    def claves_filas(df):
+        """
+        Una clave por fila con su contenido (hash) y cuántas veces apareció
+        antes la misma fila: dos filas iguales del join no se confunden.
+        """
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        repeticion = pd.Series(hashes).groupby(hashes).cumcount().to_numpy().astype(np.uint64)
+        return hashes + repeticion * np.uint64(0x9E3779B97F4A7C15)
+
+    def sincronizar(self, df, version=None):
+        """
+        Pone el acumulado al día con el snapshot `df` (todas las filas, no
+        solo las nuevas): agrega las filas que no estaban en el anterior. Si
+        alguna fila ya contada no está (se editó o se borró) se reconstruye
+        desde df. Con la misma `version` que la última vez no hace nada.
+        Devuelve cuántas reservas nuevas entraron.
+        """
+        with self._lock_sincronizar:
+            if version is not None and version == self.version:
+                return 0
+            claves = self.claves_filas(df)
+            ordenadas = np.sort(claves)
+            if len(self._filas):
+                posiciones = np.minimum(np.searchsorted(ordenadas, self._filas), max(len(ordenadas) - 1, 0))
+                siguen = len(ordenadas) > 0 and bool((ordenadas[posiciones] == self._filas).all())
+            else:
+                siguen = True
+            if siguen:
+                nuevas = ~np.isin(claves, self._filas, assume_unique=True)
+                df = df[nuevas]
+            else:
+                with self._lock:
+                    self._vaciar()
+                self.reconstrucciones += 1
+            agregadas = self.agregar(df)
+            self._filas = ordenadas
+            self.version = version
+            return agregadas
+
+    # ---------------- consultas ----------------
+    def top(self, k=10, por='gasto'):
+        """
+        Los k clientes con mayor `por` (de METRICAS), de mayor a menor, con
+        su tipo preferido y una etiqueta 'Nombre (#id)' para los gráficos.
+        """
+        tabla = self.tabla
+        valores = tabla[por].to_numpy()
+        if k < len(valores):
+            # argpartition deja los k mayores al principio sin ordenar el resto
+            elegidos = np.argpartition(-valores, k - 1)[:k]
+        else:
+            elegidos = np.arange(len(valores))
+        elegidos = elegidos[np.argsort(-valores[elegidos], kind='stable')]
+        resultado = tabla.iloc[elegidos].copy()
+        resultado['tipo_preferido'] = self.tipo_preferido(resultado.index)
+        resultado = resultado.reset_index()
+        ids = resultado[self.columnas['cliente']]
+        if ids.dtype.kind == 'f':  # LEFT JOIN: ids enteros leídos como float
+            ids = ids.astype(np.int64)
+        resultado['etiqueta'] = resultado['nombre'].fillna('') + ' (#' + ids.astype('str') + ')'
+        return resultado
+
+    def tipo_preferido(self, clientes):
+        """Tipo de habitación con más noches de cada cliente (None si no hay datos)."""
+        if self.tipos.empty:
+            return pd.Series(None, index=clientes, dtype='str')
+        noches = self.tipos.reindex(clientes).fillna(0)
+        preferido = pd.Series(noches.columns.to_numpy()[noches.to_numpy().argmax(axis=1)], index=clientes)
+        return preferido.where(noches.sum(axis=1).to_numpy() > 0)
+
+    def cliente(self, id_cliente):
+        """Ficha de un cliente: acumulados, tipo preferido y noches por tipo."""
+        fila = self.tabla.loc[id_cliente]
+        ficha = fila.to_dict()
+        ficha[self.columnas['cliente']] = id_cliente
+        preferido = self.tipo_preferido([id_cliente]).iloc[0]
+        ficha['tipo_preferido'] = None if pd.isna(preferido) else preferido
+        ficha['gasto_por_noche'] = ficha['gasto'] / ficha['noches'] if ficha['noches'] else 0.0
+        if id_cliente in self.tipos.index:
+            noches = self.tipos.loc[id_cliente]
+            ficha['noches_por_tipo'] = noches[noches > 0].sort_values(ascending=False).to_dict()
+        else:
+            ficha['noches_por_tipo'] = {}
+        return ficha
+
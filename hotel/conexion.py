@@ -0,0 +1,12 @@
+def conectar(db_uri):
+    """Engine SQLAlchemy verificado con SELECT 1. Devuelve (engine, None) o (None, error)."""
+    # sqlalchemy se importa aquí para no sumarlo al arranque antes del primer render
+    from sqlalchemy import create_engine, text
+
+    try:
+        engine = create_engine(db_uri)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return engine, None
+    except Exception as e:
+        return None, e
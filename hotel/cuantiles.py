@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+from hotel.periodos import BocetosPorPeriodo, DIMENSIONES_BOCETOS, posiciones_de
+
+# ============================================================
+# CUANTILES E HISTOGRAMAS DESDE BOCETOS
+# ============================================================
+# Cada valor cae en un balde logarítmico: el balde j cubre
+# (MINIMO * g^(j-1), MINIMO * g^j] con g = (1 + a) / (1 - a), así cualquier
+# valor del balde está a menos de `a` (error relativo) de su representante.
+# Un boceto es un conteo (y una suma) por balde; unir bocetos es sumarlos,
+# por eso se guardan por (día, dimensiones) y por (mes, dimensiones) como
+# los conteos distintos y un rango de fechas se responde sumando unos pocos
+# grupos. Mediana, p90 e histogramas salen del boceto unido. Los totales
+# por rangos fijos (categoría de cliente) no pueden salir de los baldes: un
+# borde como 200 cae dentro de un balde. Para eso se guardan aparte conteo y
+# suma exactos por (grupo, rango), que también se suman entre grupos.
+PRECISION_RELATIVA = 0.01
+
+# Valores con |x| menor que esto van al balde del cero
+MINIMO = 1e-3
+
+# Grupos x baldes hasta los que se cuenta sobre una grilla densa
+MAX_CELDAS_DENSAS = 1 << 24
+
+# Columnas con bocetos por defecto
+COLUMNAS_CUANTILES = ['duracion_estadia', 'ingreso_por_noche', 'monto_neto']
+
+
+def baldes(valores, precision=PRECISION_RELATIVA):
+    """Balde de cada valor: 0 para ~cero, positivo o negativo según el signo."""
+    gamma = (1 + precision) / (1 - precision)
+    absolutos = np.abs(valores)
+    with np.errstate(divide='ignore'):
+        indices = np.ceil(np.log(absolutos / MINIMO) / np.log(gamma))
+    indices = np.where(absolutos >= MINIMO, np.maximum(indices, 1), 0).astype(np.int64)
+    return np.sign(valores).astype(np.int64) * indices
+
+
+def representantes(indices, precision=PRECISION_RELATIVA):
+    """Valor representativo de cada balde (a error relativo `precision` de sus valores)."""
+    gamma = (1 + precision) / (1 - precision)
+    absolutos = np.abs(indices)
+    valores = MINIMO * 2 * np.power(gamma, absolutos.astype(float)) / (gamma + 1)
+    return np.where(absolutos > 0, np.sign(indices) * valores, 0.0)
+
+
+class Distribucion:
+    """
+    Valores ordenados (exactos o representantes de baldes) con cuántas filas
+    tiene cada uno y la suma de esas filas.
+    """
+
+    def __init__(self, valores, conteos, sumas):
+        self.valores = np.asarray(valores, dtype=float)
+        self.conteos = np.asarray(conteos, dtype=np.int64)
+        self.sumas = np.asarray(sumas, dtype=float)
+
+    @classmethod
+    def exacta(cls, valores):
+        """Distribución de los valores crudos (sin NaN)."""
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[~np.isnan(valores)]
+        unicos, conteos = np.unique(valores, return_counts=True)
+        return cls(unicos, conteos, unicos * conteos)
+
+    @property
+    def total(self):
+        return int(self.conteos.sum())
+
+    def cuantil(self, q):
+        """Valor en el cuantil q (0-1; escalar o lista), sin interpolar (NaN si está vacía)."""
+        q = np.asarray(q, dtype=float)
+        if self.total == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        acumulado = np.cumsum(self.conteos)
+        posiciones = np.searchsorted(acumulado, q * (self.total - 1), side='right')
+        resultado = self.valores[np.minimum(posiciones, len(self.valores) - 1)]
+        return resultado if q.ndim else float(resultado)
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """Serie percentil -> valor (índice 'p50', 'p90', ...)."""
+        valores = self.cuantil(np.asarray(percentiles, dtype=float) / 100)
+        return pd.Series(valores, index=[f"p{p}" for p in percentiles])
+
+    def histograma(self, bins=20):
+        """DataFrame desde, hasta, centro y conteo con `bins` intervalos iguales (o bordes dados)."""
+        if self.total == 0:
+            return pd.DataFrame({'desde': [], 'hasta': [], 'centro': [], 'conteo': []})
+        conteos, bordes = np.histogram(self.valores, bins=bins, weights=self.conteos)
+        return pd.DataFrame({
+            'desde': bordes[:-1], 'hasta': bordes[1:], 'centro': (bordes[:-1] + bordes[1:]) / 2,
+            'conteo': conteos.astype(np.int64),
+        })
+
+    def por_rangos(self, bins, etiquetas):
+        """
+        Conteo y suma por rango, con los mismos intervalos (a, b] que pd.cut.
+        Exacto solo para Distribucion.exacta: con representantes de baldes
+        un valor en el borde puede pasar al rango siguiente (ver
+        CuantilesPorPeriodo.por_rangos).
+        """
+        rangos = pd.cut(self.valores, bins=bins, labels=etiquetas)
+        agrupado = pd.DataFrame({'rango': rangos, 'conteo': self.conteos, 'suma': self.sumas})
+        return agrupado.groupby('rango', observed=True)[['conteo', 'suma']].sum().reset_index()
+
+
+class CuantilesPorPeriodo(BocetosPorPeriodo):
+    """
+    Bocetos de baldes logarítmicos de `columnas` por día y por mes, cruzados
+    con `dimensiones` (los filtros del dashboard):
+
+        cuantiles = CuantilesPorPeriodo(df)
+        dist = cuantiles.distribucion('monto_neto', fecha_inicio, fecha_fin, estado_reserva=['confirmada'])
+        dist.percentiles(), dist.histograma(20)
+
+    Cuentan filas como los gráficos sobre df_filtrado. Las columnas enteras
+    (noches) usan el entero más cercano como representante: hasta ~50 cada
+    entero tiene su propio balde y el histograma es exacto.
+
+    `rangos` es {columna: bordes} para los totales exactos de por_rangos().
+    """
+
+    def __init__(self, df, columnas=COLUMNAS_CUANTILES, fecha='fecha_reserva', dimensiones=DIMENSIONES_BOCETOS,
+                 precision=PRECISION_RELATIVA, rangos=None):
+        base = self._agrupar(df, fecha, dimensiones)
+        self.precision = precision
+
+        self.rangos = {}
+        for columna, bordes in (rangos or {}).items():
+            if columna not in base.columns:
+                continue
+            bordes = np.asarray(bordes, dtype=float)
+            valores = base[columna].to_numpy(dtype=float, na_value=np.nan)
+            # Rango (a, b] de cada valor como pd.cut; NaN y fuera de los bordes quedan afuera
+            rango = np.searchsorted(bordes, valores, side='left') - 1
+            k = len(bordes) - 1
+            dentro = ~np.isnan(valores) & (rango >= 0) & (rango < k)
+            totales = {'bordes': bordes}
+            for nivel in self.NIVELES:
+                clave = self.codigos[nivel][dentro].astype(np.int64) * k + rango[dentro]
+                celdas = len(self.grupos[nivel]) * k
+                conteo = np.bincount(clave, minlength=celdas).reshape(-1, k)
+                suma = np.bincount(clave, weights=valores[dentro], minlength=celdas).reshape(-1, k)
+                totales[nivel] = (conteo, suma)
+            self.rangos[columna] = totales
+
+        self.bocetos = {}
+        for columna in columnas:
+            if columna not in base.columns:
+                continue
+            valores = base[columna].to_numpy(dtype=float, na_value=np.nan)
+            presentes = ~np.isnan(valores)
+            valores = valores[presentes]
+            indices = baldes(valores, precision)
+            menor = int(indices.min()) if len(indices) else 0
+            ancho = int(indices.max()) - menor + 1 if len(indices) else 1
+            representante = representantes(np.arange(menor, menor + ancho), precision)
+            if base[columna].dtype.kind in 'iu':
+                representante = np.round(representante)
+            bocetos = {'representantes': representante}
+            for nivel in self.NIVELES:
+                # Una entrada por (grupo, balde) con su conteo y su suma
+                clave = self.codigos[nivel][presentes].astype(np.int64) * ancho + (indices - menor)
+                celdas = len(self.grupos[nivel]) * ancho
+                if celdas <= MAX_CELDAS_DENSAS:
+                    # Pocos grupos (los meses): bincount sobre la grilla y quedarse con lo no vacío
+                    conteo = np.bincount(clave, minlength=celdas)
+                    claves = np.flatnonzero(conteo)
+                    conteo = conteo[claves]
+                    suma = np.bincount(clave, weights=valores, minlength=celdas)[claves]
+                else:
+                    claves, inversa = np.unique(clave, return_inverse=True)
+                    conteo = np.bincount(inversa, minlength=len(claves))
+                    suma = np.bincount(inversa, weights=valores, minlength=len(claves))
+                grupo, balde = np.divmod(claves, ancho)
+                bocetos[nivel] = (grupo, balde, conteo, suma)
+            self.bocetos[columna] = bocetos
+
+    def distribucion(self, columna, fecha_inicio=None, fecha_fin=None, **seleccion):
+        """
+        Distribucion de `columna` para el rango de fechas (inclusive) y la
+        selección, o None si la selección no está cubierta por los bocetos.
+        """
+        if not self.cubre(**seleccion) or columna not in self.bocetos:
+            return None
+        bocetos = self.bocetos[columna]
+        ancho = len(bocetos['representantes'])
+        conteos = np.zeros(ancho)
+        sumas = np.zeros(ancho)
+        for nivel, elegidos in self.tramos(fecha_inicio, fecha_fin, **seleccion):
+            grupo, balde, conteo, suma = bocetos[nivel]
+            posiciones = posiciones_de(grupo, elegidos)
+            conteos += np.bincount(balde[posiciones], weights=conteo[posiciones], minlength=ancho)
+            sumas += np.bincount(balde[posiciones], weights=suma[posiciones], minlength=ancho)
+        usados = conteos > 0
+        return Distribucion(bocetos['representantes'][usados], conteos[usados], sumas[usados])
+
+    def por_rangos(self, columna, etiquetas, fecha_inicio=None, fecha_fin=None, **seleccion):
+        """
+        Conteo y suma exactos de `columna` por rango (los bordes dados en
+        `rangos`) como Distribucion.por_rangos, o None si la selección o la
+        columna no están cubiertas.
+        """
+        if not self.cubre(**seleccion) or columna not in self.rangos:
+            return None
+        totales = self.rangos[columna]
+        conteos = np.zeros(len(totales['bordes']) - 1, dtype=np.int64)
+        sumas = np.zeros(len(conteos))
+        for nivel, elegidos in self.tramos(fecha_inicio, fecha_fin, **seleccion):
+            conteo, suma = totales[nivel]
+            conteos += conteo[elegidos].sum(axis=0)
+            sumas += suma[elegidos].sum(axis=0)
+        usados = conteos > 0
+        return pd.DataFrame({
+            'rango': pd.Categorical(np.asarray(etiquetas)[usados], categories=etiquetas, ordered=True),
+            'conteo': conteos[usados], 'suma': sumas[usados],
+        })
+
+
+def distribucion_de(cuantiles, df_filtrado, columna, fecha_inicio=None, fecha_fin=None, exactos=False,
+                    **seleccion):
+    """
+    (Distribucion, aproximada) de `columna`: desde los bocetos si se puede,
+    o con los valores de las filas ya filtradas si se piden cálculos exactos
+    o la selección no está cubierta.
+    """
+    if not exactos and cuantiles is not None:
+        distribucion = cuantiles.distribucion(columna, fecha_inicio, fecha_fin, **seleccion)
+        if distribucion is not None:
+            return distribucion, True
+    if columna not in df_filtrado.columns:
+        return Distribucion.exacta([]), False
+    return Distribucion.exacta(df_filtrado[columna].to_numpy(dtype=float, na_value=np.nan)), False
+
+
+def rangos_de(cuantiles, df_filtrado, columna, bordes, etiquetas, fecha_inicio=None, fecha_fin=None,
+              exactos=False, **seleccion):
+    """
+    Conteo y suma de `columna` por rango: desde los totales por grupo de los
+    bocetos si se puede, o con los valores de las filas ya filtradas.
+    """
+    if not exactos and cuantiles is not None:
+        resultado = cuantiles.por_rangos(columna, etiquetas, fecha_inicio, fecha_fin, **seleccion)
+        if resultado is not None:
+            return resultado
+    valores = df_filtrado[columna].to_numpy(dtype=float, na_value=np.nan) if columna in df_filtrado.columns else []
+    return Distribucion.exacta(valores).por_rangos(bordes, etiquetas)
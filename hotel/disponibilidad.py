@@ -0,0 +1,186 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from hotel.ocupacion import ESTADOS_LIBERAN, dias, estancias, inventario_de
+
+# ============================================================
+# DISPONIBILIDAD DE HABITACIONES
+# ============================================================
+# Por habitación se guardan sus intervalos ocupados [check_in, check_out)
+# ya unidos (sin solapes) y ordenados. Todas las habitaciones van en dos
+# arreglos globales con clave habitacion * ESCALA + día, así una sola
+# búsqueda binaria (np.searchsorted) responde para todas las habitaciones a
+# la vez: la habitación está ocupada entre A y B si su primer intervalo que
+# termina después de A empieza antes de B.
+#
+# Las reservas nuevas no reconstruyen el índice: se agregan a una lista
+# pendiente que se consulta aparte y se integra al llegar a MAX_PENDIENTES.
+ESCALA = 1 << 20  # días por habitación en la clave (hasta el año ~4840)
+
+MAX_PENDIENTES = 1024
+
+_SIN_PENDIENTES = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64))
+
+
+def _unir(filas, entradas, salidas):
+    """Claves (inicio, fin) de los intervalos unidos por habitación, ordenadas."""
+    inicio = filas.astype(np.int64) * ESCALA + entradas
+    fin = filas.astype(np.int64) * ESCALA + salidas
+    orden = np.argsort(inicio, kind='stable')
+    inicio, fin = inicio[orden], fin[orden]
+    if len(inicio) == 0:
+        return inicio, fin
+    # Empieza un intervalo nuevo donde el inicio queda después de todo lo
+    # anterior (la escala separa habitaciones: nunca se unen entre sí)
+    hasta_ahora = np.maximum.accumulate(fin)
+    nuevo = np.empty(len(inicio), dtype=bool)
+    nuevo[0] = True
+    nuevo[1:] = inicio[1:] > hasta_ahora[:-1]
+    cortes = np.flatnonzero(nuevo)
+    return inicio[cortes], np.maximum.reduceat(fin, cortes)
+
+
+class IndiceDisponibilidad:
+    """
+    Índice de intervalos ocupados por habitación, armado una vez por
+    snapshot a partir de las filas de detalle_reserva (check_in, check_out,
+    id_habitacion). `inventario` son todas las habitaciones (id, piso,
+    tipo_habitacion); si no se pasa se usan las que aparecen en df.
+
+        indice = IndiceDisponibilidad(df, inventario)
+        indice.libres('2024-05-01', '2024-05-04', tipo_habitacion=['Doble'])
+        indice.agregar(12, '2024-05-02', '2024-05-03')
+    """
+
+    def __init__(self, df, inventario=None, entrada='check_in', salida='check_out',
+                 habitacion='id_habitacion', estados_liberan=ESTADOS_LIBERAN):
+        if inventario is None:
+            inventario = inventario_de(df, habitacion)
+        self.habitaciones = inventario.sort_values(habitacion).reset_index(drop=True)
+        self.columna_habitacion = habitacion
+        self.estados_liberan = estados_liberan
+        self._posiciones = pd.Index(self.habitaciones[habitacion])
+        self._lock = threading.Lock()
+        self._selecciones = {}  # filas del inventario por selección ya consultada
+
+        datos = self._estancias(df, entrada, salida)
+        filas = self._posiciones.get_indexer(datos[habitacion])
+        entradas, salidas = dias(datos[entrada]), dias(datos[salida])
+        usar = (filas >= 0) & (salidas > entradas)
+        # Para actualizar(): ids de detalle mayores a este son reservas nuevas
+        self.ultimo_detalle = None
+        if 'id_detalle_reserva' in datos.columns:
+            self.ultimo_detalle = datos['id_detalle_reserva'].max() if len(datos) else 0
+
+        # (inicio, fin, pendientes) se reemplaza como una sola tupla: una
+        # consulta concurrente nunca ve el índice a medio actualizar
+        self._estado = _unir(filas[usar], entradas[usar], salidas[usar]) + (_SIN_PENDIENTES,)
+
+    def _estancias(self, df, entrada, salida):
+        return estancias(df, entrada, salida, self.columna_habitacion, estados_liberan=self.estados_liberan)
+
+    def __len__(self):
+        """Intervalos ocupados (unidos) más reservas pendientes de integrar."""
+        inicio, _, pendientes = self._estado
+        return len(inicio) + len(pendientes[0])
+
+    # ---------------- consultas ----------------
+    def _filas(self, seleccion):
+        """Posiciones del inventario que cumplen la selección por columna."""
+        clave = tuple(sorted((c, tuple(v)) for c, v in seleccion.items() if v is not None and len(v) > 0))
+        filas = self._selecciones.get(clave)
+        if filas is None:
+            mascara = np.ones(len(self.habitaciones), dtype=bool)
+            for columna, valores in clave:
+                mascara &= self.habitaciones[columna].isin(valores).to_numpy()
+            filas = self._selecciones[clave] = np.flatnonzero(mascara)
+        return filas
+
+    def _ocupadas(self, filas, desde, hasta):
+        """Máscara (alineada con `filas`) de habitaciones con alguna noche ocupada en [desde, hasta)."""
+        desde = int(np.clip(desde, 0, ESCALA - 1))
+        hasta = int(np.clip(hasta, 0, ESCALA - 1))
+        base = filas.astype(np.int64) * ESCALA
+        inicio, fin, (pend_filas, pend_inicio, pend_fin) = self._estado
+        if len(inicio):
+            i = np.searchsorted(fin, base + desde, side='right')
+            ocupada = inicio[np.minimum(i, len(inicio) - 1)] < base + hasta
+            ocupada &= i < len(inicio)
+        else:
+            ocupada = np.zeros(len(filas), dtype=bool)
+
+        if len(pend_filas):
+            chocan = pend_filas[(pend_inicio < hasta) & (pend_fin > desde)]
+            ocupada |= np.isin(filas, chocan)
+        return ocupada
+
+    def libres(self, inicio, fin, **seleccion):
+        """
+        Habitaciones del inventario libres todas las noches de inicio a fin
+        (fin es la fecha de salida, no se cuenta). `seleccion` filtra por
+        columnas del inventario: tipo_habitacion=[...], piso=[...].
+        """
+        filas = self._filas(seleccion)
+        desde, hasta = dias([pd.Timestamp(inicio), pd.Timestamp(fin)])
+        return self.habitaciones.iloc[filas[~self._ocupadas(filas, desde, hasta)]]
+
+    def ocupadas(self, inicio, fin, **seleccion):
+        """Habitaciones con al menos una noche ocupada entre inicio y fin."""
+        filas = self._filas(seleccion)
+        desde, hasta = dias([pd.Timestamp(inicio), pd.Timestamp(fin)])
+        return self.habitaciones.iloc[filas[self._ocupadas(filas, desde, hasta)]]
+
+    def disponible(self, habitacion, inicio, fin):
+        """True si la habitación está libre todas las noches de inicio a fin."""
+        fila = self._posiciones.get_indexer([habitacion])
+        if fila[0] < 0:
+            raise KeyError(f"Habitación desconocida: {habitacion}")
+        desde, hasta = dias([pd.Timestamp(inicio), pd.Timestamp(fin)])
+        return not self._ocupadas(fila, desde, hasta)[0]
+
+    # ---------------- actualización ----------------
+    def agregar(self, habitacion, inicio, fin):
+        """Registra una reserva nueva [inicio, fin) sin reconstruir el índice."""
+        fila = self._posiciones.get_indexer([habitacion])
+        if fila[0] < 0:
+            raise KeyError(f"Habitación desconocida: {habitacion}")
+        desde, hasta = dias([pd.Timestamp(inicio), pd.Timestamp(fin)])
+        if hasta <= desde:
+            return
+        self._sumar_pendientes(fila, np.array([desde]), np.array([hasta]))
+
+    def actualizar(self, df, entrada='check_in', salida='check_out'):
+        """
+        Agrega las estadías de df con id_detalle_reserva mayor al último
+        indexado (las reservas nuevas de un snapshot posterior). Las
+        cancelaciones y cambios de fechas requieren reconstruir el índice.
+        """
+        if self.ultimo_detalle is None or 'id_detalle_reserva' not in df.columns:
+            return 0
+        nuevas = df[(df['id_detalle_reserva'] > self.ultimo_detalle).to_numpy()]
+        nuevas = self._estancias(nuevas, entrada, salida)
+        filas = self._posiciones.get_indexer(nuevas[self.columna_habitacion])
+        entradas, salidas = dias(nuevas[entrada]), dias(nuevas[salida])
+        usar = (filas >= 0) & (salidas > entradas)
+        self._sumar_pendientes(filas[usar], entradas[usar], salidas[usar])
+        if len(nuevas):
+            self.ultimo_detalle = max(self.ultimo_detalle, nuevas['id_detalle_reserva'].max())
+        return int(usar.sum())
+
+    def _sumar_pendientes(self, filas, entradas, salidas):
+        """Agrega intervalos a la lista pendiente y la integra si ya es larga."""
+        with self._lock:
+            inicio, fin, (pend_filas, pend_inicio, pend_fin) = self._estado
+            pend_filas = np.concatenate([pend_filas, filas])
+            pend_inicio = np.concatenate([pend_inicio, entradas])
+            pend_fin = np.concatenate([pend_fin, salidas])
+            if len(pend_filas) < MAX_PENDIENTES:
+                self._estado = (inicio, fin, (pend_filas, pend_inicio, pend_fin))
+                return
+            # Integrar: unir de nuevo los intervalos del índice con los pendientes
+            filas = np.concatenate([inicio // ESCALA, pend_filas])
+            entradas = np.concatenate([inicio % ESCALA, pend_inicio])
+            salidas = np.concatenate([fin % ESCALA, pend_fin])
+            self._estado = _unir(filas, entradas, salidas) + (_SIN_PENDIENTES,)
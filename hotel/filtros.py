@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from lectura_sql import quitar_categorias_sin_uso
+
+
+def rango_fechas(fechas, df, columna='fecha_reserva'):
+    """
+    (inicio, fin) elegidos en st.date_input. Si todavía no hay dos fechas,
+    el rango completo de `columna` en df (o los últimos 30 días).
+    """
+    if isinstance(fechas, (list, tuple)) and len(fechas) == 2:
+        return fechas[0], fechas[1]
+    if columna in df.columns and df[columna].notna().any():
+        return df[columna].min().date(), df[columna].max().date()
+    return datetime.now().date() - timedelta(days=30), datetime.now().date()
+
+
+def filtrar_reservas(df, fecha_inicio=None, fecha_fin=None, columna_fecha='fecha_reserva', **seleccion):
+    """
+    Reservas entre fecha_inicio y fecha_fin (ambas inclusive) cuyas columnas
+    toman alguno de los valores elegidos: filtrar_reservas(df, fi, ff,
+    estado_reserva=[...], metodo_pago=[...]). Las selecciones vacías y las
+    columnas que no existen se ignoran. Todas las condiciones se combinan
+    en una sola máscara, sin copias intermedias del DataFrame; si no deja
+    afuera ninguna fila se devuelve una vista del snapshot sin copiar nada.
+    """
+    mascara = np.ones(len(df), dtype=bool)
+
+    if fecha_inicio is not None and fecha_fin is not None and columna_fecha in df.columns:
+        fechas = df[columna_fecha]
+        mascara &= ((fechas >= pd.Timestamp(fecha_inicio)) &
+                    (fechas < pd.Timestamp(fecha_fin) + pd.Timedelta(days=1))).to_numpy()
+
+    for columna, valores in seleccion.items():
+        if valores and columna in df.columns:
+            mascara &= df[columna].isin(valores).to_numpy()
+
+    if mascara.all():
+        return df.copy(deep=False)
+    return quitar_categorias_sin_uso(df[mascara])
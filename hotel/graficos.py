@@ -0,0 +1,30 @@
+import importlib
+
+# ============================================================
+# IMPORTACIÓN PEREZOSA DE PLOTLY
+# ============================================================
+# plotly.express tarda más en importarse que el resto del arranque del
+# dashboard. `px` y `go` se usan igual que los módulos, pero el import real
+# ocurre la primera vez que se pide un atributo (al dibujar el primer
+# gráfico), no al iniciar el proceso.
+
+
+class _ModuloPerezoso:
+    """Importa el módulo la primera vez que se usa uno de sus atributos."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+    @property
+    def cargado(self):
+        return self._modulo is not None
+
+
+px = _ModuloPerezoso("plotly.express")
+go = _ModuloPerezoso("plotly.graph_objects")
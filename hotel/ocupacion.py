@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# OCUPACIÓN POR NOCHE
+# ============================================================
+# Una habitación está ocupada la noche d si check_in <= d < check_out. En
+# lugar de generar una fila por noche de cada estadía, cada estadía suma +1
+# en su noche de entrada y -1 en la de salida de un arreglo de diferencias
+# (habitaciones x noches); la suma acumulada por noche da la ocupación.
+# Todo se resuelve con np.bincount y np.cumsum, sin bucles por estadía.
+
+# Columnas de la habitación que acompañan a id_habitacion
+COLUMNAS_HABITACION = ['piso', 'tipo_habitacion']
+
+# Estados de reserva que no ocupan la habitación
+ESTADOS_LIBERAN = ['cancelada']
+
+# Frecuencias para agrupar noches en los mapas de calor
+FRECUENCIAS = {"Día": "D", "Semana": "W-MON", "Mes": "MS"}
+
+
+def estancias(df, entrada='check_in', salida='check_out', habitacion='id_habitacion',
+              detalle='id_detalle_reserva', estados_liberan=ESTADOS_LIBERAN):
+    """
+    Una fila por detalle de reserva con habitación y fechas válidas, sin las
+    reservas en `estados_liberan`. El join de reservas repite cada detalle
+    por servicio y por pago: se deja uno.
+    """
+    if 'estado_reserva' in df.columns and estados_liberan:
+        df = df[~df['estado_reserva'].isin(estados_liberan).to_numpy()]
+    validas = df[entrada].notna().to_numpy() & df[salida].notna().to_numpy() & df[habitacion].notna().to_numpy()
+    unicas = ~df[detalle].duplicated().to_numpy() if detalle in df.columns else True
+    return df[validas & unicas]
+
+
+def inventario_de(df, habitacion='id_habitacion'):
+    """Habitaciones que aparecen en df (id y COLUMNAS_HABITACION), una fila por habitación."""
+    columnas = [habitacion] + [c for c in COLUMNAS_HABITACION if c in df.columns]
+    return df.loc[df[habitacion].notna(), columnas].drop_duplicates(habitacion)
+
+
+def dias(fechas):
+    """Días desde 1970-01-01 (int64) de una columna de fechas."""
+    return np.asarray(fechas, dtype='datetime64[D]').astype(np.int64)
+
+
+class MatrizOcupacion:
+    """
+    Ocupación noche a noche de cada habitación entre `inicio` y `fin`
+    (ambos inclusive; por defecto el rango de las estadías).
+
+    `inventario` es un DataFrame con id_habitacion y COLUMNAS_HABITACION de
+    todas las habitaciones del hotel (las disponibles); si no se pasa se
+    usan las que aparecen en df. `tarifa` es la columna con el precio por
+    noche, que alimenta ADR (ingreso / noches vendidas) y RevPAR (ingreso /
+    noches disponibles). Las reservas en `estados_liberan` no ocupan noches
+    ni suman ingreso.
+
+    Atributos: `noches` (DatetimeIndex), `habitaciones` (inventario en el
+    orden de las filas), `ocupada` (bool, habitaciones x noches) e `ingreso`
+    (float, habitaciones x noches; con estadías superpuestas en la misma
+    habitación, el promedio de sus tarifas).
+    """
+
+    def __init__(self, df, inicio=None, fin=None, inventario=None, entrada='check_in',
+                 salida='check_out', habitacion='id_habitacion', tarifa='precio_unitario',
+                 estados_liberan=ESTADOS_LIBERAN):
+        datos = estancias(df, entrada, salida, habitacion, estados_liberan=estados_liberan)
+        if inventario is None:
+            inventario = inventario_de(df, habitacion)
+        self.habitaciones = inventario.sort_values(habitacion).reset_index(drop=True)
+
+        entradas = dias(datos[entrada])
+        salidas = dias(datos[salida])
+        if inicio is None:
+            inicio = entradas.min() if len(entradas) else dias([pd.Timestamp.now()])[0]
+        else:
+            inicio = dias([pd.Timestamp(inicio)])[0]
+        if fin is None:
+            fin = salidas.max() - 1 if len(salidas) else inicio
+        else:
+            fin = dias([pd.Timestamp(fin)])[0]
+        n_noches = max(int(fin - inicio) + 1, 0)
+        self.noches = pd.date_range(pd.Timestamp(int(inicio), unit='D'), periods=n_noches, freq='D')
+
+        # Fila de cada estadía: posición de su habitación en el inventario
+        filas = pd.Index(self.habitaciones[habitacion]).get_indexer(datos[habitacion])
+        conocida = filas >= 0
+
+        # Recortar al rango; las estadías que no tocan ninguna noche se van
+        desde = np.clip(entradas - inicio, 0, n_noches)
+        hasta = np.clip(salidas - inicio, 0, n_noches)
+        usar = conocida & (hasta > desde)
+        filas, desde, hasta = filas[usar], desde[usar], hasta[usar]
+
+        ancho = n_noches + 1
+        celdas = len(self.habitaciones) * ancho
+        suma = np.bincount(filas * ancho + desde, minlength=celdas)
+        resta = np.bincount(filas * ancho + hasta, minlength=celdas)
+        conteo = np.cumsum((suma - resta).reshape(-1, ancho), axis=1)[:, :n_noches]
+        # Dos estadías superpuestas en la misma habitación siguen siendo una ocupada
+        self.ocupada = conteo > 0
+
+        if tarifa in datos.columns:
+            precio = datos[tarifa].to_numpy(dtype=float, na_value=0.0)[usar]
+            suma = np.bincount(filas * ancho + desde, weights=precio, minlength=celdas)
+            resta = np.bincount(filas * ancho + hasta, weights=precio, minlength=celdas)
+            ingreso = np.cumsum((suma - resta).reshape(-1, ancho), axis=1)[:, :n_noches]
+            # Misma base que ocupada: una noche vendida por habitación, con la
+            # tarifa promedio si hay estadías superpuestas (si no, ADR se infla)
+            self.ingreso = ingreso / np.maximum(conteo, 1)
+        else:
+            self.ingreso = np.zeros(self.ocupada.shape)
+
+    def _grupos(self, por):
+        """(códigos de grupo por habitación, etiquetas) para una columna del inventario."""
+        if por is None:
+            return np.zeros(len(self.habitaciones), dtype=np.intp), pd.Index(['Total'])
+        codigos, etiquetas = pd.factorize(self.habitaciones[por], sort=True, use_na_sentinel=False)
+        return codigos, pd.Index(etiquetas, name=por)
+
+    def totales(self, por=None):
+        """
+        (ocupadas, disponibles, ingreso) como DataFrames noches x grupos
+        (un solo grupo 'Total' si por es None).
+        """
+        codigos, etiquetas = self._grupos(por)
+        ocupadas = np.zeros((len(etiquetas), len(self.noches)), dtype=np.int64)
+        ingreso = np.zeros((len(etiquetas), len(self.noches)))
+        np.add.at(ocupadas, codigos, self.ocupada)
+        np.add.at(ingreso, codigos, self.ingreso)
+        disponibles = np.bincount(codigos, minlength=len(etiquetas))
+        disponibles = np.broadcast_to(disponibles[:, None], ocupadas.shape)
+        return tuple(
+            pd.DataFrame(valores.T, index=self.noches, columns=etiquetas)
+            for valores in (ocupadas, disponibles, ingreso)
+        )
+
+    def serie(self, por=None, frecuencia='D'):
+        """
+        Formato largo para gráficos: noche (o inicio del periodo), grupo,
+        ocupadas, disponibles, tasa (%), ingreso, adr y revpar.
+        """
+        ocupadas, disponibles, ingreso = self.totales(por)
+        if frecuencia != 'D':
+            ocupadas, disponibles, ingreso = (
+                t.resample(frecuencia, label='left', closed='left').sum()
+                for t in (ocupadas, disponibles, ingreso)
+            )
+        nombre = por or 'grupo'
+        largo = pd.DataFrame({
+            'noche': np.repeat(ocupadas.index.to_numpy(), ocupadas.shape[1]),
+            nombre: np.tile(ocupadas.columns.to_numpy(), ocupadas.shape[0]),
+            'ocupadas': ocupadas.to_numpy().ravel(),
+            'disponibles': disponibles.to_numpy().ravel(),
+            'ingreso': ingreso.to_numpy().ravel(),
+        })
+        return _indicadores(largo)
+
+    def mapa(self, por='piso', frecuencia='W-MON'):
+        """Tasa de ocupación (%) grupos x periodos, lista para un heatmap."""
+        serie = self.serie(por, frecuencia)
+        return serie.pivot(index=por, columns='noche', values='tasa')
+
+    def resumen(self):
+        """Noches vendidas y disponibles, tasa de ocupación (%), ADR y RevPAR del rango."""
+        fila = pd.DataFrame({
+            'ocupadas': [int(self.ocupada.sum())],
+            'disponibles': [self.ocupada.size],
+            'ingreso': [float(self.ingreso.sum())],
+        })
+        return _indicadores(fila).iloc[0].to_dict()
+
+
+def _indicadores(totales):
+    """Agrega tasa, adr y revpar a un DataFrame con ocupadas, disponibles e ingreso."""
+    ocupadas = totales['ocupadas'].to_numpy(dtype=float)
+    disponibles = totales['disponibles'].to_numpy(dtype=float)
+    ingreso = totales['ingreso'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totales['tasa'] = np.where(disponibles > 0, ocupadas / disponibles * 100, 0.0)
+        totales['adr'] = np.where(ocupadas > 0, ingreso / ocupadas, 0.0)
+        totales['revpar'] = np.where(disponibles > 0, ingreso / disponibles, 0.0)
+    return totales
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from hotel.filtros import filtrar_reservas
+
+# ============================================================
+# BOCETOS POR DÍA Y POR MES
+# ============================================================
+# Base de los resúmenes que se unen en lugar de recalcularse (conteos
+# distintos, cuantiles): cada fila del snapshot cae en un grupo (día,
+# combinación de dimensiones) y en un grupo (mes, combinación). Un rango de
+# fechas se responde con los meses completos más los días sueltos de los
+# extremos, y las dimensiones se eligen con filtrar_reservas sobre la tabla
+# de grupos (las mismas reglas que el filtro de filas del dashboard).
+
+# Filtros del dashboard con bocetos propios (pocos valores cada uno)
+DIMENSIONES_BOCETOS = ['estado_reserva', 'tipo_habitacion', 'metodo_pago']
+
+
+def posiciones_de(grupo, filas):
+    """Posiciones de las entradas de los grupos `filas` en `grupo` (ordenado)."""
+    comienzos = np.searchsorted(grupo, filas, side='left')
+    largos = np.searchsorted(grupo, filas, side='right') - comienzos
+    # Un arange por grupo, concatenados sin bucle
+    return np.repeat(comienzos - np.cumsum(largos) + largos, largos) + np.arange(largos.sum())
+
+
+class BocetosPorPeriodo:
+    """
+    Grupos (periodo, dimensiones) de las filas de df con `fecha`. Las
+    subclases llaman a _agrupar() en su __init__ y guardan sus bocetos por
+    grupo a partir de `codigos[nivel]` (el grupo de cada fila devuelta).
+
+    Cada dimensión multiplica los grupos: conviene usar solo columnas de
+    pocos valores. Si una selección filtra por otra columna los bocetos no
+    la cubren (cubre() es False) y hay que calcular sobre las filas.
+    """
+
+    NIVELES = ('dia', 'mes')
+
+    def _agrupar(self, df, fecha='fecha_reserva', dimensiones=DIMENSIONES_BOCETOS):
+        """Arma grupos y codigos; devuelve las filas con fecha (en el orden de codigos)."""
+        self.dimensiones = [d for d in dimensiones if d in df.columns]
+        self.columnas_df = set(df.columns)
+        base = df[df[fecha].notna().to_numpy()] if fecha in df.columns else df.iloc[:0]
+        dias = np.asarray(base[fecha] if fecha in df.columns else [], dtype='datetime64[D]')
+        periodos = {'dia': dias, 'mes': dias.astype('datetime64[M]')}
+
+        # Código de grupo por fila: periodo y dimensiones factorizados y
+        # combinados en un solo entero (más rápido que groupby sobre texto)
+        combinada = np.zeros(len(base), dtype=np.int64)
+        radio = 1
+        for dimension in self.dimensiones:
+            codigos, valores = pd.factorize(base[dimension], sort=True, use_na_sentinel=False)
+            combinada = combinada * len(valores) + codigos
+            radio *= max(len(valores), 1)
+        self.grupos = {}
+        self.codigos = {}
+        for nivel, periodo in periodos.items():
+            numero = periodo.astype(np.int64)
+            clave = (numero - (numero.min() if len(numero) else 0)) * radio + combinada
+            _, primeras, self.codigos[nivel] = np.unique(clave, return_index=True, return_inverse=True)
+            grupos = {'periodo': periodo[primeras].astype('datetime64[ns]')}
+            for dimension in self.dimensiones:
+                grupos[dimension] = base[dimension].iloc[primeras].to_numpy()
+            self.grupos[nivel] = pd.DataFrame(grupos)
+        return base
+
+    def cubre(self, **seleccion):
+        """True si la selección solo filtra por dimensiones con bocetos."""
+        return all(not valores or columna in self.dimensiones or columna not in self.columnas_df
+                   for columna, valores in seleccion.items())
+
+    def _elegidos(self, nivel, desde, hasta, seleccion):
+        """Posiciones de los grupos de `nivel` con periodo en [desde, hasta] y las dimensiones elegidas."""
+        grupos = self.grupos[nivel]
+        periodo = grupos['periodo'].to_numpy()
+        mascara = (periodo >= desde.astype('datetime64[ns]')) & (periodo <= hasta.astype('datetime64[ns]'))
+        elegidos = filtrar_reservas(
+            grupos[mascara], **{c: v for c, v in seleccion.items() if c in self.dimensiones}
+        )
+        return elegidos.index.to_numpy()
+
+    def tramos(self, fecha_inicio=None, fecha_fin=None, **seleccion):
+        """
+        [(nivel, grupos)] que cubren el rango de fechas (inclusive) y la
+        selección: los meses completos y los días sueltos de los extremos.
+        """
+        todos = self.grupos['dia']['periodo']
+        if todos.empty:
+            return []
+        inicio = np.datetime64(pd.Timestamp(fecha_inicio) if fecha_inicio is not None else todos.min(), 'D')
+        fin = np.datetime64(pd.Timestamp(fecha_fin) if fecha_fin is not None else todos.max(), 'D')
+
+        primer_mes = inicio.astype('datetime64[M]')
+        if primer_mes.astype('datetime64[D]') < inicio:
+            primer_mes += 1
+        ultimo_mes = (fin + 1).astype('datetime64[M]') - 1
+        if primer_mes <= ultimo_mes:
+            partes = [('mes', primer_mes, ultimo_mes),
+                      ('dia', inicio, primer_mes.astype('datetime64[D]') - 1),
+                      ('dia', (ultimo_mes + 1).astype('datetime64[D]'), fin)]
+        else:
+            partes = [('dia', inicio, fin)]
+
+        resultado = []
+        for nivel, desde, hasta in partes:
+            if desde > hasta:
+                continue
+            elegidos = self._elegidos(nivel, desde, hasta, seleccion)
+            if len(elegidos):
+                resultado.append((nivel, elegidos))
+        return resultado
@@ -0,0 +1,148 @@
+import threading
+import time
+
+# ============================================================
+# SNAPSHOT CON REFRESCO EN SEGUNDO PLANO
+# ============================================================
+# Stale-while-revalidate: las sesiones siempre reciben el último snapshot
+# cargado y un hilo lo reconstruye poco antes de que venza. Solo la primera
+# carga del proceso (arranque en frío) espera a la base de datos.
+
+
+class SnapshotRefrescado:
+    """
+    Guarda el resultado de `cargar()` y lo reemplaza en segundo plano cada
+    `ttl - anticipacion` segundos. Si la recarga falla se sigue sirviendo el
+    snapshot anterior y el error queda en `error`. Si nadie lo pide durante
+    `ttl` segundos el hilo deja de consultar la base hasta el siguiente
+    acceso, que recibe el snapshot viejo al instante y dispara la recarga.
+
+    `cambios` es opcional: una función que devuelve la versión de las tablas
+    de origen (ver deteccion_cambios). Cuando la versión cambia se recarga
+    en segundo plano sin esperar al ttl, que queda como red de seguridad.
+    """
+
+    def __init__(self, cargar, ttl=600, anticipacion=60, reintento=30, cambios=None):
+        self._cargar = cargar
+        self._cambios = cambios
+        self._version = None
+        self.ttl = ttl
+        self.anticipacion = min(anticipacion, ttl / 2)
+        self.reintento = reintento
+
+        # (datos, cargado_en) se reemplaza como una sola tupla: un lector
+        # nunca ve datos nuevos con la hora de carga vieja
+        self._snapshot = None
+        self._ultimo_acceso = time.time()
+        self._lock_carga = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self.error = None
+        self.recargas = 0
+
+    # ---------------- lectura ----------------
+    def obtener(self):
+        """(datos, cargado_en). Solo bloquea si todavía no hay ningún snapshot."""
+        self._ultimo_acceso = time.time()
+        if self._snapshot is None:
+            self._recargar(solo_si_vacio=True)
+        self._iniciar_hilo()
+        if self._cambios is not None:
+            version = self._cambios()
+            if self._version is None:
+                self._version = version
+            elif version != self._version:
+                self._version = version
+                self._despertar.set()
+        if self.por_vencer():
+            self._despertar.set()
+        return self._snapshot if self._snapshot is not None else (None, None)
+
+    def edad(self):
+        """Segundos desde la última carga exitosa (None si nunca cargó)."""
+        if self._snapshot is None:
+            return None
+        return time.time() - self._snapshot[1]
+
+    def por_vencer(self):
+        """True si ya pasó el momento de recargar (ttl - anticipacion)."""
+        edad = self.edad()
+        return edad is not None and edad >= self.ttl - self.anticipacion
+
+    def refrescar(self):
+        """Pide una recarga en segundo plano sin esperar el resultado."""
+        self._despertar.set()
+
+    # ---------------- recarga ----------------
+    def _recargar(self, solo_si_vacio=False):
+        with self._lock_carga:
+            # Varias sesiones en el arranque en frío: solo la primera carga
+            if solo_si_vacio and self._snapshot is not None:
+                return True
+            try:
+                datos = self._cargar()
+            except Exception as e:
+                self.error = e
+                return False
+            self._snapshot = (datos, time.time())
+            self.error = None
+            self.recargas += 1
+            return True
+
+    def _iniciar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="refresco-snapshot", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            edad = self.edad()
+            if edad is None or self.error is not None:
+                espera = self.reintento
+            else:
+                espera = max(self.ttl - self.anticipacion - edad, 0)
+            pedido = self._despertar.wait(timeout=espera)
+            self._despertar.clear()
+
+            # Sin visitas durante un ttl: esperar al próximo acceso
+            if not pedido and time.time() - self._ultimo_acceso > self.ttl:
+                self._despertar.wait()
+            self._recargar()
+            # Los pedidos que llegaron durante la recarga ya quedan atendidos
+            self._despertar.clear()
+
+
+def snapshot_vigilado(cargar, engine, ttl=3600, clave=None, cache=None):
+    """
+    SnapshotRefrescado de las reservas que se recarga cuando cambian las
+    tablas de TABLAS_HOTEL; el ttl queda solo como red de seguridad.
+
+    Con `clave` el resultado se comparte entre procesos por medio de
+    cache_compartida (`cache` o una CacheCompartida con el almacén por
+    defecto): solo un worker ejecuta la consulta y el resto lee el snapshot.
+    """
+    from deteccion_cambios import VigilanteCambios
+    from hotel.carga import TABLAS_HOTEL
+
+    vigilante = VigilanteCambios(engine.raw_connection).vigilar("hotel", TABLAS_HOTEL)
+    if clave is not None:
+        from cache_compartida import CacheCompartida
+
+        cache = cache if cache is not None else CacheCompartida()
+        cargar_local = cargar
+
+        def cargar():
+            return cache.obtener(clave, cargar_local, firma=vigilante.firma("hotel"), ttl=ttl)
+
+    return SnapshotRefrescado(cargar, ttl=ttl, cambios=lambda: vigilante.version("hotel"))
+
+
+def formatear_edad(segundos):
+    """'hace 42 s', 'hace 3 min', 'hace 2 h' (o 'sin datos')."""
+    if segundos is None:
+        return "sin datos"
+    if segundos < 60:
+        return f"hace {segundos:.0f} s"
+    if segundos < 3600:
+        return f"hace {segundos / 60:.0f} min"
+    return f"hace {segundos / 3600:.1f} h"
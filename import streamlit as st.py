@@ -1,10 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from sqlalchemy import create_engine, text
 from datetime import datetime, timedelta
+import time
 import warnings
+
+from config_db import cargar_uri
+from hotel import cargar_reservas, conectar, filtrar_reservas
+from hotel.carga import BINS_CATEGORIA, CATEGORIAS_CLIENTE, COLUMNAS_NUMERICAS
+from hotel.cuantiles import CuantilesPorPeriodo, distribucion_de, rangos_de
+from lectura_sql import leer_sql
+from hotel.clientes import AgregadosClientes
+from hotel.disponibilidad import IndiceDisponibilidad
+from hotel.distintos import ConteosDistintos, contar_distintos
+from hotel.graficos import px
+from hotel.ocupacion import FRECUENCIAS, MatrizOcupacion
+from hotel.refresco import formatear_edad, snapshot_vigilado
+
 warnings.filterwarnings('ignore')
 
 # ============================================================================
@@ -18,7 +29,8 @@ st.set_page_config(
 )
 
 # CADENA DE CONEXIÓN - PUERTO 3307 como en tu MySQL Workbench
-DEFAULT_DB_URI = "mysql+pymysql://root:@localhost:3306/proyecto"
+# (diagnostico.py guarda la URI que funciona en db_config.json)
+DEFAULT_DB_URI = cargar_uri("mysql+pymysql://root:@localhost:3306/proyecto")
 
 # ============================================================================
 # FUNCIONES DE CONEXIÓN Y CARGA
@@ -26,22 +38,26 @@ DEFAULT_DB_URI = "mysql+pymysql://root:@localhost:3306/proyecto"
 @st.cache_resource
 def get_connection():
     """Establece conexión con la base de datos."""
-    try:
-        engine = create_engine(DEFAULT_DB_URI)
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        return engine
-    except Exception as e:
-        st.error(f"❌ Error de conexión: {str(e)}")
-        return None
-
-@st.cache_data(ttl=300)
-def load_hotel_data():
-    """Carga los datos principales del hotel."""
-    engine = get_connection()
+    engine, error = conectar(DEFAULT_DB_URI)
     if engine is None:
-        return pd.DataFrame()
-    
+        st.error(f"❌ Error de conexión: {str(error)}")
+    return engine
+
+# Tipos aplicados al leer: dinero (DECIMAL) como float64, fechas como
+# datetime64 y enums como category; así nada queda en columnas object
+TIPOS_HOTEL = {
+    'monto_total': 'float', 'precio_unitario': 'float', 'precio_habitacion': 'float',
+    'precio_servicio': 'float', 'monto_pago': 'float', 'descuento_factura': 'float',
+    'porcentaje_descuento': 'float',
+    'fecha_reserva': 'fecha', 'check_in': 'fecha', 'check_out': 'fecha',
+    'fecha_pago': 'fecha', 'fecha_vencimiento': 'fecha',
+    'estado_reserva': 'categoria', 'localizacion_reserva': 'categoria',
+    'tipo_habitacion': 'categoria', 'servicio_especial': 'categoria',
+    'estado_pago': 'categoria', 'metodo_pago': 'categoria',
+}
+
+def load_hotel_data(engine):
+    """Carga los datos principales del hotel (lanza la excepción si falla)."""
     # CONSULTA PRINCIPAL - ESPECÍFICA PARA TUS DATOS
     query = """
     SELECT 
@@ -122,75 +138,56 @@ def load_hotel_data():
     ORDER BY r.fecha_reserva DESC
     """
     
+    return cargar_reservas(engine, query, TIPOS_HOTEL, texto_vacio='No especificado',
+                           columnas_numericas=COLUMNAS_NUMERICAS + ['duracion_estadia', 'ingreso_por_noche'],
+                           metricas_extra=True)
+
+@st.cache_resource
+def get_snapshot(_engine):
+    """Datos del hotel compartidos por todas las sesiones (y entre procesos) y recargados cuando cambian sus tablas."""
+    return snapshot_vigilado(lambda: load_hotel_data(_engine), _engine, clave="hotel_reservas")
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_habitaciones(_engine, cargado_en):
+    """Inventario de habitaciones (las disponibles para la ocupación); se relee con cada snapshot."""
+    query = """
+    SELECT h.id_habitacion, h.piso, th.descripcion AS tipo_habitacion
+    FROM habitacion h
+    LEFT JOIN tipo_habitacion th ON h.id_tipo_habitacion = th.id_tipo_habitacion
+    """
     try:
-        df = pd.read_sql(query, engine)
-        
-        # PROCESAMIENTO DE DATOS
-        if not df.empty:
-            # Conversión de fechas
-            date_cols = ['fecha_reserva', 'check_in', 'check_out', 'fecha_pago', 'fecha_vencimiento']
-            for col in date_cols:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            # Calcular duración de estadía
-            if 'check_in' in df.columns and 'check_out' in df.columns:
-                df['duracion_estadia'] = (df['check_out'] - df['check_in']).dt.days
-                df['duracion_estadia'] = df['duracion_estadia'].fillna(0).astype(int)
-            
-            # Columnas derivadas de fecha
-            if 'fecha_reserva' in df.columns:
-                df['anio'] = df['fecha_reserva'].dt.year
-                df['mes'] = df['fecha_reserva'].dt.month
-                df['dia'] = df['fecha_reserva'].dt.day
-                df['mes_anio'] = df['fecha_reserva'].dt.to_period('M').astype(str)
-                df['dia_semana'] = df['fecha_reserva'].dt.day_name()
-                df['semana'] = df['fecha_reserva'].dt.isocalendar().week
-            
-            # Calcular monto neto (considerando descuentos)
-            df['descuento_factura'] = df['descuento_factura'].fillna(0)
-            df['porcentaje_descuento'] = df['porcentaje_descuento'].fillna(0)
-            
-            if 'monto_total' in df.columns:
-                df['monto_neto'] = df['monto_total']
-                # Aplicar descuentos
-                df['descuento_total'] = df['descuento_factura'] + (df['monto_total'] * df['porcentaje_descuento'] / 100)
-                df['monto_neto'] = df['monto_total'] - df['descuento_total']
-                
-                # Agregar precio de servicios
-                if 'precio_servicio' in df.columns:
-                    df['monto_neto'] = df['monto_neto'] + df['precio_servicio'].fillna(0)
-            
-            # Calcular ingresos por noche
-            df['ingreso_por_noche'] = df['monto_neto'] / df['duracion_estadia'].replace(0, 1)
-            
-            # Categorías
-            df['categoria_cliente'] = pd.cut(
-                df['monto_neto'],
-                bins=[0, 200, 350, 500, float('inf')],
-                labels=['Económico', 'Estándar', 'Premium', 'Lujo']
-            )
-            
-            # Limpieza de valores nulos
-            text_cols = ['estado_reserva', 'localizacion_reserva', 'nombre_cliente', 
-                        'tipo_habitacion', 'servicio_especial', 'estado_pago', 
-                        'metodo_pago', 'codigo_promocional']
-            for col in text_cols:
-                if col in df.columns:
-                    df[col] = df[col].fillna('No especificado')
-            
-            # Valores numéricos
-            num_cols = ['monto_total', 'monto_neto', 'precio_unitario', 'precio_habitacion', 
-                       'precio_servicio', 'cantidad_personas', 'duracion_estadia', 'ingreso_por_noche']
-            for col in num_cols:
-                if col in df.columns:
-                    df[col] = df[col].fillna(0).astype(float)
-        
-        return df
-    
-    except Exception as e:
-        st.error(f"Error al cargar datos: {str(e)}")
-        return pd.DataFrame()
+        return leer_sql(query, _engine, tipos={'tipo_habitacion': 'categoria'})
+    except Exception:
+        return None
+
+@st.cache_resource(max_entries=8)
+def get_agregados_clientes(filtros):
+    """Acumulados por cliente de una combinación de filtros; duran entre snapshots."""
+    return AgregadosClientes()
+
+def get_clientes(cargado_en, filtros, df_filtrado):
+    """
+    Acumulados por cliente de las reservas filtradas: con un snapshot nuevo
+    solo se suman las filas que no estaban en el anterior.
+    """
+    clientes = get_agregados_clientes(filtros)
+    clientes.sincronizar(df_filtrado, cargado_en)
+    return clientes
+
+@st.cache_resource(max_entries=2)
+def get_disponibilidad(cargado_en, _df, _inventario):
+    """Índice de habitaciones ocupadas del snapshot identificado por `cargado_en`."""
+    return IndiceDisponibilidad(_df, _inventario)
+
+@st.cache_resource(max_entries=2)
+def get_conteos(cargado_en, _df):
+    """Bocetos HyperLogLog por día de reservas y clientes del snapshot `cargado_en`."""
+    return ConteosDistintos(_df)
+
+@st.cache_resource(max_entries=2)
+def get_cuantiles(cargado_en, _df):
+    """Bocetos por día de noches, ingreso por noche y monto neto (y montos por categoría) del snapshot `cargado_en`."""
+    return CuantilesPorPeriodo(_df, rangos={'monto_neto': BINS_CATEGORIA})
 
 # ============================================================================
 # FUNCIONES AUXILIARES
@@ -210,41 +207,6 @@ def format_number(value):
     """Formatea un número con separadores."""
     return f"{value:,.0f}"
 
-# ============================================================================
-# FUNCIÓN DE FILTRADO
-# ============================================================================
-def aplicar_filtros(df, filtros):
-    """Aplica todos los filtros seleccionados."""
-    df_filtrado = df.copy()
-    
-    # Filtro por fechas
-    if filtros['fecha_inicio'] and filtros['fecha_fin']:
-        mask = (df_filtrado['fecha_reserva'].dt.date >= filtros['fecha_inicio']) & \
-               (df_filtrado['fecha_reserva'].dt.date <= filtros['fecha_fin'])
-        df_filtrado = df_filtrado[mask]
-    
-    # Filtro por estado de reserva
-    if filtros['estados_reserva']:
-        df_filtrado = df_filtrado[df_filtrado['estado_reserva'].isin(filtros['estados_reserva'])]
-    
-    # Filtro por tipo de habitación
-    if filtros['tipos_habitacion']:
-        df_filtrado = df_filtrado[df_filtrado['tipo_habitacion'].isin(filtros['tipos_habitacion'])]
-    
-    # Filtro por ubicación
-    if filtros['ubicaciones']:
-        df_filtrado = df_filtrado[df_filtrado['localizacion_reserva'].isin(filtros['ubicaciones'])]
-    
-    # Filtro por servicios
-    if filtros['servicios']:
-        df_filtrado = df_filtrado[df_filtrado['servicio_especial'].isin(filtros['servicios'])]
-    
-    # Filtro por método de pago
-    if filtros['metodos_pago']:
-        df_filtrado = df_filtrado[df_filtrado['metodo_pago'].isin(filtros['metodos_pago'])]
-    
-    return df_filtrado
-
 # ============================================================================
 # INTERFAZ PRINCIPAL
 # ============================================================================
@@ -260,8 +222,18 @@ def main():
     if engine is None:
         st.stop()
     
+    # Solo la primera carga del proceso espera a la base de datos
+    snapshot = get_snapshot(engine)
     with st.spinner("📊 Cargando datos del hotel..."):
-        df = load_hotel_data()
+        df, cargado_en = snapshot.obtener()
+    
+    if df is None:
+        st.error(f"Error al cargar datos: {str(snapshot.error)}")
+        df = pd.DataFrame()
+    else:
+        if snapshot.error is not None:
+            st.warning(f"⚠️ No se pudieron actualizar los datos, se muestran los de {formatear_edad(snapshot.edad())}: {snapshot.error}")
+        st.caption(f"🕒 Datos actualizados {formatear_edad(snapshot.edad())}")
     
     if df.empty:
         st.warning("⚠️ No se encontraron datos en la base de datos.")
@@ -344,6 +316,14 @@ def main():
             options=metodos_opciones
         )
         
+        calculos_exactos = st.checkbox(
+            "Cálculos exactos",
+            value=False,
+            help="Reservas, clientes únicos y distribuciones calculados sobre las filas "
+                 "filtradas en lugar de estimarlos con los bocetos por día "
+                 "(error típico ~2% en conteos y ~1% en percentiles)."
+        )
+        
         # BOTÓN DE APLICAR FILTROS
         st.markdown("---")
         aplicar_filtros_btn = st.button("✅ Aplicar Filtros", type="primary", use_container_width=True)
@@ -362,24 +342,47 @@ def main():
         'metodos_pago': metodos_pago
     }
     
-    df_filtrado = aplicar_filtros(df, filtros)
+    seleccion = {
+        'estado_reserva': filtros['estados_reserva'],
+        'tipo_habitacion': filtros['tipos_habitacion'],
+        'localizacion_reserva': filtros['ubicaciones'],
+        'servicio_especial': filtros['servicios'],
+        'metodo_pago': filtros['metodos_pago'],
+    }
+    df_filtrado = filtrar_reservas(df, filtros['fecha_inicio'], filtros['fecha_fin'], **seleccion)
     
     if df_filtrado.empty:
         st.warning("⚠️ No hay datos que coincidan con los filtros seleccionados.")
         st.info("Intenta ajustar los filtros o verifica los datos en la base de datos.")
         st.stop()
     
+    # OCUPACIÓN: noches del rango elegido, con las estadías de todas las
+    # reservas que cumplen los demás filtros (aunque se hayan hecho antes)
+    inventario = load_habitaciones(engine, cargado_en)
+    if inventario is not None and filtros['tipos_habitacion']:
+        inventario = inventario[inventario['tipo_habitacion'].isin(filtros['tipos_habitacion'])]
+    ocupacion = MatrizOcupacion(
+        filtrar_reservas(df, **seleccion), filtros['fecha_inicio'], filtros['fecha_fin'], inventario=inventario
+    )
+    resumen_ocupacion = ocupacion.resumen()
+    
     # ============================================================================
     # SECCIÓN 1: KPI PRINCIPALES
     # ============================================================================
     st.header("📊 Indicadores Clave de Desempeño (KPI)")
     
     # Calcular métricas
-    total_reservas = df_filtrado['id_reserva'].nunique()
+    conteos = None if calculos_exactos else get_conteos(cargado_en, df)
+    rango = (filtros['fecha_inicio'], filtros['fecha_fin'])
+    total_reservas, reservas_aprox = contar_distintos(
+        conteos, df_filtrado, 'id_reserva', *rango, exactos=calculos_exactos, **seleccion
+    )
     total_ingresos = df_filtrado['monto_neto'].sum()
     ingreso_promedio = df_filtrado['monto_neto'].mean() if total_reservas > 0 else 0
     ocupacion_promedio = df_filtrado['duracion_estadia'].mean() if 'duracion_estadia' in df_filtrado.columns else 0
-    clientes_unicos = df_filtrado['id_cliente'].nunique()
+    clientes_unicos, clientes_aprox = contar_distintos(
+        conteos, df_filtrado, 'id_cliente', *rango, exactos=calculos_exactos, **seleccion
+    )
     tasa_confirmacion = (df_filtrado['estado_reserva'] == 'confirmada').sum() / total_reservas * 100 if total_reservas > 0 else 0
     
     # Mostrar KPIs en columnas
@@ -389,7 +392,7 @@ def main():
         create_kpi_card("💰 Ingresos Totales", format_currency(total_ingresos))
     
     with col2:
-        create_kpi_card("📋 Reservas Totales", format_number(total_reservas))
+        create_kpi_card("📋 Reservas Totales", ("≈ " if reservas_aprox else "") + format_number(total_reservas))
     
     with col3:
         create_kpi_card("📈 Reserva Promedio", format_currency(ingreso_promedio))
@@ -400,7 +403,7 @@ def main():
     col5, col6, col7, col8 = st.columns(4)
     
     with col5:
-        create_kpi_card("👥 Clientes Únicos", format_number(clientes_unicos))
+        create_kpi_card("👥 Clientes Únicos", ("≈ " if clientes_aprox else "") + format_number(clientes_unicos))
     
     with col6:
         create_kpi_card("✅ Tasa de Confirmación", f"{tasa_confirmacion:.1f}%")
@@ -410,8 +413,7 @@ def main():
         create_kpi_card("⭐ Servicios Utilizados", format_number(servicios_utilizados))
     
     with col8:
-        habitaciones_utilizadas = df_filtrado['id_habitacion'].nunique()
-        create_kpi_card("🛏️ Habitaciones Ocupadas", format_number(habitaciones_utilizadas))
+        create_kpi_card("🛏️ Ocupación", f"{resumen_ocupacion['tasa']:.1f}%")
     
     st.markdown("---")
     
@@ -421,8 +423,10 @@ def main():
     st.header("📈 Análisis Visual")
     
     # PESTAÑAS PARA DIFERENTES ANÁLISIS
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab1, tab_ocupacion, tab_disponibilidad, tab2, tab3, tab4, tab5 = st.tabs([
         "📅 Análisis Temporal", 
+        "🏨 Ocupación", 
+        "🔑 Disponibilidad", 
         "🛏️ Habitaciones y Servicios", 
         "👥 Clientes y Pagos", 
         "📊 Distribuciones", 
@@ -469,6 +473,89 @@ def main():
                 )
                 st.plotly_chart(fig2, use_container_width=True)
     
+    with tab_ocupacion:
+        st.caption("Noches ocupadas del rango elegido (check_in ≤ noche < check_out) sobre las habitaciones disponibles")
+        col_o1, col_o2, col_o3, col_o4 = st.columns(4)
+        with col_o1:
+            create_kpi_card("🌙 Noches Vendidas", format_number(resumen_ocupacion['ocupadas']))
+        with col_o2:
+            create_kpi_card("🛏️ Ocupación", f"{resumen_ocupacion['tasa']:.1f}%")
+        with col_o3:
+            create_kpi_card("💵 ADR", format_currency(resumen_ocupacion['adr']))
+        with col_o4:
+            create_kpi_card("📊 RevPAR", format_currency(resumen_ocupacion['revpar']))
+        
+        col_sel1, col_sel2 = st.columns(2)
+        with col_sel1:
+            agrupar = st.selectbox("Agrupar por:", ["Total", "piso", "tipo_habitacion"], key="ocupacion_por")
+        with col_sel2:
+            frecuencia = st.selectbox("Periodo:", list(FRECUENCIAS), index=1, key="ocupacion_frecuencia")
+        por = None if agrupar == "Total" else agrupar
+        
+        # GRÁFICO: TASA DE OCUPACIÓN EN EL TIEMPO
+        serie_ocupacion = ocupacion.serie(por, FRECUENCIAS[frecuencia])
+        fig_ocupacion = px.line(
+            serie_ocupacion,
+            x='noche',
+            y='tasa',
+            color=por or 'grupo',
+            title='Tasa de Ocupación',
+            labels={'tasa': 'Ocupación (%)', 'noche': 'Periodo'},
+            markers=frecuencia != "Día"
+        )
+        st.plotly_chart(fig_ocupacion, use_container_width=True)
+        
+        # MAPA DE CALOR: OCUPACIÓN POR PISO O TIPO Y PERIODO
+        mapa_ocupacion = ocupacion.mapa(por or 'piso', FRECUENCIAS[frecuencia])
+        if not mapa_ocupacion.empty:
+            fig_mapa = px.imshow(
+                mapa_ocupacion,
+                labels={'x': 'Periodo', 'y': por or 'piso', 'color': 'Ocupación (%)'},
+                title=f'Ocupación por {por or "piso"}',
+                color_continuous_scale='YlOrRd',
+                aspect='auto'
+            )
+            st.plotly_chart(fig_mapa, use_container_width=True)
+    
+    with tab_disponibilidad:
+        # Disponibilidad real del hotel: usa todas las reservas, no los filtros
+        st.subheader("🔑 Habitaciones Libres")
+        indice = get_disponibilidad(cargado_en, df, load_habitaciones(engine, cargado_en))
+        
+        hoy = datetime.now().date()
+        col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+        with col_a1:
+            llegada = st.date_input("Llegada:", hoy, key="disp_llegada")
+        with col_a2:
+            salida = st.date_input("Salida:", hoy + timedelta(days=1), key="disp_salida")
+        with col_a3:
+            tipos_disp = st.multiselect(
+                "Tipo de habitación:",
+                sorted(indice.habitaciones['tipo_habitacion'].dropna().unique().tolist())
+                if 'tipo_habitacion' in indice.habitaciones.columns else [],
+                key="disp_tipos"
+            )
+        with col_a4:
+            pisos_disp = st.multiselect(
+                "Piso:",
+                sorted(indice.habitaciones['piso'].dropna().unique().tolist())
+                if 'piso' in indice.habitaciones.columns else [],
+                key="disp_pisos"
+            )
+        
+        if salida <= llegada:
+            st.warning("⚠️ La salida debe ser posterior a la llegada.")
+        else:
+            inicio_consulta = time.perf_counter()
+            libres = indice.libres(llegada, salida, tipo_habitacion=tipos_disp, piso=pisos_disp)
+            duracion_consulta = time.perf_counter() - inicio_consulta
+            total_seleccion = len(libres) + len(indice.ocupadas(llegada, salida, tipo_habitacion=tipos_disp, piso=pisos_disp))
+            
+            create_kpi_card("🛏️ Libres", f"{len(libres)} de {total_seleccion}")
+            st.caption(f"Consulta sobre {len(indice):,} intervalos ocupados en {duracion_consulta * 1e6:,.0f} µs "
+                       f"({(salida - llegada).days} noches)")
+            st.dataframe(libres, use_container_width=True, hide_index=True)
+    
     with tab2:
         col_h1, col_h2 = st.columns(2)
         
@@ -513,17 +600,17 @@ def main():
         with col_c1:
             # GRÁFICO 5: TOP CLIENTES POR CONSUMO
             st.subheader("👑 Top 10 Clientes por Consumo")
-            if 'nombre_cliente' in df_filtrado.columns:
-                top_clientes = df_filtrado.groupby('nombre_cliente')['monto_neto'].sum().reset_index()
-                top_clientes = top_clientes.sort_values('monto_neto', ascending=False).head(10)
+            if 'id_cliente' in df_filtrado.columns:
+                clientes = get_clientes(cargado_en, repr(filtros), df_filtrado)
+                top_clientes = clientes.top(10)
                 
                 fig5 = px.bar(
                     top_clientes,
-                    x='nombre_cliente',
-                    y='monto_neto',
+                    x='etiqueta',
+                    y='gasto',
                     title='Clientes con Mayor Consumo',
-                    labels={'monto_neto': 'Consumo Total ($)', 'nombre_cliente': 'Cliente'},
-                    color='monto_neto',
+                    labels={'gasto': 'Consumo Total ($)', 'etiqueta': 'Cliente'},
+                    color='gasto',
                     color_continuous_scale='sunset'
                 )
                 fig5.update_layout(xaxis_tickangle=-45)
@@ -544,20 +631,58 @@ def main():
                     hole=0.3
                 )
                 st.plotly_chart(fig6, use_container_width=True)
+        
+        # FICHA DE CLIENTE: sale de los acumulados, sin recorrer las reservas
+        if 'id_cliente' in df_filtrado.columns and len(clientes) > 0:
+            st.subheader("🧾 Ficha de Cliente")
+            col_f1, col_f2 = st.columns([1, 3])
+            with col_f1:
+                metrica_top = st.selectbox("Ordenar por:", ["gasto", "estadias", "noches"], key="ficha_orden")
+                candidatos = clientes.top(50, por=metrica_top)
+                elegido = st.selectbox(
+                    "Cliente:",
+                    candidatos['id_cliente'].tolist(),
+                    format_func=dict(zip(candidatos['id_cliente'], candidatos['etiqueta'])).get,
+                    key="ficha_cliente"
+                )
+            with col_f2:
+                ficha = clientes.cliente(elegido)
+                col_k1, col_k2, col_k3, col_k4 = st.columns(4)
+                with col_k1:
+                    create_kpi_card("💰 Gasto Total", format_currency(ficha['gasto']))
+                with col_k2:
+                    create_kpi_card("📋 Estadías", format_number(ficha['estadias']))
+                with col_k3:
+                    create_kpi_card("🌙 Noches", format_number(ficha['noches']))
+                with col_k4:
+                    create_kpi_card("💵 Gasto por Noche", format_currency(ficha['gasto_por_noche']))
+                ultima = ficha['ultima_visita']
+                st.write(f"**Última visita:** {ultima.date() if pd.notna(ultima) else 'sin datos'} · "
+                         f"**Tipo preferido:** {ficha['tipo_preferido'] or 'sin datos'}")
+                if ficha['noches_por_tipo']:
+                    st.bar_chart(pd.Series(ficha['noches_por_tipo'], name='Noches'))
     
     with tab4:
+        # Distribuciones desde los bocetos por día (o las filas, en modo exacto)
+        cuantiles = None if calculos_exactos else get_cuantiles(cargado_en, df)
+        distribuciones = {
+            columna: distribucion_de(cuantiles, df_filtrado, columna, *rango, exactos=calculos_exactos, **seleccion)
+            for columna in ['duracion_estadia', 'ingreso_por_noche', 'monto_neto']
+            if columna in df_filtrado.columns
+        }
         col_d1, col_d2 = st.columns(2)
         
         with col_d1:
             # GRÁFICO 7: DISTRIBUCIÓN DE ESTADÍA
             st.subheader("📅 Distribución de Duración de Estadía")
-            if 'duracion_estadia' in df_filtrado.columns:
-                fig7 = px.histogram(
-                    df_filtrado,
-                    x='duracion_estadia',
-                    nbins=20,
+            if 'duracion_estadia' in distribuciones:
+                estadias, _ = distribuciones['duracion_estadia']
+                fig7 = px.bar(
+                    estadias.histograma(20),
+                    x='centro',
+                    y='conteo',
                     title='Distribución de Noches por Reserva',
-                    labels={'duracion_estadia': 'Noches de Estadía'},
+                    labels={'centro': 'Noches de Estadía', 'conteo': 'Cantidad'},
                     color_discrete_sequence=['#636efa']
                 )
                 fig7.update_layout(bargap=0.1)
@@ -566,8 +691,11 @@ def main():
         with col_d2:
             # GRÁFICO 8: INGRESOS POR CATEGORÍA DE CLIENTE
             st.subheader("🏷️ Ingresos por Categoría de Cliente")
-            if 'categoria_cliente' in df_filtrado.columns:
-                ingresos_categoria = df_filtrado.groupby('categoria_cliente')['monto_neto'].sum().reset_index()
+            if 'monto_neto' in distribuciones:
+                ingresos_categoria = rangos_de(
+                    cuantiles, df_filtrado, 'monto_neto', BINS_CATEGORIA, CATEGORIAS_CLIENTE, *rango,
+                    exactos=calculos_exactos, **seleccion
+                ).rename(columns={'rango': 'categoria_cliente', 'suma': 'monto_neto'})
                 
                 fig8 = px.bar(
                     ingresos_categoria,
@@ -579,6 +707,23 @@ def main():
                     color_discrete_sequence=px.colors.qualitative.Set3
                 )
                 st.plotly_chart(fig8, use_container_width=True)
+        
+        # PERCENTILES
+        if distribuciones:
+            st.subheader("📐 Percentiles")
+            percentiles = pd.DataFrame({
+                columna: distribucion.percentiles((25, 50, 75, 90, 99))
+                for columna, (distribucion, _) in distribuciones.items()
+            }).T
+            percentiles.index = percentiles.index.map({
+                'duracion_estadia': 'Noches de estadía',
+                'ingreso_por_noche': 'Ingreso por noche ($)',
+                'monto_neto': 'Monto neto ($)',
+            })
+            st.dataframe(percentiles.round(2), use_container_width=True)
+            if any(aproximada for _, aproximada in distribuciones.values()):
+                st.caption("Valores estimados con bocetos por día (error relativo ~1%). "
+                           "Active *Cálculos exactos* en la barra lateral para calcularlos sobre las filas.")
     
     with tab5:
         # TABLA DE DATOS DETALLADOS
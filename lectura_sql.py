@@ -0,0 +1,243 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# LECTURA DE CONSULTAS A DATAFRAME
+# ============================================================
+# Backends en orden de preferencia para backend="auto". Los dos primeros
+# leen en formato columnar (Arrow) sin crear un objeto Python por valor;
+# "numpy" llena un arreglo por columna desde el cursor DBAPI sin pasar por
+# las filas de SQLAlchemy; "pandas" es pd.read_sql de siempre.
+BACKENDS = ("connectorx", "adbc", "numpy", "pandas")
+BACKEND = "auto"
+
+# Nombre del driver ADBC de MySQL para el driver manager
+DRIVER_ADBC = "mysql"
+
+# Filas por lote al leer con el backend numpy
+TAMANO_LOTE = 5000
+
+# Tipos que se pueden declarar por columna en leer_sql(tipos=...):
+#   "float"     DECIMAL/dinero como float64
+#   "centavos"  dinero como entero de centavos (Int64, admite nulos)
+#   "entero"    Int64 (admite nulos de los LEFT JOIN)
+#   "fecha"     datetime64
+#   "categoria" enums y textos repetidos como category
+TIPOS = ("float", "centavos", "entero", "fecha", "categoria")
+
+
+class BackendNoSoportado(Exception):
+    """El backend no puede ejecutar esta consulta (leer_sql prueba el siguiente)."""
+
+
+def _es_uri_o_engine(fuente):
+    """True para una URI o un Engine de SQLAlchemy (sqlalchemy se importa solo si hace falta)."""
+    return isinstance(fuente, str) or hasattr(fuente, "raw_connection")
+
+
+@lru_cache(maxsize=8)
+def _engine(uri):
+    """Engine de SQLAlchemy por URI, creado una vez por proceso (con su pool)."""
+    from sqlalchemy import create_engine
+
+    return create_engine(uri)
+
+
+def _uri_arrow(uri):
+    """URI sin el driver de Python (mysql://...), que es la que esperan connectorx y ADBC."""
+    from sqlalchemy.engine import make_url
+
+    url = make_url(uri) if isinstance(uri, str) else uri.url
+    return url.set(drivername=url.get_backend_name()).render_as_string(hide_password=False)
+
+
+def _arrow_a_pandas(tabla):
+    """Tabla Arrow a DataFrame con DECIMAL como float64 y fechas como datetime64."""
+    import pyarrow as pa
+
+    for i, campo in enumerate(tabla.schema):
+        if pa.types.is_decimal(campo.type):
+            tabla = tabla.set_column(i, campo.name, tabla.column(i).cast(pa.float64()))
+    return tabla.to_pandas(date_as_object=False)
+
+
+def _leer_connectorx(consulta, uri, params):
+    if params:
+        raise BackendNoSoportado("connectorx no admite parámetros")
+    import connectorx as cx
+
+    return _arrow_a_pandas(cx.read_sql(_uri_arrow(uri), consulta, return_type="arrow"))
+
+
+def _leer_adbc(consulta, uri, params):
+    from adbc_driver_manager import dbapi
+
+    with dbapi.connect(driver=DRIVER_ADBC, db_kwargs={"uri": _uri_arrow(uri)}) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(consulta, params)
+            return _arrow_a_pandas(cursor.fetch_arrow_table())
+
+
+def _columna_numpy(valores):
+    """
+    Convierte una columna (arreglo object) según el tipo del primer valor no
+    nulo: números (incluido Decimal) a int64/float64, fechas a datetime64 y
+    el resto queda como object.
+    """
+    nulos = np.equal(valores, None)
+    if nulos.all():
+        return valores
+    muestra = valores[np.argmin(nulos)]
+    if isinstance(muestra, (str, bytes, bytearray, bool, np.bool_)):
+        return valores
+    try:
+        if hasattr(muestra, "year"):
+            return pd.to_datetime(valores).to_numpy()
+        if isinstance(muestra, (int, np.integer)) and not nulos.any():
+            return valores.astype(np.int64)
+        numeros = np.full(len(valores), np.nan)
+        numeros[~nulos] = valores[~nulos].astype(np.float64)
+        return numeros
+    except (TypeError, ValueError, OverflowError):
+        return valores
+
+
+def convertir_columna(serie, tipo):
+    """Convierte una columna al tipo declarado (ver TIPOS)."""
+    if tipo == "float":
+        return pd.to_numeric(serie, errors="coerce").astype(np.float64)
+    if tipo == "centavos":
+        return (pd.to_numeric(serie, errors="coerce") * 100).round().astype("Int64")
+    if tipo == "entero":
+        return pd.to_numeric(serie, errors="coerce").astype("Int64")
+    if tipo == "fecha":
+        return pd.to_datetime(serie, errors="coerce")
+    if tipo == "categoria":
+        return serie.astype("category")
+    raise ValueError(f"Tipo desconocido: {tipo}")
+
+
+def aplicar_tipos(df, tipos):
+    """Aplica el mapa {columna: tipo} a las columnas presentes en df."""
+    for columna, tipo in (tipos or {}).items():
+        if columna in df.columns:
+            df[columna] = convertir_columna(df[columna], tipo)
+    return df
+
+
+def rellenar(serie, valor):
+    """fillna que también funciona con columnas category (agrega `valor` como categoría)."""
+    if not serie.hasnans:
+        return serie
+    if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
+
+
+def quitar_categorias_sin_uso(df):
+    """Quita de las columnas category las categorías que ya no aparecen tras filtrar."""
+    for columna in df.select_dtypes(include="category").columns:
+        df[columna] = df[columna].cat.remove_unused_categories()
+    return df
+
+
+def _leer_numpy(consulta, conn, params, opciones_cursor=None, tamano_lote=TAMANO_LOTE, tipos=None):
+    """
+    Lee por lotes desde un cursor DBAPI copiando cada lote a un bloque NumPy
+    (filas x columnas) y convierte cada columna una sola vez al final. Las
+    columnas con tipo declarado se convierten directo a ese tipo.
+    """
+    cursor = conn.cursor(**(opciones_cursor or {}))
+    try:
+        cursor.execute(consulta, params or ())
+        columnas = [col[0] for col in cursor.description]
+        bloques = []
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            bloque = np.empty((len(lote), len(columnas)), dtype=object)
+            bloque[:] = lote
+            bloques.append(bloque)
+    finally:
+        cursor.close()
+    datos = np.concatenate(bloques) if bloques else np.empty((0, len(columnas)), dtype=object)
+    tipos = tipos or {}
+    return pd.DataFrame({
+        col: convertir_columna(pd.Series(datos[:, j], dtype=object), tipos[col]) if col in tipos
+        else _columna_numpy(datos[:, j])
+        for j, col in enumerate(columnas)
+    }, columns=columnas)
+
+
+def _leer_pandas(consulta, fuente, params):
+    if _es_uri_o_engine(fuente):
+        return pd.read_sql(consulta, _engine(fuente) if isinstance(fuente, str) else fuente, params=params)
+    cursor = fuente.cursor()
+    try:
+        cursor.execute(consulta, params or ())
+        columnas = [col[0] for col in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columnas, coerce_float=True)
+    finally:
+        cursor.close()
+
+
+def leer_sql(consulta, fuente, params=None, backend=None, uri=None, opciones_cursor=None,
+             tamano_lote=TAMANO_LOTE, tipos=None):
+    """
+    Ejecuta `consulta` y devuelve un DataFrame usando el backend más rápido
+    disponible; si uno no está instalado (ImportError) o no admite la
+    consulta (BackendNoSoportado) se prueba el siguiente, y pd.read_sql
+    siempre queda como último recurso. Cualquier otro error se relanza.
+
+    `fuente` puede ser una URI, un Engine de SQLAlchemy o una conexión DBAPI
+    abierta (no se cierra). Con una conexión DBAPI los backends Arrow solo se
+    usan si se pasa `uri`. El backend usado queda en df.attrs["backend"].
+
+    `tipos` es un mapa {columna: tipo} (ver TIPOS) que se aplica al leer, de
+    modo que dinero, fechas y enums nunca quedan como columnas object.
+    """
+    backend = backend or BACKEND
+    if backend == "auto":
+        candidatos = BACKENDS
+    elif backend in BACKENDS:
+        candidatos = (backend, "pandas") if backend != "pandas" else ("pandas",)
+    else:
+        raise ValueError(f"Backend desconocido: {backend}")
+
+    if uri is None and _es_uri_o_engine(fuente):
+        uri = fuente
+
+    error = None
+    for nombre in candidatos:
+        try:
+            if nombre == "connectorx" and uri is not None:
+                df = _leer_connectorx(consulta, uri, params)
+            elif nombre == "adbc" and uri is not None:
+                df = _leer_adbc(consulta, uri, params)
+            elif nombre == "numpy":
+                if _es_uri_o_engine(fuente):
+                    engine = _engine(fuente) if isinstance(fuente, str) else fuente
+                    conn = engine.raw_connection()
+                    try:
+                        df = _leer_numpy(consulta, conn, params, opciones_cursor, tamano_lote, tipos)
+                    finally:
+                        conn.close()
+                else:
+                    df = _leer_numpy(consulta, fuente, params, opciones_cursor, tamano_lote, tipos)
+            elif nombre == "pandas":
+                df = _leer_pandas(consulta, fuente, params)
+            else:
+                continue
+        except (ImportError, BackendNoSoportado) as e:
+            # Backend no instalado o sin soporte para la consulta: se prueba
+            # el siguiente (errores de la base o de la consulta se relanzan)
+            error = e
+            continue
+        if nombre != "numpy":
+            aplicar_tipos(df, tipos)
+        df.attrs["backend"] = nombre
+        return df
+    raise error
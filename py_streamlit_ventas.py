@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-from sqlalchemy import create_engine, text
 from datetime import datetime, timedelta
 
+from config_db import cargar_uri
+from hotel import cargar_reservas, conectar, filtrar_reservas, rango_fechas
+from hotel.clientes import AgregadosClientes
+from hotel.cuantiles import CuantilesPorPeriodo, distribucion_de
+from hotel.distintos import ConteosDistintos, contar_distintos
+from hotel.graficos import px
+from hotel.refresco import formatear_edad, snapshot_vigilado
+
 # ============================================================
 # CONFIGURACIÓN DE LA PÁGINA
 # ============================================================
@@ -15,31 +20,38 @@ st.set_page_config(
 )
 
 # CADENA DE CONEXIÓN CORRECTA PARA TU MYSQL LOCAL
-DEFAULT_DB_URI = "mysql+pymysql://root:@localhot:3306/proyecto"
+# (diagnostico.py guarda la URI que funciona en db_config.json)
+DEFAULT_DB_URI = cargar_uri("mysql+pymysql://root:@localhot:3306/proyecto")
 
 # ============================================================
 # FUNCIÓN DE CONEXIÓN
 # ============================================================
 def get_engine(db_uri):
     """Crea un engine SQLAlchemy."""
-    try:
-        engine = create_engine(db_uri)
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        st.success("✅ Conectado a la base de datos")
-        return engine
-    except Exception as e:
-        st.error(f"❌ Error conectando a la base de datos:\n{e}")
+    engine, error = conectar(db_uri)
+    if engine is None:
+        st.error(f"❌ Error conectando a la base de datos:\n{error}")
         return None
+    st.success("✅ Conectado a la base de datos")
+    return engine
 
 # ============================================================
 # CARGA DE DATOS - ADAPTADA A TABLAS HOTELERAS
 # ============================================================
-@st.cache_data(ttl=600)
+# Tipos aplicados al leer: dinero (DECIMAL) como float64, fechas como
+# datetime64 y enums como category; así nada queda en columnas object
+TIPOS_HOTEL = {
+    'monto_total': 'float', 'precio_unitario': 'float', 'precio_habitacion': 'float',
+    'precio_servicio': 'float', 'monto_pago': 'float', 'porcentaje_descuento': 'float',
+    'fecha_reserva': 'fecha', 'check_in': 'fecha', 'check_out': 'fecha',
+    'fecha_pago': 'fecha', 'fecha_vencimiento': 'fecha',
+    'estado_reserva': 'categoria', 'localizacion_reserva': 'categoria',
+    'tipo_habitacion': 'categoria', 'servicio_especial': 'categoria',
+    'estado_pago': 'categoria', 'metodo_pago': 'categoria',
+}
+
 def load_hotel_data(db_uri):
-    """Carga datos desde la base de datos hotelera."""
-    engine = create_engine(db_uri)
-    
+    """Carga datos desde la base de datos hotelera (lanza la excepción si falla)."""
     # CONSULTA PRINCIPAL PARA EL HOTEL
     query = """
     SELECT 
@@ -119,104 +131,36 @@ def load_hotel_data(db_uri):
     LIMIT 1000
     """
     
-    try:
-        df = pd.read_sql(query, engine)
-    except Exception as e:
-        st.error(f"Error en la consulta: {e}")
-        return pd.DataFrame()
-    
-    # CONVERSIÓN DE FECHAS
-    date_columns = ['fecha_reserva', 'check_in', 'check_out', 'fecha_pago', 'fecha_vencimiento']
-    for col in date_columns:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-    
-    # CALCULAR DURACIÓN DE ESTADÍA
-    if 'check_in' in df.columns and 'check_out' in df.columns:
-        df['duracion_estadia'] = (df['check_out'] - df['check_in']).dt.days
-        df['duracion_estadia'] = df['duracion_estadia'].fillna(0).astype(int)
-    
-    # COLUMNAS DERIVADAS DE FECHA
-    if 'fecha_reserva' in df.columns:
-        df['anio'] = df['fecha_reserva'].dt.year
-        df['mes'] = df['fecha_reserva'].dt.month
-        df['dia'] = df['fecha_reserva'].dt.day
-        df['mes_anio'] = df['fecha_reserva'].dt.to_period('M').astype(str)
-        df['dia_semana'] = df['fecha_reserva'].dt.day_name()
-    
-    # CALCULAR MONTO NETO (considerando descuentos)
-    if 'monto_total' in df.columns and 'porcentaje_descuento' in df.columns:
-        df['porcentaje_descuento'] = df['porcentaje_descuento'].fillna(0)
-        df['descuento'] = df['monto_total'] * (df['porcentaje_descuento'] / 100)
-        df['monto_neto'] = df['monto_total'] - df['descuento']
-    elif 'monto_total' in df.columns:
-        df['monto_neto'] = df['monto_total']
-    else:
-        df['monto_neto'] = 0
-    
-    # AGREGAR PRECIO SERVICIO SI EXISTE
-    if 'precio_servicio' in df.columns:
-        df['monto_neto'] = df['monto_neto'] + df['precio_servicio'].fillna(0)
-    
-    # LIMPIEZA DE VALORES NULOS
-    text_columns = ['estado_reserva', 'localizacion_reserva', 'nombre', 
-                   'tipo_habitacion', 'servicio_especial', 'estado_pago', 
-                   'metodo_pago', 'codigo_promocional']
-    
-    for col in text_columns:
-        if col in df.columns:
-            df[col] = df[col].fillna('Sin especificar')
-    
-    # VALORES NUMÉRICOS
-    numeric_columns = ['monto_total', 'monto_neto', 'precio_unitario', 
-                      'precio_habitacion', 'precio_servicio', 'cantidad_personas']
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = df[col].fillna(0).astype(float)
-    
-    return df
+    return cargar_reservas(db_uri, query, TIPOS_HOTEL, texto_vacio='Sin especificar')
 
-# ============================================================
-# FUNCIÓN DE FILTRADO PARA HOTEL
-# ============================================================
-def filtrar_hotel(df, fechas, estados_reserva, tipos_habitacion, servicios, metodos_pago):
-    """Filtra reservas hoteleras según criterios."""
-    
-    # Copiar DataFrame
-    df_filtrado = df.copy()
-    
-    # FILTRAR POR FECHAS
-    if isinstance(fechas, (list, tuple)) and len(fechas) == 2:
-        fi, ff = fechas[0], fechas[1]
-    else:
-        if 'fecha_reserva' in df_filtrado.columns:
-            fi = df_filtrado['fecha_reserva'].min().date()
-            ff = df_filtrado['fecha_reserva'].max().date()
-        else:
-            fi = datetime.now().date() - timedelta(days=30)
-            ff = datetime.now().date()
-    
-    if 'fecha_reserva' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['fecha_reserva'].dt.date.between(fi, ff)]
-    
-    # FILTRAR POR ESTADO DE RESERVA
-    if estados_reserva and 'estado_reserva' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['estado_reserva'].isin(estados_reserva)]
-    
-    # FILTRAR POR TIPO DE HABITACIÓN
-    if tipos_habitacion and 'tipo_habitacion' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['tipo_habitacion'].isin(tipos_habitacion)]
-    
-    # FILTRAR POR SERVICIOS ESPECIALES
-    if servicios and 'servicio_especial' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['servicio_especial'].isin(servicios)]
-    
-    # FILTRAR POR MÉTODO DE PAGO
-    if metodos_pago and 'metodo_pago' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['metodo_pago'].isin(metodos_pago)]
-    
-    return df_filtrado
+@st.cache_resource
+def get_snapshot(db_uri, _engine):
+    """Datos del hotel compartidos por todas las sesiones (y entre procesos) y recargados cuando cambian sus tablas."""
+    return snapshot_vigilado(lambda: load_hotel_data(db_uri), _engine, clave="hotel_ventas")
+
+@st.cache_resource(max_entries=8)
+def get_agregados_clientes(filtros):
+    """Acumulados por cliente de una combinación de filtros; duran entre snapshots."""
+    return AgregadosClientes(nombre='nombre_completo')
+
+def get_clientes(cargado_en, filtros, df_filtrado):
+    """
+    Acumulados por cliente de las reservas filtradas: con un snapshot nuevo
+    solo se suman las filas que no estaban en el anterior.
+    """
+    clientes = get_agregados_clientes(filtros)
+    clientes.sincronizar(df_filtrado, cargado_en)
+    return clientes
+
+@st.cache_resource(max_entries=2)
+def get_conteos(cargado_en, _df):
+    """Bocetos HyperLogLog por día de reservas del snapshot `cargado_en`."""
+    return ConteosDistintos(_df, columnas=['id_reserva'])
+
+@st.cache_resource(max_entries=2)
+def get_cuantiles(cargado_en, _df):
+    """Bocetos por día de las noches de estadía del snapshot `cargado_en`."""
+    return CuantilesPorPeriodo(_df, columnas=['duracion_estadia'])
 
 # ============================================================
 # INTERFAZ PRINCIPAL - HOTEL
@@ -228,9 +172,18 @@ engine = get_engine(DEFAULT_DB_URI)
 if engine is None:
     st.stop()
 
-# CARGA DE DATOS
+# CARGA DE DATOS (solo espera la primera carga del proceso)
+snapshot = get_snapshot(DEFAULT_DB_URI, engine)
 with st.spinner("🔄 Cargando datos del hotel..."):
-    df = load_hotel_data(DEFAULT_DB_URI)
+    df, cargado_en = snapshot.obtener()
+
+if df is None:
+    st.error(f"Error en la consulta: {snapshot.error}")
+    df = pd.DataFrame()
+else:
+    if snapshot.error is not None:
+        st.warning(f"⚠️ No se pudieron actualizar los datos, se muestran los de {formatear_edad(snapshot.edad())}: {snapshot.error}")
+    st.caption(f"🕒 Datos actualizados {formatear_edad(snapshot.edad())}")
 
 if df.empty:
     st.warning("⚠️ No se encontraron datos en la base de datos.")
@@ -302,8 +255,21 @@ if 'metodo_pago' in df.columns:
 else:
     metodos_pago = []
 
+calculos_exactos = st.sidebar.checkbox(
+    "Cálculos exactos",
+    help="Reservas y duración de estadías calculadas sobre las filas filtradas en "
+         "lugar de estimarlas con los bocetos por día (error típico ~2% en conteos)."
+)
+
 # APLICAR FILTROS
-df_filtrado = filtrar_hotel(df, fechas, estados_reserva, tipos_habitacion, servicios, metodos_pago)
+fecha_inicio, fecha_fin = rango_fechas(fechas, df)
+df_filtrado = filtrar_reservas(
+    df, fecha_inicio, fecha_fin,
+    estado_reserva=estados_reserva,
+    tipo_habitacion=tipos_habitacion,
+    servicio_especial=servicios,
+    metodo_pago=metodos_pago,
+)
 
 if df_filtrado.empty:
     st.warning("⚠️ No hay reservas que coincidan con los filtros seleccionados.")
@@ -321,8 +287,15 @@ with col1:
     st.metric("💰 Ingresos Totales", f"${total_ventas:,.2f}")
 
 with col2:
-    num_reservas = df_filtrado['id_reserva'].nunique()
-    st.metric("📋 Reservas Totales", num_reservas)
+    num_reservas, aproximado = contar_distintos(
+        None if calculos_exactos else get_conteos(cargado_en, df), df_filtrado, 'id_reserva',
+        fecha_inicio, fecha_fin, exactos=calculos_exactos,
+        estado_reserva=estados_reserva,
+        tipo_habitacion=tipos_habitacion,
+        servicio_especial=servicios,
+        metodo_pago=metodos_pago,
+    )
+    st.metric("📋 Reservas Totales", f"≈ {num_reservas:,}" if aproximado else num_reservas)
 
 with col3:
     if num_reservas > 0:
@@ -453,27 +426,38 @@ with tab3:
     with col_c1:
         if 'nombre_completo' in df_filtrado.columns and 'monto_neto' in df_filtrado.columns:
             st.markdown("### 👑 Top 10 Clientes por Consumo")
-            top_clientes = df_filtrado.groupby('nombre_completo')['monto_neto'].sum().reset_index()
-            top_clientes = top_clientes.sort_values('monto_neto', ascending=False).head(10)
+            clientes = get_clientes(
+                cargado_en, repr((fecha_inicio, fecha_fin, estados_reserva, tipos_habitacion, servicios, metodos_pago)),
+                df_filtrado
+            )
+            top_clientes = clientes.top(10)
             
             fig = px.bar(
                 top_clientes,
-                x='nombre_completo',
-                y='monto_neto',
+                x='etiqueta',
+                y='gasto',
                 title='Clientes con Mayor Consumo',
-                labels={'monto_neto': 'Consumo Total ($)', 'nombre_completo': 'Cliente'}
+                labels={'gasto': 'Consumo Total ($)', 'etiqueta': 'Cliente'}
             )
             st.plotly_chart(fig, use_container_width=True)
     
     with col_c2:
         if 'duracion_estadia' in df_filtrado.columns:
             st.markdown("### 📅 Distribución de Duración de Estadía")
-            fig = px.histogram(
-                df_filtrado,
-                x='duracion_estadia',
-                nbins=20,
+            estadias, _ = distribucion_de(
+                None if calculos_exactos else get_cuantiles(cargado_en, df), df_filtrado, 'duracion_estadia',
+                fecha_inicio, fecha_fin, exactos=calculos_exactos,
+                estado_reserva=estados_reserva,
+                tipo_habitacion=tipos_habitacion,
+                servicio_especial=servicios,
+                metodo_pago=metodos_pago,
+            )
+            fig = px.bar(
+                estadias.histograma(20),
+                x='centro',
+                y='conteo',
                 title='Distribución de Noches por Reserva',
-                labels={'duracion_estadia': 'Noches de Estadía'}
+                labels={'centro': 'Noches de Estadía', 'conteo': 'Cantidad'}
             )
             st.plotly_chart(fig, use_container_width=True)
 
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from hotel.disponibilidad import IndiceDisponibilidad
+from hotel.ocupacion import MatrizOcupacion
+
+
+def reservas():
+    """Habitación 1 con una estadía confirmada y otra cancelada superpuesta; habitación 2 libre."""
+    return pd.DataFrame({
+        'id_detalle_reserva': [1, 2, 3],
+        'id_habitacion': [1, 1, 2],
+        'estado_reserva': ['confirmada', 'cancelada', 'cancelada'],
+        'check_in': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-01']),
+        'check_out': pd.to_datetime(['2024-01-03', '2024-01-03', '2024-01-03']),
+        'precio_unitario': [100.0, 300.0, 200.0],
+    })
+
+
+def test_canceladas_no_ocupan_ni_suman_ingreso():
+    resumen = MatrizOcupacion(reservas()).resumen()
+    assert resumen['ocupadas'] == 2
+    assert resumen['disponibles'] == 4
+    assert resumen['ingreso'] == 200.0
+    assert resumen['adr'] == 100.0
+
+
+def test_ocupacion_coincide_con_disponibilidad():
+    df = reservas()
+    ocupacion = MatrizOcupacion(df)
+    libres = IndiceDisponibilidad(df).libres('2024-01-01', '2024-01-03')
+    ocupadas = ocupacion.habitaciones.loc[ocupacion.ocupada.any(axis=1), 'id_habitacion']
+    assert set(libres['id_habitacion']) == {2}
+    assert set(ocupadas) == {1}